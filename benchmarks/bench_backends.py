@@ -0,0 +1,53 @@
+"""
+Compare the parser backends: the hand-written RecursiveDescentParser with the CompiledScanner and the LALR(1) parser
+generated by lark. Throughput is reported for the trees and for the units, peak memory for the units. Construction
+time of the lalr backend is reported with and without its cache.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_backends.py
+"""
+import gc
+import io
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import read_grammar, generate_program, measure, measure_peak_memory
+from interpreter.parser.lalr_backend import LalrParser
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def recursive_descent(grammar: str, build_units: bool):
+    scanner = CompiledScanner(grammar)
+    return lambda program: RecursiveDescentParser(scanner, build_units=build_units).parse(io.StringIO(program))
+
+
+def lalr(grammar: str, build_units: bool):
+    return LalrParser(grammar, build_units=build_units).parse_text
+
+
+def main():
+    grammar = read_grammar()
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("built", "cached"):
+            seconds, _ = measure(lambda: LalrParser(grammar, cache_dir=Path(directory)))
+            print(f"lalr backend {name:<8} in {seconds * 1000:8.2f} ms")
+
+    for functions_count in (500, 2_000):
+        program = generate_program(functions_count)
+        lines = program.count('\n')
+        for name, backend in (("recursive", recursive_descent), ("lalr", lalr)):
+            for build_units in (False, True):
+                parse = backend(grammar, build_units)
+                gc.collect()
+                seconds, _ = measure(lambda: parse(program))
+                result = "units" if build_units else "tree"
+                report = f"{functions_count:>6} functions {name:<10} {result:<6} {lines / seconds:10.0f} lines/s"
+                if build_units:
+                    gc.collect()
+                    peak, _ = measure_peak_memory(lambda: parse(program))
+                    report += f" {peak / 1024 / 1024:10.1f} MiB peak"
+                print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Compare the memory of the trees with units and of the compact nodes which are converted from them. Memory is
+the memory which is allocated by the parsing (and the conversion) and is still used by the result, divided by
+the amount of the nodes with units.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_compact_nodes.py
+"""
+from benchmarks.common import read_grammar, generate_program, measure, measure_retained_memory
+from interpreter.compact_nodes import to_compact
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def main():
+    grammar = read_grammar()
+    scanner = CompiledScanner(grammar)
+    for functions_count in (500, 2_000):
+        program = generate_program(functions_count)
+
+        def parse():
+            return RecursiveDescentParser(scanner, build_units=True).parse_text(program)
+
+        tree_bytes, tree = measure_retained_memory(parse)
+        nodes_count = sum(1 for _ in to_compact(tree).iter_subtrees())
+        del tree
+        compact_bytes, _ = measure_retained_memory(lambda: to_compact(parse()))
+        seconds, _ = measure(lambda: to_compact(parse()))
+        for name, retained in (("trees", tree_bytes), ("compact", compact_bytes)):
+            print(f"{functions_count:>6} functions {nodes_count} nodes {name:<8} {retained / 1024 / 1024:8.1f} MiB "
+                  f"{retained / nodes_count:8.0f} bytes/node")
+        print(f"{functions_count:>6} functions parsing and conversion in {seconds * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare parsing of the expression heavy code by the precedence climbing and by descending through the rule
+of every binary operator. Tokens are scanned in advance, so only the parser is measured.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_expressions.py
+"""
+import gc
+import math
+
+from benchmarks.common import read_grammar, measure
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def generate_expressions_program(lines_count: int) -> str:
+    lines = ''.join(f"    let x_{ind} bool = a * {ind} + b - c % 2 > d or e and f != (g + h[{ind}]) * -k\n"
+                    f"    y = {ind}\n"
+                    for ind in range(lines_count))
+    return "main() None {\n" + lines + "}\n"
+
+
+def parse_best_time(parser: RecursiveDescentParser, tokens, repeats: int = 3) -> float:
+    """
+    Trees aren't kept between the runs, so the garbage collector has the same amount of objects to track
+    """
+    best = math.inf
+    for _ in range(repeats):
+        gc.collect()
+        seconds, _ = measure(lambda: parser.parse_tokens(tokens))
+        best = min(best, seconds)
+    return best
+
+
+def main():
+    grammar = read_grammar()
+    scanner = CompiledScanner(grammar)
+    tokens = list(scanner.iter_text_tokens(generate_expressions_program(20_000)))
+    small = list(scanner.iter_text_tokens(generate_expressions_program(100)))
+    assert RecursiveDescentParser(scanner, precedence_climbing=False).parse_tokens(small) == \
+           RecursiveDescentParser(scanner, precedence_climbing=True).parse_tokens(small)
+    for name, precedence_climbing in (("rule chain", False), ("precedence climbing", True)):
+        parser = RecursiveDescentParser(scanner, precedence_climbing=precedence_climbing)
+        seconds = parse_best_time(parser, tokens)
+        print(f"{name:<20} {len(tokens):>9} tokens {seconds:8.3f} s {seconds / len(tokens) * 1e9:8.1f} ns/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the compact nodes with the flat AST which stores the same nodes in the arrays. Memory and the amount of
+the objects tracked by the garbage collector are counted for the result which is kept after the conversion.
+Walk reads every unit field of every node the same way as the analyzer, for the flat AST it's done by the cursors.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_flat_ast.py
+"""
+import gc
+from functools import partial
+
+from benchmarks.common import read_grammar, generate_program, measure, measure_retained_memory
+from interpreter.compact_nodes import to_compact
+from interpreter.flat_ast import to_flat
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def tracked_objects_count() -> int:
+    gc.collect()
+    return len(gc.get_objects())
+
+
+def walk(root):
+    for node in root.iter_subtrees():
+        for name in node.fields:
+            getattr(node, name)
+
+
+def main():
+    grammar = read_grammar()
+    scanner = CompiledScanner(grammar)
+    for functions_count in (500, 2_000):
+        program = generate_program(functions_count)
+        tree = RecursiveDescentParser(scanner, build_units=True).parse_text(program)
+        nodes_count = sum(1 for _ in to_compact(tree).iter_subtrees())
+        for name, convert in (("compact", to_compact), ("flat", lambda it: to_flat(to_compact(it)))):
+            objects_before = tracked_objects_count()
+            retained, result = measure_retained_memory(lambda: convert(tree))
+            objects = tracked_objects_count() - objects_before
+            root = result.root if name == "flat" else result
+            seconds, _ = measure(partial(walk, root))
+            print(f"{functions_count:>6} functions {name:<8} {retained / nodes_count:8.0f} bytes/node "
+                  f"{objects:>8} tracked objects, walk in {seconds * 1000:10.2f} ms")
+            del result, root
+        seconds, _ = measure(lambda: to_flat(tree))
+        print(f"{functions_count:>6} functions flat AST built from the tree in {seconds * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
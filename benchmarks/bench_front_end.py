@@ -0,0 +1,38 @@
+"""
+Compare the front end that parses the lark tree and transforms it by the TreeTransformer with the parser that
+builds the units directly. Time and peak memory include scanning, parsing and building the units.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_front_end.py
+"""
+import gc
+import io
+
+from benchmarks.common import read_grammar, generate_program, measure, measure_peak_memory
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.tree_transformer import TreeTransformer
+
+
+def parse_and_transform(scanner: CompiledScanner, program: str):
+    with io.StringIO(program) as f:
+        return TreeTransformer().transform(RecursiveDescentParser(scanner).parse(f))
+
+
+def parse_units(scanner: CompiledScanner, program: str):
+    with io.StringIO(program) as f:
+        return RecursiveDescentParser(scanner, build_units=True).parse(f)
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    program = generate_program(2_000)
+    for name, front_end in (("parse and transform", parse_and_transform), ("build units", parse_units)):
+        gc.collect()
+        seconds, _ = measure(lambda: front_end(scanner, program))
+        gc.collect()
+        peak, _ = measure_peak_memory(lambda: front_end(scanner, program))
+        print(f"{name:<20} {len(program):>10} chars {seconds:8.3f} s {peak / 1024 / 1024:10.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
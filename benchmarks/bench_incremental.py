@@ -0,0 +1,38 @@
+"""
+Compare parsing of the whole program with the incremental parsing after a small edit of one function in the middle
+of the program. An edit that adds a line also moves the lines of the declarations after it.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_incremental.py
+"""
+import gc
+
+from benchmarks.common import read_grammar, generate_program, measure
+from interpreter.parser.incremental import IncrementalParser
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def main():
+    grammar = read_grammar()
+    scanner = CompiledScanner(grammar)
+    for functions_count in (500, 2_000):
+        program = generate_program(functions_count)
+        middle = program.index(f"compute_{functions_count // 2}(")
+        offset = program.index("var total int = 0", middle)
+        edits = (("same lines", program[:offset] + "var total int = 10" + program[offset + len("var total int = 0"):]),
+                 ("new line", program[:offset] + "let extra int = 1\n    " + program[offset:]))
+
+        gc.collect()
+        seconds, _ = measure(lambda: RecursiveDescentParser(scanner, build_units=True).parse_text(program))
+        print(f"{functions_count:>6} functions full parse  {seconds * 1000:10.2f} ms")
+        for name, edited in edits:
+            parser = IncrementalParser(grammar)
+            parser.parse(program)
+            gc.collect()
+            seconds, _ = measure(lambda: parser.parse(edited))
+            print(f"{functions_count:>6} functions {name:<11} {seconds * 1000:10.2f} ms, "
+                  f"{parser.parsed_declarations_count} declarations parsed")
+
+
+if __name__ == "__main__":
+    main()
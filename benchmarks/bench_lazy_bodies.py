@@ -0,0 +1,67 @@
+"""
+Measure the time to the first statement of main for the programs with many functions which aren't called.
+The program is parsed, analyzed and its functions are declared, then main is called. With the lazy bodies
+only the statements blocks of main and of the called function are parsed and analyzed.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_lazy_bodies.py
+"""
+import gc
+import io
+
+from benchmarks.common import read_grammar, measure
+from interpreter.interpretation import Interpreter
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.semantic_analyzer import SemanticAnalyzer
+
+
+def generate_function(ind: int) -> str:
+    # Variables are unique, the analyzer keeps the variables of all the functions in one closure
+    return f"""# function number {ind}
+compute_{ind}(n int) int {{
+    let items_{ind} List = [1, 2, {ind}]
+    let first_{ind} int = items_{ind}[0]
+    for item in items_{ind} {{ test_print(str(item * 2 - (n % 3))) }}
+    ret if n <= 1 {{
+        ret n
+    }} elif n > 100 {{
+        ret 0
+    }} else {{
+        ret compute_{ind}(n - 1) + compute_{ind}(n - 2)
+    }}
+}}
+
+"""
+
+
+def generate_program(functions_count: int) -> str:
+    functions = ''.join(generate_function(ind) for ind in range(functions_count))
+    return functions + """main() None {
+    test_print(str(compute_0(4)))
+}
+"""
+
+
+def run(scanner: CompiledScanner, program: str, lazy_bodies: bool):
+    parser = RecursiveDescentParser(scanner, build_units=True, lazy_bodies=lazy_bodies)
+    tree = parser.parse(io.StringIO(program))
+    SemanticAnalyzer().analyze(tree)
+    return Interpreter(is_test=True).interpret(tree)
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    for functions_count in (100, 500, 2_000):
+        program = generate_program(functions_count)
+        outputs = []
+        for lazy_bodies in (False, True):
+            gc.collect()
+            seconds, output = measure(lambda: run(scanner, program, lazy_bodies))
+            outputs.append(output)
+            name = "lazy" if lazy_bodies else "eager"
+            print(f"{functions_count:>6} functions {name:<6} {seconds:8.3f} s")
+        assert outputs[0] == outputs[1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Measure how the scanning time of string literals and comments grows with their length.
+Time per char should stay the same for any length.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_long_tokens.py
+"""
+import io
+
+from benchmarks.common import read_grammar, measure, measure_peak_memory
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.scanner import Scanner
+
+
+def scan(scanner, program: str) -> int:
+    with io.StringIO(program) as f:
+        return sum(1 for _ in scanner.iter_tokens(f))
+
+
+def report(name: str, program: str, scanner):
+    seconds, _ = measure(lambda: scan(scanner, program))
+    peak, _ = measure_peak_memory(lambda: scan(scanner, program))
+    print(f"{name:<24} {len(program):>10} chars {seconds:8.3f} s "
+          f"{seconds / len(program) * 1e9:8.1f} ns/char {peak / len(program):8.2f} peak bytes/char")
+
+
+def main():
+    grammar = read_grammar()
+    for length in (1_000, 10_000, 100_000, 1_000_000):
+        string = 'let data str = "' + 'x' * length + '"\n'
+        comment = '# ' + 'x' * length + '\n'
+        report("Scanner string", string, Scanner(grammar))
+        report("Scanner comment", comment, Scanner(grammar))
+        report("CompiledScanner string", string, CompiledScanner(grammar))
+        report("CompiledScanner comment", comment, CompiledScanner(grammar))
+
+
+if __name__ == "__main__":
+    main()
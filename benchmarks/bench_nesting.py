@@ -0,0 +1,43 @@
+"""
+Compare the recursive parser with the explicit stack parser on the flat generated program and on deeply
+nested expressions. The recursive parser is measured only on the depths it can parse without raising
+the recursion limit. Tokens are scanned in advance, so only the parsers and the transformer are measured.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_nesting.py
+"""
+from benchmarks.bench_expressions import parse_best_time
+from benchmarks.common import read_grammar, generate_program, measure
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.parser.stack_parser import ExplicitStackParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.tree_transformer import TreeTransformer
+
+
+def generate_nested_program(depth: int) -> str:
+    return "main() None {\n    ret " + "(-a + " * depth + "1" + ")" * depth + "\n}\n"
+
+
+def report(name: str, seconds: float, tokens_count: int):
+    print(f"{name:<32} {tokens_count:>9} tokens {seconds:8.3f} s {seconds / tokens_count * 1e9:8.1f} ns/token")
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    tokens = list(scanner.iter_text_tokens(generate_program(2_000)))
+    for parser in (RecursiveDescentParser(scanner), ExplicitStackParser(scanner)):
+        report(f"{type(parser).__name__}", parse_best_time(parser, tokens), len(tokens))
+
+    shallow = list(scanner.iter_text_tokens(generate_nested_program(50)))
+    for parser in (RecursiveDescentParser(scanner), ExplicitStackParser(scanner)):
+        report(f"{type(parser).__name__} depth 50", parse_best_time(parser, shallow), len(shallow))
+
+    for depth in (1_000, 10_000, 100_000):
+        nested = list(scanner.iter_text_tokens(generate_nested_program(depth)))
+        seconds, tree = measure(lambda: ExplicitStackParser(scanner).parse_tokens(nested))
+        report(f"stack parse depth {depth}", seconds, len(nested))
+        seconds, _ = measure(lambda: TreeTransformer().transform_on_stack(tree))
+        report(f"stack transform depth {depth}", seconds, len(nested))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the parser with the parallel front end for different amounts of the worker processes. The main process
+splits the source, receives the declarations from the workers and shifts their identifiers, the time of these
+steps is reported separately because it's not parallel.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_parallel.py
+"""
+import gc
+import os
+import pickle
+
+from benchmarks.common import read_grammar, generate_program, measure
+from interpreter.parser.parallel import parse_in_parallel, split_source, init_worker, parse_chunk, \
+    shift_identifiers, garbage_collection_paused, CHUNKS_PER_WORKER
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def merge_time(grammar: str, program: str, workers: int) -> float:
+    init_worker(grammar)
+    results = [pickle.dumps(parse_chunk(chunk)) for chunk in split_source(program, workers * CHUNKS_PER_WORKER)]
+
+    def merge():
+        identifiers_count = 0
+        for result in results:
+            declarations, chunk_identifiers_count = pickle.loads(result)
+            shift_identifiers(declarations, identifiers_count)
+            identifiers_count += chunk_identifiers_count
+
+    with garbage_collection_paused():
+        seconds, _ = measure(merge)
+    return seconds
+
+
+def main():
+    grammar = read_grammar()
+    program = generate_program(2_000)
+    gc.collect()
+    seconds, _ = measure(lambda: RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse_text(program))
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'sequential':<12} {seconds:8.3f} s")
+    for workers in sorted({2, 4, os.cpu_count() or 1}):
+        gc.collect()
+        seconds, _ = measure(lambda: parse_in_parallel(grammar, program, workers))
+        gc.collect()
+        print(f"{workers:>2} workers   {seconds:8.3f} s, merge in the main process {merge_time(grammar, program, workers):8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare the throughput of the Scanner and the CompiledScanner.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_scanner.py
+"""
+import io
+
+from benchmarks.common import read_grammar, generate_program, measure, measure_peak_memory
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.scanner import Scanner
+
+
+def scan(scanner, program: str) -> int:
+    with io.StringIO(program) as f:
+        return sum(1 for _ in scanner.iter_tokens(f))
+
+
+def report(name: str, program: str, scanner):
+    seconds, tokens = measure(lambda: scan(scanner, program))
+    print(f"{name:<16} {len(program):>10} chars {tokens:>9} tokens {seconds:8.3f} s "
+          f"{len(program) / seconds / 1000:10.1f} kchars/s")
+
+
+def report_buffer(name: str, program: str, scanner: CompiledScanner):
+    buffer = program.encode('utf-8')
+
+    def scan_buffer():
+        return sum(1 for _ in scanner.iter_buffer_tokens(buffer))
+
+    seconds, tokens = measure(scan_buffer)
+    peak, _ = measure_peak_memory(scan_buffer)
+    print(f"{name:<16} {len(buffer):>10} bytes {tokens:>9} tokens {seconds:8.3f} s "
+          f"{len(buffer) / seconds / 1000:10.1f} kbytes/s {peak / 1024:10.1f} KiB peak")
+
+
+def report_stream(name: str, program: str, scanner: CompiledScanner):
+    data = program.encode('utf-8')
+
+    def scan_stream():
+        with io.BytesIO(data) as f:
+            return sum(1 for _ in scanner.iter_stream_tokens(f))
+
+    seconds, tokens = measure(scan_stream)
+    peak, _ = measure_peak_memory(scan_stream)
+    print(f"{name:<16} {len(data):>10} bytes {tokens:>9} tokens {seconds:8.3f} s "
+          f"{len(data) / seconds / 1000:10.1f} kbytes/s {peak / 1024:10.1f} KiB peak")
+
+
+def main():
+    grammar = read_grammar()
+    small = generate_program(5)
+    report("Scanner", small, Scanner(grammar))
+    report("CompiledScanner", small, CompiledScanner(grammar))
+    large = generate_program(5_000)
+    report("CompiledScanner", large, CompiledScanner(grammar))
+    report_buffer("bytes buffer", large, CompiledScanner(grammar))
+    report_stream("chunked stream", large, CompiledScanner(grammar))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare parsing of the whole program with streaming its function declarations. Every streamed declaration is
+dropped after it's counted, the same way as a stage that processes the declarations one by one would do it.
+The program is streamed from a file, so the memory isn't taken by the program text.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_streaming.py
+"""
+import gc
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import read_grammar, generate_program, measure, measure_peak_memory
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+def parse_whole(scanner: CompiledScanner, path: Path) -> int:
+    with open(path) as f:
+        return len(RecursiveDescentParser(scanner, build_units=True).parse(f).children)
+
+
+def stream(scanner: CompiledScanner, path: Path) -> int:
+    with open(path) as f:
+        return sum(1 for _ in RecursiveDescentParser(scanner, build_units=True).iter_function_declarations(f))
+
+
+def first_declaration(scanner: CompiledScanner, path: Path):
+    with open(path) as f:
+        return next(RecursiveDescentParser(scanner, build_units=True).iter_function_declarations(f))
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    with tempfile.TemporaryDirectory() as directory:
+        for functions_count in (500, 2_000):
+            path = Path(directory) / "program.txt"
+            path.write_text(generate_program(functions_count))
+            for name, front_end in (("parse", parse_whole), ("stream", stream)):
+                gc.collect()
+                seconds, count = measure(lambda: front_end(scanner, path))
+                gc.collect()
+                peak, _ = measure_peak_memory(lambda: front_end(scanner, path))
+                print(f"{functions_count:>6} functions {name:<8} {seconds:8.3f} s {peak / 1024 / 1024:10.1f} MiB peak")
+            seconds, _ = measure(lambda: first_declaration(scanner, path))
+            print(f"{functions_count:>6} functions first declaration streamed in {seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Compare the memory taken by a list of lark tokens and by the TokenBuffer, and the parsing of both. Parser reads
+the kinds of the buffered tokens from its arrays and creates lark tokens only for the leaves of the tree.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_token_buffer.py
+"""
+from benchmarks.common import read_grammar, generate_program, measure_peak_memory, measure
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.token_buffer import TokenBuffer
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    program = generate_program(2_000)
+
+    # The program text is kept alive by both representations, so it's not measured
+    list_peak, tokens = measure_peak_memory(lambda: list(scanner.iter_text_tokens(program)))
+    buffer_peak, buffer = measure_peak_memory(lambda: TokenBuffer.scan(scanner, program))
+    assert len(tokens) == len(buffer)
+    print(f"{len(tokens)} tokens")
+    print(f"list of lark tokens {list_peak / 1024 / 1024:8.2f} MiB {list_peak / len(tokens):8.1f} bytes per token")
+    print(f"TokenBuffer         {buffer_peak / 1024 / 1024:8.2f} MiB {buffer_peak / len(buffer):8.1f} bytes per token")
+
+    parser = RecursiveDescentParser(scanner)
+    list_seconds, _ = measure(lambda: parser.parse_tokens(tokens))
+    buffer_seconds, _ = measure(lambda: parser.parse_tokens(buffer))
+    print(f"parse list of lark tokens {list_seconds * 1000:10.2f} ms")
+    print(f"parse TokenBuffer         {buffer_seconds * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measure the token access overhead of the parser. Tokens are scanned in advance, so only the TokensController
+and the parser are measured. Peak memory of reading streamed tokens is measured for different history sizes.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_tokens_controller.py
+"""
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import read_grammar, generate_program, measure, measure_peak_memory
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.tokens_controller import TokensController
+
+
+def drain(controller: TokensController, tokens) -> int:
+    """
+    Read all the tokens peeking every token before it's read, the same way as the parser does it
+    """
+    controller.reload(iter(tokens))
+    count = 0
+    while controller.peek() is not None:
+        controller.next()
+        count += 1
+    return count
+
+
+def report(name: str, seconds: float, tokens_count: int):
+    print(f"{name:<20} {tokens_count:>9} tokens {seconds:8.3f} s {seconds / tokens_count * 1e9:8.1f} ns/token")
+
+
+def report_history_memory(scanner: CompiledScanner, functions_count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        # Program is streamed from the file, so only the tokens kept by the controller take memory
+        path = Path(directory) / "program.txt"
+        path.write_text(generate_program(functions_count))
+        for history_size in (0, 32, None):
+            def drain_stream():
+                with open(path) as f:
+                    return drain(TokensController(history_size=history_size), scanner.iter_stream_tokens(f))
+
+            peak, count = measure_peak_memory(drain_stream)
+            print(f"history {str(history_size):<6} {count:>9} tokens {peak / 1024:10.1f} KiB peak")
+
+
+def main():
+    grammar = read_grammar()
+    scanner = CompiledScanner(grammar)
+    tokens = list(scanner.iter_text_tokens(generate_program(2_000)))
+    seconds, count = measure(lambda: drain(TokensController(), tokens))
+    report("peek and next", seconds, count)
+    parser = RecursiveDescentParser(scanner)
+    seconds, _ = measure(lambda: parser.parse_tokens(tokens))
+    report("parse", seconds, len(tokens))
+    for functions_count in (250, 1_000, 4_000):
+        report_history_memory(scanner, functions_count)
+
+
+if __name__ == "__main__":
+    main()
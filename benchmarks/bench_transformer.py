@@ -0,0 +1,28 @@
+"""
+Compare the recursive transform of the lark Transformer with the transform on the explicit stack which dispatches
+the nodes through the callbacks table. Tree is parsed in advance, so only the transformation is measured.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_transformer.py
+"""
+import gc
+
+from benchmarks.common import read_grammar, generate_program, measure
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.tree_transformer import TreeTransformer
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    for functions_count in (500, 2_000):
+        tree = RecursiveDescentParser(scanner).parse_text(generate_program(functions_count))
+        nodes_count = sum(1 for _ in tree.iter_subtrees())
+        for name in ("transform", "transform_on_stack"):
+            gc.collect()
+            seconds = min(measure(lambda: getattr(TreeTransformer(), name)(tree))[0] for _ in range(5))
+            print(f"{functions_count:>6} functions {name:<20} {seconds * 1000:10.2f} ms "
+                  f"{seconds / nodes_count * 1e9:8.1f} ns/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Measure the semantic analysis of a generated program which is type checked without errors: declarations of the simple
+and the iterable types, comparisons and reassignments. Program is parsed in advance, so only the analysis is measured.
+
+Run from the project root: PYTHONPATH=src:. python benchmarks/bench_type_checking.py
+"""
+import gc
+
+from benchmarks.common import read_grammar, measure, measure_peak_memory
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.semantic_analyzer import SemanticAnalyzer
+
+
+def generate_checked_function(ind: int) -> str:
+    return f"""check_{ind}() None {{
+    let a_{ind} int = {ind} + 2 * 3
+    let items_{ind} IntList = [a_{ind}, {ind}]
+    let flags_{ind} BoolList = [a_{ind} > 1, a_{ind} == {ind}]
+    let is_big_{ind} bool = items_{ind}[0] > a_{ind}
+    var total_{ind} int = 0
+    total_{ind} = total_{ind} + a_{ind} * 2
+}}
+
+"""
+
+
+def generate_checked_program(functions_count: int) -> str:
+    functions = ''.join(generate_checked_function(ind) for ind in range(functions_count))
+    return functions + "main() None {\n    let result int = 0\n}\n"
+
+
+def main():
+    scanner = CompiledScanner(read_grammar())
+    for functions_count in (500, 2_000):
+        tree = RecursiveDescentParser(scanner, build_units=True).parse_text(generate_checked_program(functions_count))
+        gc.collect()
+        seconds = min(measure(lambda: SemanticAnalyzer().analyze(tree))[0] for _ in range(3))
+        gc.collect()
+        peak, _ = measure_peak_memory(lambda: SemanticAnalyzer().analyze(tree))
+        print(f"{functions_count:>6} functions analysis in {seconds * 1000:10.2f} ms "
+              f"{peak / 1024 / 1024:8.2f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
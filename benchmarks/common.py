@@ -0,0 +1,75 @@
+import gc
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Tuple, Any
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def read_grammar() -> str:
+    with open(PROJECT_ROOT / "grammar.txt") as f:
+        return f.read()
+
+
+def generate_function(ind: int) -> str:
+    return f"""# function number {ind}
+compute_{ind}(a int, b int) int {{
+    let items IntList = [a, b, {ind}]
+    var total int = 0
+    for item in items {{
+        total = total + item * 2 - (a % 3)
+    }}
+    let is_big bool = total > 100 and a != b or not_used_{ind} == 1.5
+    ret if is_big {{ ret total }} elif total < 0 {{ ret 0 }} else {{ ret "small" }}
+}}
+
+"""
+
+
+def generate_program(functions_count: int) -> str:
+    """
+    Generate a program containing the given amount of the functions (~10 lines each) and the main function
+    """
+    functions = ''.join(generate_function(ind) for ind in range(functions_count))
+    return functions + """main() None {
+    print(str(compute_0(1, 2)))
+}
+"""
+
+
+def measure(func: Callable[[], Any]) -> Tuple[float, Any]:
+    """
+    :return: a tuple containing the time of the call in seconds and the result
+    """
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def measure_peak_memory(func: Callable[[], Any]) -> Tuple[int, Any]:
+    """
+    :return: a tuple containing the peak of the allocated memory in bytes and the result
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def measure_retained_memory(func: Callable[[], Any]) -> Tuple[int, Any]:
+    """
+    :return: a tuple containing the memory in bytes which is allocated by the call and still used by the result
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained, result
@@ -0,0 +1,60 @@
+import sys
+from dataclasses import fields
+from typing import Dict, Type as ClassType
+
+from lark import Token
+
+from interpreter.language_units import *
+
+
+def compact_node_class(data: str, unit_class: type) -> ClassType[CompactNode]:
+    """
+    Compact node class of the rule. Node is the unit with the identifier and the line, e.x. the node
+    of the assignment is an Assignment, so the analyzer and the interpreter handle it as the unit of the tree
+    :param data: rule name
+    :param unit_class: unit of the rule
+    """
+    namespace = {'__slots__': ('identifier', 'line'), 'data': data,
+                 'fields': tuple(field.name for field in fields(unit_class))}
+    return type(unit_class.__name__ + "Node", (CompactNode, unit_class), namespace)
+
+
+# rule name -> compact node class
+COMPACT_NODE_CLASSES: Dict[str, ClassType[CompactNode]] = {
+    data: compact_node_class(data, unit_class) for data, unit_class in RULE_UNITS.items()}
+
+
+def compact_value(value, nodes: List[Tuple[TreeWithUnit, CompactNode]]):
+    """
+    Convert the unit field. Trees are replaced by the empty compact nodes, which are added to the nodes to fill them
+    """
+    if isinstance(value, TreeWithUnit):
+        node = COMPACT_NODE_CLASSES[value.data].__new__(COMPACT_NODE_CLASSES[value.data])
+        nodes.append((value, node))
+        return node
+    if isinstance(value, list):
+        return [compact_value(it, nodes) for it in value]
+    if isinstance(value, Token):
+        # Operators and keywords are interned, so the tokens with the same text share one string
+        return sys.intern(str(value))
+    return value
+
+
+def to_compact(tree: TreeWithUnit) -> CompactNode:
+    """
+    Convert the tree with units to the compact nodes. Nodes keep the identifiers of the trees, lines of the nodes
+    without children are UNKNOWN_LINE. Tree is walked with an explicit stack, so its depth isn't limited
+    by the recursion limit. Statements blocks of the lazy function declarations are loaded
+    :param tree: transformed tree
+    :return: compact node of the tree
+    """
+    nodes = []
+    root = compact_value(tree, nodes)
+    while nodes:
+        tree, node = nodes.pop()
+        node.identifier = tree.identifier
+        line = getattr(tree.meta, 'line', None)
+        node.line = UNKNOWN_LINE if line is None else line
+        for name in node.fields:
+            setattr(node, name, compact_value(getattr(tree.unit, name), nodes))
+    return root
@@ -0,0 +1,214 @@
+import sys
+from array import array
+from typing import Dict, Hashable
+
+from interpreter.compact_nodes import COMPACT_NODE_CLASSES
+from interpreter.language_units import *
+
+# Kinds of the rows. Node of the rule has the kind of its compact node class, each unit field of the node is
+# a child row of the node: a node, a list, a string, e.x. a name or an operator, a literal or None
+NODE_CLASSES = [COMPACT_NODE_CLASSES[data] for data in sorted(COMPACT_NODE_CLASSES)]
+LIST_KIND = len(NODE_CLASSES)
+STRING_KIND = LIST_KIND + 1
+LITERAL_KIND = LIST_KIND + 2
+NONE_KIND = LIST_KIND + 3
+
+# Index of the missing row, e.x. the first child of an empty list
+NO_ROW = -1
+
+
+class FlatAst:
+    def __init__(self):
+        """
+        AST stored in the parallel arrays, one row per node and per unit field, so millions of nodes take a few
+        arrays instead of millions of objects tracked by the garbage collector. Row 0 is the root node
+        """
+        self.kinds = array('B')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.lines = array('i')
+        # identifier of the node or NO_ROW for the field rows
+        self.identifiers = array('i')
+        # index of the string or literal value in the pool or NO_ROW
+        self.values = array('i')
+        self.pool: List[Any] = []
+        self._pool_indexes: Dict[Hashable, int] = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def root(self) -> 'FlatCursor':
+        return self.cursor(0)
+
+    def cursor(self, row: int) -> 'FlatCursor':
+        return CURSOR_CLASSES[self.kinds[row]](self, row)
+
+    def add_row(self, kind: int, line: int = UNKNOWN_LINE, identifier: int = NO_ROW, value: int = NO_ROW) -> int:
+        self.kinds.append(kind)
+        self.first_children.append(NO_ROW)
+        self.next_siblings.append(NO_ROW)
+        self.lines.append(line)
+        self.identifiers.append(identifier)
+        self.values.append(value)
+        return len(self.kinds) - 1
+
+    def pool_index(self, value) -> int:
+        # Type is a part of the key because True == 1 and 1 == 1.0
+        key = (type(value), value)
+        index = self._pool_indexes.get(key)
+        if index is None:
+            index = len(self.pool)
+            self.pool.append(value)
+            self._pool_indexes[key] = index
+        return index
+
+    def iter_children(self, row: int) -> Iterator[int]:
+        child = self.first_children[row]
+        while child != NO_ROW:
+            yield child
+            child = self.next_siblings[child]
+
+    def value(self, row: int):
+        """
+        :return: the unit field value which is stored in the row. Nodes are returned as the cursors
+        """
+        kind = self.kinds[row]
+        if kind < LIST_KIND:
+            return CURSOR_CLASSES[kind](self, row)
+        if kind == LIST_KIND:
+            return [self.value(child) for child in self.iter_children(row)]
+        if kind == STRING_KIND:
+            return self.pool[self.values[row]]
+        if kind == LITERAL_KIND:
+            return SimpleLiteral(self.pool[self.values[row]], self.lines[row])
+        return None
+
+    def to_nodes(self) -> CompactNode:
+        """
+        Build the compact nodes, they're equal to the nodes which the flat AST was built from
+        """
+        nodes: Dict[int, CompactNode] = {}
+        # Node rows are added before their children, so the nodes are created before they're used as the fields
+        for row in reversed(range(len(self))):
+            kind = self.kinds[row]
+            if kind >= LIST_KIND:
+                continue
+            node = NODE_CLASSES[kind].__new__(NODE_CLASSES[kind])
+            node.identifier = self.identifiers[row]
+            node.line = self.lines[row]
+            for name, child in zip(node.fields, self.iter_children(row)):
+                setattr(node, name, self._node_value(child, nodes))
+            nodes[row] = node
+        return nodes[0]
+
+    def _node_value(self, row: int, nodes: Dict[int, CompactNode]):
+        kind = self.kinds[row]
+        if kind < LIST_KIND:
+            return nodes[row]
+        if kind == LIST_KIND:
+            return [self._node_value(child, nodes) for child in self.iter_children(row)]
+        return self.value(row)
+
+
+def node_line(node: AnyNode) -> int:
+    if isinstance(node, TreeWithUnit):
+        line = getattr(node.meta, 'line', None)
+        return UNKNOWN_LINE if line is None else line
+    return node.line
+
+
+def to_flat(node: AnyNode) -> FlatAst:
+    """
+    Store the tree with units or the compact nodes in the flat AST. Nodes are walked with an explicit stack,
+    so the depth isn't limited by the recursion limit
+    :param node: root node
+    """
+    ast = FlatAst()
+    kinds = {cls.data: kind for kind, cls in enumerate(NODE_CLASSES)}
+    # rows which children aren't added yet and their values
+    stack = [(ast.add_row(kinds[node.data], node_line(node), node.identifier), node)]
+    while stack:
+        row, value = stack.pop()
+        if isinstance(value, NODE_TYPES):
+            children = [getattr(value.unit, name) for name in NODE_CLASSES[ast.kinds[row]].fields]
+        else:
+            children = value
+        previous = NO_ROW
+        for child in children:
+            if isinstance(child, NODE_TYPES):
+                child_row = ast.add_row(kinds[child.data], node_line(child), child.identifier)
+                stack.append((child_row, child))
+            elif isinstance(child, list):
+                child_row = ast.add_row(LIST_KIND)
+                stack.append((child_row, child))
+            elif isinstance(child, str):
+                child_row = ast.add_row(STRING_KIND, value=ast.pool_index(sys.intern(str(child))))
+            elif isinstance(child, SimpleLiteral):
+                child_row = ast.add_row(LITERAL_KIND, child.line, value=ast.pool_index(child.value))
+            else:
+                assert child is None, "Unexpected unit field: " + repr(child)
+                child_row = ast.add_row(NONE_KIND)
+            if previous == NO_ROW:
+                ast.first_children[row] = child_row
+            else:
+                ast.next_siblings[previous] = child_row
+            previous = child_row
+    return ast
+
+
+class FlatCursor(CompactNode):
+    """
+    Node of the flat AST. Cursor of a rule is derived from the unit of the rule and reads the unit fields
+    from the rows, so the analyzer and the interpreter walk the flat AST the same way as the compact nodes.
+    Cursors are created when they're accessed and aren't stored in the AST
+    """
+
+    __slots__ = ()
+    ast: FlatAst
+    row: int
+
+    @property
+    def identifier(self) -> int:
+        return self.ast.identifiers[self.row]
+
+    @property
+    def line(self) -> int:
+        return self.ast.lines[self.row]
+
+    def field(self, index: int):
+        child = self.ast.first_children[self.row]
+        for _ in range(index):
+            child = self.ast.next_siblings[child]
+        return self.ast.value(child)
+
+    def iter_child_nodes(self) -> Iterator['FlatCursor']:
+        ast = self.ast
+        for child in ast.iter_children(self.row):
+            kind = ast.kinds[child]
+            if kind < LIST_KIND:
+                yield CURSOR_CLASSES[kind](ast, child)
+            elif kind == LIST_KIND:
+                yield from (CURSOR_CLASSES[ast.kinds[it]](ast, it) for it in ast.iter_children(child)
+                            if ast.kinds[it] < LIST_KIND)
+
+
+def cursor_class(node_class) -> type:
+    """
+    :return: cursor class which is derived from the same unit as the compact node class
+    """
+    unit_class = node_class.__bases__[1]
+
+    def __init__(self, ast: FlatAst, row: int):
+        self.ast = ast
+        self.row = row
+
+    namespace = {'__slots__': ('ast', 'row'), '__init__': __init__,
+                 'data': node_class.data, 'fields': node_class.fields}
+    for ind, name in enumerate(node_class.fields):
+        namespace[name] = property(lambda self, ind_=ind: self.field(ind_))
+    return type(unit_class.__name__ + "Cursor", (FlatCursor, unit_class), namespace)
+
+
+# kind -> cursor class, only the kinds of the nodes have cursors
+CURSOR_CLASSES = [cursor_class(cls) for cls in NODE_CLASSES]
@@ -93,7 +93,7 @@ class Interpreter(Visitor):
         :param node: node that gets evaluated.
         :return: the result of the evaluated expression
         """
-        if isinstance(node, TreeWithUnit):
+        if isinstance(node, NODE_TYPES):
             return self.visit_once(node)
         if isinstance(node, SimpleLiteral):
             return node.value
@@ -153,7 +153,7 @@ class Interpreter(Visitor):
                 if self.loopContext is not None and self.loopContext.should_break:
                     break
                 value = self.visit_once(x)
-                if isinstance(x, TreeWithUnit) and isinstance(x.unit, ReturnStatement):
+                if isinstance(x, NODE_TYPES) and isinstance(x.unit, ReturnStatement):
                     return_value = value
             return return_value
 
@@ -202,7 +202,7 @@ class Interpreter(Visitor):
         left = node.unit.left
 
         # Variable declaration
-        if isinstance(node.unit.left, TreeWithUnit):
+        if isinstance(node.unit.left, NODE_TYPES):
             variable_declaration = left.unit
             assert isinstance(variable_declaration, VariableDeclaration)
             name = variable_declaration.variable_name
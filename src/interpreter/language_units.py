@@ -1,53 +1,104 @@
 from abc import abstractmethod, ABC
 from dataclasses import dataclass
 from textwrap import indent
-from typing import List, Union, Optional, TypeVar, Generic, Any
+from typing import List, Union, Optional, TypeVar, Generic, Any, Callable, Tuple, Iterator, Dict, Iterable
 
 from lark import Tree
 
 
 class UnitType:
-    pass
+    """
+    Types are interned: the constructors return the same object for the equal types, so the types are compared
+    by identity and the type checking doesn't create new types. Interned types are kept in the class level
+    caches for the lifetime of the process, they're shared by all the analyses. Programs have a few distinct types,
+    so the caches stay small
+    """
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self})"
 
 
 class UnknownIterableItemType(UnitType):
+    __slots__ = ()
+    _instance: Optional['UnknownIterableItemType'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return UnknownIterableItemType, ()
+
     def __str__(self) -> str:
         return "Unknown"
 
 
 class SimpleType(UnitType):
-    def __init__(self, value: str):
-        self.value = value
+    __slots__ = ('value',)
+    _instances: Dict[str, 'SimpleType'] = {}
+
+    def __new__(cls, value: str):
+        instance = cls._instances.get(value)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.value = value
+            cls._instances[value] = instance
+        return instance
+
+    def __reduce__(self):
+        return SimpleType, (self.value,)
 
     def __str__(self) -> str:
         return self.value
 
 
-@dataclass
 class IterableType(UnitType):
-    item_type: UnitType
+    __slots__ = ('item_type',)
+    _instances: Dict[Optional[UnitType], 'IterableType'] = {}
+
+    def __new__(cls, item_type: UnitType):
+        instance = cls._instances.get(item_type)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.item_type = item_type
+            cls._instances[item_type] = instance
+        return instance
 
-    def __init__(self, item_type: UnitType) -> None:
-        self.item_type = item_type
+    def __reduce__(self):
+        return IterableType, (self.item_type,)
 
     def __str__(self) -> str:
         return f'[{self.item_type}]'
 
 
-@dataclass
 class FunctionType(UnitType):
-    param_types: List[UnitType]
-    return_type: UnitType
+    __slots__ = ('param_types', 'return_type')
+    _instances: Dict[Tuple[Tuple[UnitType, ...], UnitType], 'FunctionType'] = {}
 
-    def __init__(self, param_types: List[UnitType], return_type: UnitType) -> None:
-        self.param_types = param_types
-        self.return_type = return_type
+    def __new__(cls, param_types: Iterable[UnitType], return_type: UnitType):
+        key = (tuple(param_types), return_type)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.param_types, instance.return_type = key
+            cls._instances[key] = instance
+        return instance
+
+    def __reduce__(self):
+        return FunctionType, (self.param_types, self.return_type)
 
     def __str__(self) -> str:
         params = ", ".join(str(x) for x in self.param_types)
         return f'({params}) -> {self.return_type}'
 
 
+BOOL_TYPE = SimpleType("bool")
+NONE_TYPE = SimpleType("None")
+
+
 T = TypeVar("T")
 Name = str
 
@@ -65,11 +116,56 @@ class TreeWithUnit(Tree, Generic[T]):
         self.identifier = identifier
 
 
+# Line of the compact node without children, e.x. of an empty statements block
+UNKNOWN_LINE = -1
+
+
+class CompactNode:
+    """
+    Node which is its own unit. Units have slots, so the compact node which is derived from a unit keeps only
+    its fields, identifier and line instead of the lark tree and the unit, see the interpreter.compact_nodes
+    """
+
+    __slots__ = ()
+    # Rule name of the node, visitors call their methods by it the same way as for the trees
+    data: str
+    # Names of the unit fields
+    fields: Tuple[str, ...] = ()
+
+    @property
+    def unit(self):
+        return self
+
+    def iter_child_nodes(self) -> Iterator['CompactNode']:
+        for name in self.fields:
+            value = getattr(self, name)
+            if isinstance(value, CompactNode):
+                yield value
+            elif isinstance(value, list):
+                yield from (it for it in value if isinstance(it, CompactNode))
+
+    def iter_subtrees(self) -> Iterator['CompactNode']:
+        """
+        Iterate over the nodes bottom-up in the same order as the Tree.iter_subtrees, so the lark visitors
+        can visit the compact nodes
+        """
+        queue = [self]
+        for node in queue:
+            queue += reversed(list(node.iter_child_nodes()))
+        return reversed(queue)
+
+
+# Nodes which have units
+NODE_TYPES = (TreeWithUnit, CompactNode)
+
+
 class Resolvable(ABC):
     """
     Abstract class for nodes which type cannot be resolved instantly
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def resolve_type(self, resolve_type_func) -> Optional[UnitType]:
         """
@@ -87,6 +183,8 @@ class ResolvableByStatementsBlock(ABC):
     Abstract class for nodes which are resolved
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def resolve_type(self, get_return_type_func) -> Optional[UnitType]:
         """
@@ -103,6 +201,8 @@ class Typed(ABC):
     Abstract class for nodes which type can be resolved instantly
     """
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def type(self) -> Optional[UnitType]:
@@ -111,8 +211,9 @@ class Typed(ABC):
 
 @dataclass
 class SimpleLiteral(Typed):
+    __slots__ = ('value', 'line')
     value: Any
-    line: str
+    line: int
 
     def __repr__(self):
         return str(self.value)
@@ -125,11 +226,12 @@ class SimpleLiteral(Typed):
         return SimpleType(type(self.value).__name__)
 
 
-AnyNode = Union[Name, SimpleLiteral, TreeWithUnit]
+AnyNode = Union[Name, SimpleLiteral, TreeWithUnit, CompactNode]
 
 
 @dataclass
 class Type:
+    __slots__ = ('simple_types',)
     simple_types: List[str]
 
     def __str__(self):
@@ -154,11 +256,12 @@ class Type:
 
 @dataclass
 class PrimaryExpression:
-    pass
+    __slots__ = ()
 
 
 @dataclass
 class FunctionParameter(Typed):
+    __slots__ = ('name', 'type_node')
     name: Name
     type_node: TreeWithUnit[Type]
 
@@ -171,11 +274,12 @@ class FunctionParameter(Typed):
 
 
 class Statement:
-    pass
+    __slots__ = ()
 
 
 @dataclass
 class StatementsBlock:
+    __slots__ = ('statements',)
     statements: List[TreeWithUnit[Statement]]
 
     def __str__(self):
@@ -184,6 +288,7 @@ class StatementsBlock:
 
 @dataclass
 class VariableDeclaration(Typed):
+    __slots__ = ('var_or_let', 'variable_name', 'type_node')
     var_or_let: str
     variable_name: Name
     type_node: TreeWithUnit[Type]
@@ -200,17 +305,18 @@ class VariableDeclaration(Typed):
 
 @dataclass
 class PostfixUnarySuffix:
-    pass
+    __slots__ = ()
 
 
 def custom_str(node: Union[AnyNode, str]):
-    if isinstance(node, TreeWithUnit):
+    if isinstance(node, NODE_TYPES):
         return str(node.unit)
     return str(node)
 
 
 @dataclass
 class PostfixUnaryExpression(Resolvable):
+    __slots__ = ('primary_expression', 'suffixes')
     primary_expression: AnyNode
     suffixes: List[TreeWithUnit[PostfixUnarySuffix]]
 
@@ -234,6 +340,7 @@ class PostfixUnaryExpression(Resolvable):
 
 @dataclass
 class PrefixUnaryExpression(Resolvable):
+    __slots__ = ('prefix_operator', 'postfix_unary_expression')
     prefix_operator: str
     postfix_unary_expression: AnyNode
 
@@ -246,6 +353,7 @@ class PrefixUnaryExpression(Resolvable):
 
 @dataclass
 class MultiplicativeExpression(Resolvable):
+    __slots__ = ('children',)
     children: List[AnyNode]
 
     def resolve_type(self, resolve_type_func) -> Optional[UnitType]:
@@ -258,6 +366,7 @@ class MultiplicativeExpression(Resolvable):
 
 @dataclass
 class AdditiveExpression(Resolvable):
+    __slots__ = ('children',)
     children: List[AnyNode]
 
     def resolve_type(self, resolve_type_func) -> Optional[UnitType]:
@@ -270,23 +379,25 @@ class AdditiveExpression(Resolvable):
 
 @dataclass
 class Comparison(Typed):
+    __slots__ = ('children',)
     children: List[AnyNode]
 
     @property
     def type(self) -> Optional[UnitType]:
-        return SimpleType("bool")
+        return BOOL_TYPE
 
     def __str__(self):
-        return " ".join(custom_str(it.unit) for it in self.children)
+        return " ".join(custom_str(it) for it in self.children)
 
 
 @dataclass
 class Equality(Typed):
+    __slots__ = ('comparison_and_operators',)
     comparison_and_operators: List[Union[AnyNode, str]]
 
     @property
     def type(self) -> Optional[UnitType]:
-        return SimpleType("bool")
+        return BOOL_TYPE
 
     def __str__(self):
         return " ".join(custom_str(exp) for exp in self.comparison_and_operators)
@@ -294,11 +405,12 @@ class Equality(Typed):
 
 @dataclass
 class Conjunction(Typed):
+    __slots__ = ('equalities',)
     equalities: List[AnyNode]
 
     @property
     def type(self) -> Optional[UnitType]:
-        return SimpleType("bool")
+        return BOOL_TYPE
 
     def __str__(self):
         return " and ".join(custom_str(eq) for eq in self.equalities)
@@ -306,11 +418,12 @@ class Conjunction(Typed):
 
 @dataclass
 class Disjunction(Typed):
+    __slots__ = ('conjunctions',)
     conjunctions: List[AnyNode]
 
     @property
     def type(self) -> Optional[UnitType]:
-        return SimpleType("bool")
+        return BOOL_TYPE
 
     def __str__(self):
         return " or ".join(custom_str(con) for con in self.conjunctions)
@@ -318,6 +431,7 @@ class Disjunction(Typed):
 
 @dataclass
 class Expression(Statement, PrimaryExpression, Resolvable):
+    __slots__ = ('disjunction',)
     disjunction: AnyNode
 
     def resolve_type(self, resolve_type_func) -> Optional[UnitType]:
@@ -330,12 +444,13 @@ class Expression(Statement, PrimaryExpression, Resolvable):
 
 @dataclass
 class CollectionLiteral(PrimaryExpression, Resolvable):
+    __slots__ = ('expressions',)
     expressions: List[AnyNode]
 
     def resolve_type(self, resolve_type_func) -> Optional[UnitType]:
         if len(self.expressions) > 0:
             return IterableType(resolve_type_func(self.expressions[0]))
-        return IterableType(SimpleType("None"))
+        return IterableType(NONE_TYPE)
 
     def __str__(self):
         if len(self.expressions) == 0:
@@ -346,6 +461,7 @@ class CollectionLiteral(PrimaryExpression, Resolvable):
 
 @dataclass
 class ForStatement(Statement):
+    __slots__ = ('name', 'expression', 'statements_block')
     name: Name
     expression: AnyNode
     statements_block: TreeWithUnit[StatementsBlock]
@@ -357,6 +473,7 @@ class ForStatement(Statement):
 
 @dataclass
 class WhileStatement(Statement):
+    __slots__ = ('expression', 'statements_block')
     expression: AnyNode
     statements_block: TreeWithUnit[StatementsBlock]
 
@@ -367,6 +484,7 @@ class WhileStatement(Statement):
 
 @dataclass
 class ElseExpression:
+    __slots__ = ('statements_block',)
     statements_block: TreeWithUnit[StatementsBlock]
 
     def __str__(self):
@@ -375,6 +493,7 @@ class ElseExpression:
 
 @dataclass
 class ElseIfExpression:
+    __slots__ = ('condition', 'statements_block')
     condition: AnyNode
     statements_block: TreeWithUnit[StatementsBlock]
 
@@ -384,6 +503,7 @@ class ElseIfExpression:
 
 @dataclass
 class IfExpression(PrimaryExpression, ResolvableByStatementsBlock):
+    __slots__ = ('condition', 'statements_block', 'elif_expressions', 'optional_else')
     condition: AnyNode
     statements_block: TreeWithUnit[StatementsBlock]
     elif_expressions: List[TreeWithUnit[ElseIfExpression]]
@@ -400,6 +520,7 @@ class IfExpression(PrimaryExpression, ResolvableByStatementsBlock):
 
 @dataclass
 class IndexingSuffix(PostfixUnarySuffix):
+    __slots__ = ('expression',)
     expression: AnyNode
 
     def __str__(self):
@@ -408,6 +529,7 @@ class IndexingSuffix(PostfixUnarySuffix):
 
 @dataclass
 class NavigationSuffix(PostfixUnarySuffix):
+    __slots__ = ('name',)
     name: Name
 
     def __str__(self):
@@ -416,6 +538,7 @@ class NavigationSuffix(PostfixUnarySuffix):
 
 @dataclass
 class ReturnStatement:
+    __slots__ = ('expression',)
     expression: Optional[AnyNode]
 
     def __str__(self):
@@ -427,6 +550,7 @@ class ReturnStatement:
 
 @dataclass
 class BreakStatement:
+    __slots__ = ()
 
     def __str__(self):
         return "break"
@@ -434,6 +558,7 @@ class BreakStatement:
 
 @dataclass
 class FunctionDeclaration:
+    __slots__ = ('name', 'function_parameters', 'return_type', 'statements_block')
     name: Name
     function_parameters: List[TreeWithUnit[FunctionParameter]]
     return_type: str
@@ -445,8 +570,46 @@ class FunctionDeclaration:
         return self.name + parentheses + " " + self.return_type + " " + curly_block(custom_str(self.statements_block))
 
 
+class LazyFunctionDeclaration(FunctionDeclaration):
+    """
+    Function declaration which statements block is built when it's used for the first time
+    """
+    __slots__ = ('load_body', 'on_load')
+    # Built statements block is kept in the slot of the function declaration, the name of the slot is taken
+    # by the property which builds the block
+    _loaded_block = FunctionDeclaration.statements_block
+
+    def __init__(self, name: Name, function_parameters: List[TreeWithUnit[FunctionParameter]], return_type: str,
+                 load_body: Callable[[], TreeWithUnit[StatementsBlock]]):
+        """
+        :param load_body: builds the statements block, it's called only once
+        """
+        self.name = name
+        self.function_parameters = function_parameters
+        self.return_type = return_type
+        self.load_body = load_body
+        # Called with the statements block when it's built, e.x. to analyze it
+        self.on_load: List[Callable[[TreeWithUnit[StatementsBlock]], Any]] = []
+        self._loaded_block: Optional[TreeWithUnit[StatementsBlock]] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_block is not None
+
+    @property
+    def statements_block(self) -> TreeWithUnit[StatementsBlock]:
+        if self._loaded_block is None:
+            statements_block = self.load_body()
+            for callback in self.on_load:
+                callback(statements_block)
+            self._loaded_block = statements_block
+            self.load_body = None
+        return self._loaded_block
+
+
 @dataclass
 class Start:
+    __slots__ = ('function_declarations',)
     function_declarations: List[TreeWithUnit[FunctionDeclaration]]
 
     def __str__(self):
@@ -455,6 +618,7 @@ class Start:
 
 @dataclass
 class Assignment(Statement):
+    __slots__ = ('left', 'operator', 'right')
     left: Union[TreeWithUnit[VariableDeclaration], Name]
     operator: str
     right: AnyNode
@@ -465,6 +629,7 @@ class Assignment(Statement):
 
 @dataclass
 class CallSuffix(PostfixUnarySuffix):
+    __slots__ = ('function_call_arguments',)
     function_call_arguments: List[AnyNode]
 
     def __str__(self):
@@ -475,6 +640,7 @@ class CallSuffix(PostfixUnarySuffix):
 
 @dataclass
 class ParenthesizedExpression(Resolvable):
+    __slots__ = ('child',)
     child: AnyNode
 
     def resolve_type(self, resolve_type_func) -> Optional[UnitType]:
@@ -482,3 +648,35 @@ class ParenthesizedExpression(Resolvable):
 
     def __str__(self):
         return f"({custom_str(self.child)})"
+
+
+# rule name -> unit which is built for the rule
+RULE_UNITS: Dict[str, type] = {
+    'start': Start,
+    'function_declaration': FunctionDeclaration,
+    'function_parameter': FunctionParameter,
+    'type': Type,
+    'statements_block': StatementsBlock,
+    'variable_declaration': VariableDeclaration,
+    'assignment': Assignment,
+    'return_statement': ReturnStatement,
+    'break_statement': BreakStatement,
+    'for_statement': ForStatement,
+    'while_statement': WhileStatement,
+    'disjunction': Disjunction,
+    'conjunction': Conjunction,
+    'equality': Equality,
+    'comparison': Comparison,
+    'additive_expression': AdditiveExpression,
+    'multiplicative_expression': MultiplicativeExpression,
+    'prefix_unary_expression': PrefixUnaryExpression,
+    'postfix_unary_expression': PostfixUnaryExpression,
+    'indexing_suffix': IndexingSuffix,
+    'call_suffix': CallSuffix,
+    'navigation_suffix': NavigationSuffix,
+    'parenthesized_expression': ParenthesizedExpression,
+    'collection_literal': CollectionLiteral,
+    'if_expression': IfExpression,
+    'elseif_expression': ElseIfExpression,
+    'else_expression': ElseExpression,
+}
@@ -1,14 +1,23 @@
-from typing import Iterable
+import argparse
+import sys
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Iterable, Optional, List
 
 from lark import Lark, Tree
 from lark.lexer import Token
 
 from interpreter.code_snippet_generation import with_italic_comments, with_pre_tag, with_bold_keywords
+from interpreter.compact_nodes import to_compact
+from interpreter.flat_ast import to_flat
 from interpreter.interpretation import Interpreter
+from interpreter.parser.lalr_backend import LalrParser
+from interpreter.parser.parallel import parse_in_parallel
 from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
 from interpreter.scanner.scanner import Scanner
 from interpreter.semantic_analyzer import SemanticAnalyzer
-from interpreter.tree_transformer import TreeTransformer
 
 
 def initialize_lark_from_file(relative_path_to_file: str) -> Lark:
@@ -35,16 +44,62 @@ def debug_tokens(tokens: Iterable[Token]):
             print(token.value)
 
 
-def main():
-    with open('../../grammar.txt') as f:
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Interpret the program")
+    parser.add_argument('program', nargs='?', default="../../test files/recursive_fibo.txt",
+                        help="program file, '-' reads the UTF-8 encoded program from the stdin in chunks")
+    parser.add_argument('--grammar', default='../../grammar.txt', help="grammar file")
+    parser.add_argument('--lazy-bodies', action='store_true',
+                        help="parse and analyze the function bodies when the functions are called for the first time")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="amount of the processes that parse the function declarations of the program file")
+    parser.add_argument('--backend', choices=['recursive-descent', 'lalr'], default='recursive-descent',
+                        help="parser backend, lalr is generated by lark and cached in the temporary directory")
+    parser.add_argument('--compact-nodes', action='store_true',
+                        help="convert the tree to the compact nodes before the analysis, they take less memory")
+    parser.add_argument('--flat-ast', action='store_true',
+                        help="store the tree in the arrays before the analysis, it's walked without the node objects")
+    args = parser.parse_args(argv)
+    if args.backend == 'lalr' and (args.lazy_bodies or args.jobs > 1):
+        parser.error("lalr backend supports neither --lazy-bodies nor --jobs")
+    if (args.compact_nodes or args.flat_ast) and args.lazy_bodies:
+        parser.error("--compact-nodes and --flat-ast load all the function bodies, "
+                     "so they can't be used with --lazy-bodies")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    with open(args.grammar) as f:
         data = f.read()
-    scanner = Scanner(data)
-    parser = RecursiveDescentParser(scanner)
-    with open("../../test files/recursive_fibo.txt") as f:
-        tree = parser.parse(f)
-        transformed = TreeTransformer().transform(tree)
-        SemanticAnalyzer().analyze(transformed)
-        Interpreter().interpret(transformed)
+    if args.backend == 'lalr':
+        parser = LalrParser(data, build_units=True, cache_dir=Path(tempfile.gettempdir()) / "interpreter-cache")
+        # Stdin isn't closed, only the opened program file is
+        with (nullcontext(sys.stdin) if args.program == '-' else open(args.program)) as f:
+            transformed = parser.parse(f)
+    elif args.program == '-':
+        # Stdin can be a pipe, it's scanned chunk by chunk without reading the whole program.
+        # Lazy bodies are skipped in the text, so the whole program is read then
+        parser = RecursiveDescentParser(CompiledScanner(data), build_units=True, lazy_bodies=args.lazy_bodies)
+        transformed = parser.parse(sys.stdin.buffer)
+    elif args.jobs > 1:
+        with open(args.program) as f:
+            transformed = parse_in_parallel(data, f.read(), args.jobs)
+    elif args.lazy_bodies:
+        # Function bodies are skipped in the text and scanned from their position when they're called
+        parser = RecursiveDescentParser(CompiledScanner(data), build_units=True, lazy_bodies=True)
+        with open(args.program) as f:
+            transformed = parser.parse(f)
+    else:
+        parser = RecursiveDescentParser(Scanner(data), build_units=True)
+        with open(args.program) as f:
+            transformed = parser.parse(f)
+    if args.compact_nodes:
+        transformed = to_compact(transformed)
+    if args.flat_ast:
+        transformed = to_flat(transformed).root
+    SemanticAnalyzer().analyze(transformed)
+    Interpreter().interpret(transformed)
 
 
 if __name__ == "__main__":
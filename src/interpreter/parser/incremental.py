@@ -0,0 +1,141 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from lark import Token, Tree
+
+from interpreter.language_units import TreeWithUnit, SimpleLiteral
+from interpreter.parser.parallel import shift_identifiers
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.blocks import iter_top_level_block_ends, position_after, UnmatchedBraceException
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.tree_transformer import TreeTransformer
+
+
+@dataclass
+class ParsedDeclaration:
+    # text from the end of the previous declaration up to the closing brace of this one
+    text: str
+    # function_declaration node, None for the text after the last declaration
+    node: Optional[TreeWithUnit]
+
+
+def first_line_has_tokens(text: str) -> bool:
+    return re.match(r'[ \t\f]*(#[^\r\n]*)?([\r\n]|$)', text) is None
+
+
+def shift_lines(declaration: TreeWithUnit, line_delta: int):
+    """
+    Move the nodes, tokens and literals of the declaration by the given amount of lines
+    """
+    stack = [declaration]
+    while stack:
+        node = stack.pop()
+        if getattr(node.meta, 'line', None) is not None:
+            node.meta.line += line_delta
+        for child in node.children:
+            if isinstance(child, Tree):
+                stack.append(child)
+            elif isinstance(child, (Token, SimpleLiteral)) and child.line is not None:
+                child.line += line_delta
+
+
+class IncrementalParser:
+    def __init__(self, grammar: str):
+        """
+        Parser that keeps the function declarations of the previous text. Declarations whose text isn't changed
+        are reused with their identifiers, only the changed part of the text is scanned and parsed
+        :param grammar: grammar text
+        """
+        self.parser = RecursiveDescentParser(CompiledScanner(grammar), build_units=True)
+        self.text = ''
+        self.declarations: List[ParsedDeclaration] = []
+        # Identifiers are never reused, so every node of the tree keeps a unique identifier
+        self.next_identifier = 0
+        # Amount of the declarations parsed by the last parse
+        self.parsed_declarations_count = 0
+
+    def parse(self, text: str) -> TreeWithUnit:
+        """
+        Parse the text reusing the declarations of the previous text. Declarations are compared from the start and
+        from the end of the text, the declarations between the unchanged ones are parsed again
+        :param text: whole program text
+        :return: start node, its identifier is new on every parse. Reused declarations are shared with the trees
+        returned before, their lines are moved when the lines before them are added or removed
+        """
+        old, old_text = self.declarations, self.text
+        kept_before = 0
+        start = 0
+        while kept_before < len(old) and old[kept_before].node is not None and \
+                text.startswith(old[kept_before].text, start):
+            start += len(old[kept_before].text)
+            kept_before += 1
+
+        kept_after = len(old)
+        end = len(text)
+        old_end = len(old_text)
+        while kept_after > kept_before and end - len(old[kept_after - 1].text) >= start and \
+                text.startswith(old[kept_after - 1].text, end - len(old[kept_after - 1].text)):
+            kept_after -= 1
+            end -= len(old[kept_after].text)
+            old_end -= len(old[kept_after].text)
+        # Line and column of the tokens on the first line of the next declaration depend on the changed text
+        while kept_after < len(old) and first_line_has_tokens(old[kept_after].text):
+            end += len(old[kept_after].text)
+            old_end += len(old[kept_after].text)
+            kept_after += 1
+
+        chunks = self.split(text[start:end], is_last=kept_after == len(old))
+        if chunks is None:
+            # Changed text isn't made of whole declarations, so the following declarations aren't the same
+            kept_before, kept_after, start, end, old_end = 0, len(old), 0, len(text), len(old_text)
+            chunks = self.split(text, is_last=True)
+
+        line, column = position_after(text, 0, start, 1, 0)
+        tokens = self.parser.scanner.iter_text_tokens(text[start:end], 0, line, column)
+        nodes = list(self.parser.iter_token_function_declarations(tokens))
+        shift_identifiers(nodes, self.next_identifier)
+        parsed = [ParsedDeclaration(chunk, node) for chunk, node in zip(chunks, nodes + [None])]
+
+        line_delta = position_after(text, start, end, line, column)[0] - \
+            position_after(old_text, start, old_end, line, column)[0]
+        if line_delta != 0:
+            for declaration in old[kept_after:]:
+                if declaration.node is not None:
+                    shift_lines(declaration.node, line_delta)
+
+        self.next_identifier += self.parser.transformer.counter
+        self.declarations = old[:kept_before] + parsed + old[kept_after:]
+        self.text = text
+        self.parsed_declarations_count = len(nodes)
+
+        transformer = TreeTransformer()
+        transformer.counter = self.next_identifier
+        self.next_identifier += 1
+        return transformer.build("start", [it.node for it in self.declarations if it.node is not None])
+
+    @staticmethod
+    def split(text: str, is_last: bool) -> Optional[List[str]]:
+        """
+        Split the text at the ends of the declarations
+        :param text: text of the declarations
+        :param is_last: text is at the end of the program, so it can have the text after the last declaration
+        :return: texts of the declarations followed by the text after them or None if the text can't be split
+        into the whole declarations
+        """
+        chunks = []
+        start = 0
+        try:
+            for end in iter_top_level_block_ends(text):
+                chunks.append(text[start:end])
+                start = end
+        except UnmatchedBraceException:
+            if not is_last:
+                return None
+            # Parser reports the error
+            return [text]
+        if start < len(text) and not is_last:
+            return None
+        if is_last:
+            chunks.append(text[start:])
+        return chunks
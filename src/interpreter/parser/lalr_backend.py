@@ -0,0 +1,143 @@
+import re
+from pathlib import Path
+from typing import TextIO, Optional, Set, Tuple
+
+import lark
+from lark import Lark, Tree
+
+from interpreter.parser.precedence import FILTERED_OPERATORS
+from interpreter.scanner.tables_cache import grammar_hash, write_file_atomically
+from interpreter.tree_transformer import TreeTransformer
+
+# Terminals which the RecursiveDescentParser matches, but doesn't put into the tree
+FILTERED_TERMINALS = ('IF', 'ELIF', 'ELSE', 'FOR', 'IN', 'WHILE', 'RETURN', 'BARE_RETURN') + FILTERED_OPERATORS
+
+# Rules which are built by the RecursiveDescentParser even when they're optional and missing, e.x. the function
+# without parameters has an empty function_parameters node
+ALWAYS_BUILT_RULES = ('function_parameters',)
+
+# STRING is matched by the scanner code, strings have no escapes
+STRING_TERMINAL = r'STRING: /"[^"]*"/'
+
+# Lark ignores the new lines, but the expression of the return statement must be on the same line.
+# Return at the end of the line is matched by its own terminal, it takes precedence over the RETURN.
+# It must not match "ret" alone, otherwise lark treats the RETURN as its special case
+RETURN_STATEMENT = 'return_statement: RETURN expression | BARE_RETURN'
+BARE_RETURN_TERMINAL = r'BARE_RETURN.2: /ret(?=[ \t\f]*(#[^\r\n]*)?[\r\n])/'
+
+IGNORED_TERMINALS = ('WS', 'NEWLINE', 'COMMENT')
+
+RULE_DEFINITION = re.compile(r'^([a-z_]+)(\s*:)', re.M)
+# Terminal defined only by the strings, e.x. COMPARISON_OPERATOR: "<" | ">" | "<=" | ">="
+STRING_ALTERNATIVES = re.compile(r'^([A-Z_]+:\s*)("[^"]*"(?:\s*\|\s*"[^"]*")+)\s*$', re.M)
+
+
+def marked_rules(grammar: str, marker: str) -> Set[str]:
+    """
+    :return: names of the rules which are preceded by the comment, e.x. // Inline
+    """
+    return set(re.findall(r'^//\s*%s\s*\n([a-z_]+)\s*:' % re.escape(marker), grammar, re.M))
+
+
+def longest_alternatives_first(grammar: str) -> str:
+    """
+    Lark matches the string alternatives of a terminal in the written order, so "<" would be matched instead of "<="
+    """
+
+    def sort_alternatives(match):
+        alternatives = sorted(re.findall(r'"[^"]*"', match.group(2)), key=len, reverse=True)
+        return match.group(1) + ' | '.join(alternatives)
+
+    return STRING_ALTERNATIVES.sub(sort_alternatives, grammar)
+
+
+def always_built(grammar: str, rule: str) -> str:
+    grammar = re.sub(r'\b%s\?' % rule, rule, grammar)
+    return re.sub(r'^%s:(.*)$' % rule, r'%s: (\1)?' % rule, grammar, flags=re.M)
+
+
+def build_lark_grammar(grammar: str) -> str:
+    """
+    Convert the grammar into the lark grammar whose trees have the same shape as the RecursiveDescentParser builds:
+    "Inline" rules are inlined, "Optional inline" rules are inlined when they have one child and the terminals
+    which the parser skips are filtered out
+    :param grammar: grammar text
+    :return: lark grammar text
+    """
+    inline = marked_rules(grammar, "Inline")
+    optional_inline = marked_rules(grammar, "Optional inline")
+    grammar = longest_alternatives_first(grammar)
+    grammar = re.sub(r'^STRING:.*$', lambda _: STRING_TERMINAL, grammar, flags=re.M)
+    grammar = re.sub(r'^return_statement:.*$', lambda _: RETURN_STATEMENT, grammar, flags=re.M)
+    grammar += '\n' + BARE_RETURN_TERMINAL + '\n'
+    for rule in ALWAYS_BUILT_RULES:
+        grammar = always_built(grammar, rule)
+
+    # Names are replaced only in the rules, so the patterns of the terminals aren't changed
+    def rename_in_rule(match):
+        line = match.group()
+        line = re.sub(r'\b[a-z_]+\b', lambda it: '_' + it.group() if it.group() in inline else it.group(), line)
+        line = re.sub(r'\b(%s)\b' % '|'.join(FILTERED_TERMINALS), r'_\1', line)
+        return RULE_DEFINITION.sub(lambda it: ('?' if it.group(1) in optional_inline else '') + it.group(0), line)
+
+    # Rule is a line starting with the rule name or a continuation line of the previous rule
+    grammar = re.sub(r'^(?:[a-z_]+\s*:|\s+\|).*$', rename_in_rule, grammar, flags=re.M)
+    grammar = re.sub(r'^(%s)\b' % '|'.join(FILTERED_TERMINALS), r'_\1', grammar, flags=re.M)
+    return grammar + ''.join(f'\n%ignore {it}' for it in IGNORED_TERMINALS) + '\n'
+
+
+def cache_file_path(lark_grammar: str, cache_dir: Path) -> Path:
+    # Serialized parser depends on the lark version as well
+    return Path(cache_dir) / f"lalr-{grammar_hash(lark_grammar + lark.__version__)}.lark"
+
+
+def load_lark_parser(grammar: str, cache_dir: Optional[Path] = None) -> Tuple[Lark, bool]:
+    """
+    Load the LALR(1) parser with the contextual lexer. Parser is serialized by lark into the cache
+    and loaded from it instead of building the parse tables when the cache contains the parser for the grammar
+    :param grammar: grammar text
+    :param cache_dir: directory containing the cached parsers, parser isn't cached when it's None
+    :return: tuple containing the parser and whether it was loaded from the cache
+    """
+    lark_grammar = build_lark_grammar(grammar)
+    path = cache_file_path(lark_grammar, cache_dir) if cache_dir is not None else None
+    if path is not None and path.exists():
+        try:
+            with open(path, 'rb') as f:
+                return Lark.load(f), True
+        except Exception:
+            # Broken cache is rebuilt
+            pass
+    parser = Lark(lark_grammar, start='start', parser='lalr', lexer='contextual')
+    if path is not None:
+        try:
+            write_file_atomically(path, parser.save, binary=True)
+        except OSError:
+            # Caching is only an optimization, the parser can still work without it
+            pass
+    return parser, False
+
+
+class LalrParser:
+    def __init__(self, grammar: str, build_units: bool = False, cache_dir: Optional[Path] = None):
+        """
+        Parser backend generated by lark. Trees have the same shape as the RecursiveDescentParser builds,
+        syntax errors are the lark exceptions
+        :param grammar: grammar text
+        :param build_units: transform the tree by the TreeTransformer, the result is the same
+        as the RecursiveDescentParser with build_units gives
+        :param cache_dir: directory where the parser is cached, it isn't cached when it's None
+        """
+        self.grammar = grammar
+        self.build_units = build_units
+        self.lark, self.loaded_from_cache = load_lark_parser(grammar, cache_dir)
+
+    def parse(self, file: TextIO) -> Tree:
+        text = file.read()
+        return self.parse_text(text if isinstance(text, str) else text.decode('utf-8'))
+
+    def parse_text(self, text: str) -> Tree:
+        tree = self.lark.parse(text)
+        if self.build_units:
+            return TreeTransformer().transform_on_stack(tree)
+        return tree
@@ -0,0 +1,141 @@
+import gc
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import List, Tuple, Optional
+
+from lark import Tree
+
+from interpreter.language_units import TreeWithUnit
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.blocks import iter_top_level_block_ends, position_after
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.tree_transformer import TreeTransformer
+
+# Chunks are smaller than the text part of one worker, so the workers that are done earlier take the rest
+CHUNKS_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class SourceChunk:
+    # whole function declarations
+    text: str
+    # line and column where the chunk starts in the source
+    line: int
+    column: int
+
+
+def split_source(text: str, chunks_count: int) -> List[SourceChunk]:
+    """
+    Split the source into chunks of a similar size at the ends of the function declarations.
+    Function declarations are found by matching the braces, the text isn't scanned
+    :param text: source text
+    :param chunks_count: max amount of the chunks
+    :return: chunks containing the whole text
+    """
+    chunk_size = len(text) / chunks_count
+    chunks = []
+    start, line, column = 0, 1, 0
+    for end in iter_top_level_block_ends(text):
+        if end >= chunk_size * (len(chunks) + 1):
+            chunks.append(SourceChunk(text[start:end], line, column))
+            line, column = position_after(text, start, end, line, column)
+            start = end
+    # Rest of the declarations and the text after them, e.x. comments
+    if start < len(text) or len(chunks) == 0:
+        chunks.append(SourceChunk(text[start:], line, column))
+    return chunks
+
+
+# Every worker process builds its parser once
+_worker_parser: Optional[RecursiveDescentParser] = None
+
+
+def init_worker(grammar: str):
+    global _worker_parser
+    _worker_parser = RecursiveDescentParser(CompiledScanner(grammar), build_units=True)
+
+
+def parse_chunk(chunk: SourceChunk) -> Tuple[List[Tree], int]:
+    """
+    :return: a tuple containing the function declarations of the chunk and the amount of the identifiers used by them
+    """
+    parser = _worker_parser
+    tokens = parser.scanner.iter_text_tokens(chunk.text, 0, chunk.line, chunk.column)
+    declarations = list(parser.iter_token_function_declarations(tokens))
+    return declarations, parser.transformer.counter
+
+
+@contextmanager
+def garbage_collection_paused():
+    """
+    Received declarations are unpickled into a lot of objects at once. They don't contain reference cycles,
+    but the allocations trigger the collections which scan all of them again and again
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def shift_identifiers(declarations: List[Tree], offset: int):
+    for declaration in declarations:
+        for node in declaration.iter_subtrees():
+            if isinstance(node, TreeWithUnit):
+                node.identifier += offset
+
+
+def intern_name(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_names(declarations: List[TreeWithUnit]):
+    """
+    Intern the names of the declarations again. Names are interned by the transformer of the worker process,
+    but the unpickled strings are new objects, so equal names wouldn't be the same object
+    """
+    for declaration in declarations:
+        for node in declaration.iter_subtrees():
+            node.children[:] = [intern_name(child) for child in node.children]
+            if isinstance(node, TreeWithUnit):
+                unit = node.unit
+                for field in fields(unit):
+                    value = getattr(unit, field.name)
+                    if isinstance(value, list):
+                        value[:] = [intern_name(it) for it in value]
+                    elif type(value) is str:
+                        setattr(unit, field.name, sys.intern(value))
+
+
+def parse_in_parallel(grammar: str, text: str, workers: Optional[int] = None) -> TreeWithUnit:
+    """
+    Scan, parse and build the units of the function declarations in the worker processes. Identifiers of the chunks
+    are shifted after the identifiers of the previous chunks, so the tree is the same as the parser builds it
+    :param grammar: grammar text
+    :param text: source text
+    :param workers: amount of the worker processes, the amount of CPUs by default
+    :return: start node
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = split_source(text, workers * CHUNKS_PER_WORKER)
+    if workers == 1 or len(chunks) == 1:
+        return RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse_text(text)
+
+    declarations = []
+    identifiers_count = 0
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(grammar,)) as executor, \
+            garbage_collection_paused():
+        for chunk_declarations, chunk_identifiers_count in executor.map(parse_chunk, chunks):
+            shift_identifiers(chunk_declarations, identifiers_count)
+            intern_names(chunk_declarations)
+            declarations.extend(chunk_declarations)
+            identifiers_count += chunk_identifiers_count
+
+    transformer = TreeTransformer()
+    transformer.counter = identifiers_count
+    return transformer.build("start", declarations)
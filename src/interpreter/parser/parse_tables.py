@@ -0,0 +1,319 @@
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Set, Tuple, Union, Optional
+
+from interpreter.scanner.scanner import iter_terminal_entries
+from interpreter.scanner.tables_cache import grammar_hash, write_file_atomically
+
+# Increase it every time the format of the cached tables changes
+PARSE_TABLES_VERSION = 1
+
+# Token type which is used for the end of the tokens
+END = "$END"
+
+RULE_TOKEN = re.compile(r'\s*(?:("[^"]*")|([A-Za-z_]\w*)|([()|?*+]))')
+
+
+class GrammarSyntaxException(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Symbol:
+    # rule or terminal name
+    name: str
+
+
+@dataclass(frozen=True)
+class Sequence:
+    items: Tuple['Expansion', ...]
+
+
+@dataclass(frozen=True)
+class Choice:
+    options: Tuple['Expansion', ...]
+
+
+@dataclass(frozen=True)
+class Quantified:
+    item: 'Expansion'
+    # ?, * or +
+    quantifier: str
+
+
+Expansion = Union[Symbol, Sequence, Choice, Quantified]
+
+
+@dataclass
+class ParseTables:
+    # rule -> token type -> production which starts with the token. Production is the name of the rule or terminal
+    # when the alternative has one symbol, e.x. primary_expression: NAME -> NAME, otherwise it's rule[index]
+    predictions: Dict[str, Dict[str, str]]
+    # rule -> token type -> productions which start with the same token, they aren't in the predictions
+    conflicts: Dict[str, Dict[str, List[str]]]
+    first: Dict[str, List[str]]
+    follow: Dict[str, List[str]]
+
+
+def literal_terminals(grammar: str) -> Dict[str, str]:
+    """
+    :return: literal, e.x. "(", -> name of the terminal defined only by the literal
+    """
+    literals = {}
+    for name, definition in iter_terminal_entries(grammar):
+        if re.fullmatch(r'"[^"]*"', definition):
+            literals.setdefault(definition, name)
+    return literals
+
+
+def read_rule_definitions(grammar: str) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    :return: a tuple containing the rule name -> its definition and the names of the inline rules
+    """
+    definitions = {}
+    inline = set()
+    name = None
+    is_inline = False
+    for line in grammar.splitlines():
+        rule = re.match(r'^([a-z_]+)\s*:(.*)$', line)
+        if rule is not None:
+            name = rule.group(1)
+            definitions[name] = rule.group(2)
+            if is_inline:
+                inline.add(name)
+        elif name is not None and re.match(r'^\s+\|', line):
+            # Continuation of the alternatives
+            definitions[name] += ' ' + line.strip()
+        else:
+            name = None
+        is_inline = line.strip() == '// Inline'
+    return definitions, inline
+
+
+def parse_expansion(definition: str, literals: Dict[str, str]) -> Expansion:
+    tokens = [match.group(1) or match.group(2) or match.group(3) for match in RULE_TOKEN.finditer(definition)]
+    if ''.join(tokens) != re.sub(r'\s', '', definition):
+        raise GrammarSyntaxException("Couldn't read the rule definition: " + definition)
+    pos = 0
+
+    def choice() -> Expansion:
+        nonlocal pos
+        options = [sequence()]
+        while pos < len(tokens) and tokens[pos] == '|':
+            pos += 1
+            options.append(sequence())
+        return options[0] if len(options) == 1 else Choice(tuple(options))
+
+    def sequence() -> Expansion:
+        nonlocal pos
+        items = []
+        while pos < len(tokens) and tokens[pos] not in ('|', ')'):
+            token = tokens[pos]
+            pos += 1
+            if token == '(':
+                item = choice()
+                if pos >= len(tokens) or tokens[pos] != ')':
+                    raise GrammarSyntaxException("Missing ')' in the rule definition: " + definition)
+                pos += 1
+            elif token.startswith('"'):
+                if token not in literals:
+                    raise GrammarSyntaxException(f"Literal {token} isn't defined by any terminal")
+                item = Symbol(literals[token])
+            elif token in '?*+':
+                raise GrammarSyntaxException("Unexpected quantifier in the rule definition: " + definition)
+            else:
+                item = Symbol(token)
+            while pos < len(tokens) and tokens[pos] in ('?', '*', '+'):
+                item = Quantified(item, tokens[pos])
+                pos += 1
+            items.append(item)
+        return items[0] if len(items) == 1 else Sequence(tuple(items))
+
+    expansion = choice()
+    if pos != len(tokens):
+        raise GrammarSyntaxException("Unexpected ')' in the rule definition: " + definition)
+    return expansion
+
+
+class FirstSets:
+    def __init__(self, rules: Dict[str, Expansion]):
+        """
+        Compute FIRST sets and the nullable rules by repeating the computation until the sets don't change
+        """
+        self.rules = rules
+        self.first: Dict[str, Set[str]] = {name: set() for name in rules}
+        self.nullable: Set[str] = set()
+        changed = True
+        while changed:
+            changed = False
+            for name, expansion in rules.items():
+                first, nullable = self.of(expansion)
+                if not first <= self.first[name] or (nullable and name not in self.nullable):
+                    self.first[name] |= first
+                    if nullable:
+                        self.nullable.add(name)
+                    changed = True
+
+    def of(self, expansion: Expansion) -> Tuple[Set[str], bool]:
+        """
+        :return: a tuple containing the tokens which can start the expansion and whether it can be empty
+        """
+        if isinstance(expansion, Symbol):
+            if expansion.name in self.rules:
+                return self.first[expansion.name], expansion.name in self.nullable
+            return {expansion.name}, False
+        if isinstance(expansion, Sequence):
+            return self.of_sequence(expansion.items)
+        if isinstance(expansion, Choice):
+            first, nullable = set(), False
+            for option in expansion.options:
+                option_first, option_nullable = self.of(option)
+                first |= option_first
+                nullable = nullable or option_nullable
+            return first, nullable
+        first, nullable = self.of(expansion.item)
+        return first, nullable or expansion.quantifier != '+'
+
+    def of_sequence(self, items: Tuple[Expansion, ...]) -> Tuple[Set[str], bool]:
+        first = set()
+        for item in items:
+            item_first, nullable = self.of(item)
+            first |= item_first
+            if not nullable:
+                return first, False
+        return first, True
+
+
+def compute_follow(rules: Dict[str, Expansion], first_sets: FirstSets, start: str) -> Dict[str, Set[str]]:
+    follow: Dict[str, Set[str]] = {name: set() for name in rules}
+    follow[start].add(END)
+
+    def visit(expansion: Expansion, after: Set[str]) -> bool:
+        """
+        :param after: tokens which can follow the expansion
+        :return: whether any FOLLOW set is changed
+        """
+        if isinstance(expansion, Symbol):
+            if expansion.name in rules and not after <= follow[expansion.name]:
+                follow[expansion.name] |= after
+                return True
+            return False
+        if isinstance(expansion, Sequence):
+            changed = False
+            for ind, item in enumerate(expansion.items):
+                rest_first, rest_nullable = first_sets.of_sequence(expansion.items[ind + 1:])
+                changed |= visit(item, rest_first | after if rest_nullable else rest_first)
+            return changed
+        if isinstance(expansion, Choice):
+            changed = False
+            for option in expansion.options:
+                changed |= visit(option, after)
+            return changed
+        if expansion.quantifier == '?':
+            return visit(expansion.item, after)
+        # Repeated item can be followed by itself
+        return visit(expansion.item, after | first_sets.of(expansion.item)[0])
+
+    changed = True
+    while changed:
+        changed = False
+        for name, expansion in rules.items():
+            changed |= visit(expansion, follow[name])
+    return follow
+
+
+def alternatives(name: str, rules: Dict[str, Expansion], inline: Set[str]) -> List[Tuple[str, Expansion]]:
+    """
+    :return: productions of the rule and their expansions. Alternatives of the inline rules, which are alternatives
+    themselves, are taken instead of them, e.x. statement: ... | jump_statement gives return_statement and break_statement
+    """
+    expansion = rules[name]
+    options = expansion.options if isinstance(expansion, Choice) else (expansion,)
+    result = []
+    for ind, option in enumerate(options):
+        if isinstance(option, Symbol) and option.name in inline and isinstance(rules[option.name], Choice):
+            result.extend(alternatives(option.name, rules, inline))
+        elif isinstance(option, Symbol):
+            result.append((option.name, option))
+        else:
+            result.append((f"{name}[{ind}]", option))
+    return result
+
+
+def build_parse_tables(grammar: str, start: str = 'start') -> ParseTables:
+    """
+    Build the LL(1) tables out of the grammar. Production of a rule is predicted by the next token: it's one of
+    the tokens which can start the production or, when the production can be empty, follow the rule
+    :param grammar: grammar text
+    :param start: start rule
+    """
+    definitions, inline = read_rule_definitions(grammar)
+    literals = literal_terminals(grammar)
+    rules = {name: parse_expansion(definition, literals) for name, definition in definitions.items()}
+    first_sets = FirstSets(rules)
+    follow = compute_follow(rules, first_sets, start)
+
+    predictions, conflicts = {}, {}
+    for name in rules:
+        candidates: Dict[str, List[str]] = {}
+        for production, expansion in alternatives(name, rules, inline):
+            first, nullable = first_sets.of(expansion)
+            for token in (first | follow[name] if nullable else first):
+                candidates.setdefault(token, []).append(production)
+        predictions[name] = {token: found[0] for token, found in candidates.items() if len(found) == 1}
+        conflicts[name] = {token: found for token, found in candidates.items() if len(found) > 1}
+    return ParseTables(predictions=predictions,
+                       conflicts=conflicts,
+                       first={name: sorted(first) for name, first in first_sets.first.items()},
+                       follow={name: sorted(it) for name, it in follow.items()})
+
+
+def cache_file_path(grammar: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / f"parse-tables-{grammar_hash(grammar)}.json"
+
+
+def read_parse_tables(path: Path, grammar: str) -> Optional[ParseTables]:
+    """
+    :return: tables or None if the file is missing, broken or was written for another grammar or format version
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data["version"] != PARSE_TABLES_VERSION or data["grammar_hash"] != grammar_hash(grammar):
+            return None
+        return ParseTables(data["predictions"], data["conflicts"], data["first"], data["follow"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_parse_tables(path: Path, grammar: str, tables: ParseTables):
+    data = {"version": PARSE_TABLES_VERSION,
+            "grammar_hash": grammar_hash(grammar),
+            "predictions": tables.predictions,
+            "conflicts": tables.conflicts,
+            "first": tables.first,
+            "follow": tables.follow}
+    write_file_atomically(path, lambda f: json.dump(data, f))
+
+
+def load_parse_tables(grammar: str, cache_dir: Optional[Path] = None) -> ParseTables:
+    """
+    Load the parse tables from the cache. Tables are rebuilt and cached when the cache doesn't contain
+    the tables for the given grammar text
+    :param grammar: grammar text
+    :param cache_dir: directory containing the cached tables, tables aren't cached when it's None
+    """
+    if cache_dir is None:
+        return build_parse_tables(grammar)
+    path = cache_file_path(grammar, cache_dir)
+    tables = read_parse_tables(path, grammar)
+    if tables is None:
+        tables = build_parse_tables(grammar)
+        try:
+            write_parse_tables(path, grammar, tables)
+        except OSError:
+            # Caching is only an optimization, the parser can still work without it
+            pass
+    return tables
@@ -1,10 +1,18 @@
-from typing import TextIO, Optional
+import math
+from pathlib import Path
+from typing import TextIO, Iterable, Optional, Callable, Iterator, Dict
 
 from lark import Tree, Token
 
+from interpreter.parser.parse_tables import load_parse_tables, ParseTables, END
+from interpreter.parser.precedence import build_binary_operators
+from interpreter.scanner.blocks import find_closing_brace, position_after
+from interpreter.scanner.compiled_scanner import CompiledScanner
 from interpreter.scanner.scanner import Scanner
 from interpreter.scanner.tokens import Token as Tk
-from interpreter.scanner.tokens_controller import TokensController
+from interpreter.scanner.token_buffer import TokenBuffer, BufferTokensController
+from interpreter.scanner.tokens_controller import TokensController, DEFAULT_HISTORY_SIZE
+from interpreter.tree_transformer import TreeTransformer
 
 
 class UnexpectedToken(Exception):
@@ -15,6 +23,10 @@ class PrimaryExpressionException(Exception):
     pass
 
 
+class GrammarConflictException(Exception):
+    pass
+
+
 def strict_match(token: Token, expected_type: Tk, err_msg: str = "") -> bool:
     if token is None:
         raise Exception("Tried to match None token")
@@ -32,59 +44,219 @@ def match(token: Token, expected_type: Tk) -> bool:
 
 
 class RecursiveDescentParser:
-    def __init__(self, scanner: Scanner):
+    def __init__(self, scanner: Scanner, tokens_history_size: Optional[int] = DEFAULT_HISTORY_SIZE,
+                 precedence_climbing: bool = True, build_units: bool = False, lazy_bodies: bool = False,
+                 cache_dir: Optional[Path] = None):
+        """
+        :param scanner: scanner
+        :param tokens_history_size: amount of the last read tokens kept by the tokens controller,
+        0 disables the history, None keeps all the tokens
+        :param precedence_climbing: parse the binary operators using the binding power table built from the grammar
+        instead of descending through the rule of every operator
+        :param build_units: build the nodes with units during the parsing, the result is the same as
+        the TreeTransformer gives for the lark tree
+        :param lazy_bodies: skip the statements blocks of the functions by matching the braces in the text and parse
+        them when they're used for the first time. Requires build_units and the CompiledScanner which scans the text
+        from any position
+        :param cache_dir: directory where the parse tables generated from the grammar are cached,
+        they aren't cached when it's None
+        """
+        if lazy_bodies and not (build_units and isinstance(scanner, CompiledScanner)):
+            raise Exception("Lazy function bodies require build_units and the CompiledScanner")
         self.scanner = scanner
-        self.tokens_controller = TokensController()
+        self.tokens_controller = TokensController(history_size=tokens_history_size)
+        self.binary_operators = build_binary_operators(scanner.grammar) if precedence_climbing else None
+        self.build_units = build_units
+        self.lazy_bodies = lazy_bodies
+        self.transformer: Optional[TreeTransformer] = None
+        # Text of the parsed program, lazy bodies are skipped in it
+        self.text: Optional[str] = None
+        self.build = Tree
+
+        # Productions are chosen by the next token using the tables generated from the grammar
+        tables = load_parse_tables(scanner.grammar, cache_dir)
+        self.statement_actions = self.bind_actions(tables, "statement",
+                                                   {Tk.NAME.name: self.assignment_or_expression})
+        self.directly_assignable_actions = self.bind_actions(tables, "directly_assignable_expression")
+        self.primary_expression_actions = self.bind_actions(tables, "primary_expression")
+        self.postfix_suffix_actions = self.bind_actions(tables, "postfix_unary_suffix")
+        self.prefix_operator_types = frozenset(tables.first["prefix_operator"])
+        self.postfix_suffix_types = frozenset(tables.first["postfix_unary_suffix"])
+        # Tokens which are the primary expressions themselves, e.x. NAME
+        self.primary_token_types = frozenset(token for token, production in
+                                             tables.predictions["primary_expression"].items() if token == production)
+
+    def bind_actions(self, tables: ParseTables, rule: str,
+                     resolvers: Optional[Dict[str, Callable]] = None) -> Dict[str, Callable]:
+        """
+        :param tables: parse tables
+        :param rule: rule whose productions are chosen by the next token
+        :param resolvers: token type -> method which chooses one of the productions starting with the token
+        :return: token type -> method which parses the production predicted by the token
+        """
+        resolvers = resolvers or {}
+        unresolved = set(tables.conflicts[rule]) - set(resolvers)
+        if unresolved:
+            raise GrammarConflictException(f"Productions of the {rule} starting with {sorted(unresolved)} "
+                                           f"can't be chosen by the next token")
+        actions = {token: self.next_token if production == token else getattr(self, production)
+                   for token, production in tables.predictions[rule].items()}
+        actions.update(resolvers)
+        return actions
+
+    def next_token(self) -> Token:
+        return self.tokens_controller.next()
+
+    def expect(self, expected_type: Tk):
+        """
+        Consume the next token which isn't a leaf of the tree. It's created only to report the unexpected token
+        """
+        if not self.tokens_controller.skip_if(expected_type):
+            strict_match(self.tokens_controller.next(), expected_type)
 
     def parse(self, file: TextIO) -> Tree:
-        self.tokens_controller.reload(self.scanner.iter_tokens(file))
+        if self.lazy_bodies:
+            text = file.read()
+            return self.parse_text(text if isinstance(text, str) else text.decode('utf-8'))
+        return self.parse_tokens(self.scanner.iter_tokens(file))
+
+    def parse_text(self, text: str) -> Tree:
+        """
+        Parse the text scanned by the CompiledScanner
+        :param text: whole program text, lazy bodies are skipped in it
+        :return: parsed tree
+        """
+        self.text = text
+        try:
+            return self.parse_tokens(self.scanner.iter_text_tokens(text))
+        finally:
+            self.text = None
+
+    def parse_tokens(self, tokens: Iterable[Token]) -> Tree:
+        """
+        Parse already scanned tokens, e.x. a TokenBuffer
+        :param tokens: tokens without the ignored ones
+        :return: parsed tree
+        """
+        self.reload(tokens)
         root = self.start_node()
         token = self.tokens_controller.next()
         if token is not None:
             raise Exception(f"Couldn't parse: {token} ({token.type})\nExpected no more tokens")
         return root
 
+    def iter_function_declarations(self, file: TextIO) -> Iterator[Tree]:
+        return self.iter_token_function_declarations(self.scanner.iter_tokens(file))
+
+    def iter_token_function_declarations(self, tokens: Iterable[Token]) -> Iterator[Tree]:
+        """
+        Parse the function declarations one by one. Every declaration is yielded as soon as its closing brace is read,
+        so the next stages can process it while the rest of the file isn't read yet. Only the scanned chunk,
+        the last read tokens and the declaration are kept in the memory
+        :param tokens: tokens without the ignored ones
+        :return: function declarations, units are built when the parser builds units
+        """
+        self.reload(tokens)
+        while self.tokens_controller.peek_type() is not None:
+            yield self.next_function_declaration()
+
+    def reload(self, tokens: Iterable[Token]):
+        if self.lazy_bodies and self.text is None:
+            raise Exception("Lazy function bodies are skipped in the text, use parse_text")
+        # Token buffer is read by its own controller, so the tokens which aren't leaves of the tree aren't created
+        controller_class = BufferTokensController if isinstance(tokens, TokenBuffer) else TokensController
+        if type(self.tokens_controller) is not controller_class:
+            self.tokens_controller = controller_class(history_size=self.tokens_controller.history_size)
+        self.tokens_controller.reload(tokens if isinstance(tokens, TokenBuffer) else iter(tokens))
+        # Every parsing gets its own transformer, so the identifiers start from 0
+        self.transformer = TreeTransformer() if self.build_units else None
+        self.build = self.transformer.build if self.build_units else Tree
+
     # start: function_declaration*
     def start_node(self):
         children = []
-        while self.tokens_controller.peek() is not None:
-            children.append(self.function_declaration())
-        return Tree("start", children)
+        while self.tokens_controller.peek_type() is not None:
+            children.append(self.next_function_declaration())
+        return self.build("start", children)
+
+    def next_function_declaration(self):
+        return self.function_declaration()
 
     # function_declaration: NAME "(" function_parameters? ")" function_return_type "{" statements_block "}"
     def function_declaration(self):
         name = self.tokens_controller.next()
         strict_match(name, Tk.NAME)
-        strict_match(self.tokens_controller.next(), Tk.LEFT_PAREN)
+        self.expect(Tk.LEFT_PAREN)
 
-        token = self.tokens_controller.peek()
-        if match(token, Tk.RIGHT_PAREN):
-            function_parameters = Tree("function_parameters", [])
+        if self.tokens_controller.peek_matches(Tk.RIGHT_PAREN):
+            function_parameters = self.build("function_parameters", [])
         else:
             function_parameters = self.function_parameters()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_PAREN)
+        self.expect(Tk.RIGHT_PAREN)
 
         function_return_type = self.function_return_type()
 
-        strict_match(self.tokens_controller.next(), Tk.LEFT_CURLY_BR)
+        if self.lazy_bodies:
+            # Lazy body is found from the position of the left brace
+            left_brace = self.tokens_controller.next()
+            strict_match(left_brace, Tk.LEFT_CURLY_BR)
+            return self.lazy_function_declaration(name, function_parameters, function_return_type, left_brace)
+        self.expect(Tk.LEFT_CURLY_BR)
         statements_block = self.statements_block()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_CURLY_BR)
+        self.expect(Tk.RIGHT_CURLY_BR)
 
-        return Tree("function_declaration", [name,
+        return self.build("function_declaration", [name,
                                              function_parameters,
                                              function_return_type,
                                              statements_block])
 
+    def lazy_function_declaration(self, name: Token, function_parameters, function_return_type: Token,
+                                  left_brace: Token) -> Tree:
+        """
+        Skip the statements block by matching the braces in the text and continue scanning after its closing brace.
+        Statements block is scanned and parsed when it's used for the first time
+        """
+        text = self.text
+        right_brace_pos = find_closing_brace(text, left_brace.end_pos)
+        line, column = position_after(text, left_brace.end_pos, right_brace_pos + 1, left_brace.line, left_brace.column)
+        self.tokens_controller.reload(self.scanner.iter_text_tokens(text, right_brace_pos + 1, line, column))
+        load_body = self.statements_block_loader(
+            self.scanner.iter_text_tokens(text, left_brace.end_pos, left_brace.line, left_brace.column))
+        return self.transformer.build_lazy_function_declaration([name, function_parameters, function_return_type],
+                                                                load_body)
+
+    def statements_block_loader(self, tokens: Iterator[Token]) -> Callable[[], Tree]:
+        """
+        :param tokens: tokens starting from the statements block, they're read till its closing brace
+        :return: function which parses the statements block. Nodes get the identifiers from the transformer
+        of the whole tree, so they're unique in the tree
+        """
+        transformer = self.transformer
+
+        def load_body() -> Tree:
+            # Parser can be busy with other tokens
+            tokens_controller, build = self.tokens_controller, self.build
+            self.tokens_controller = TokensController(history_size=tokens_controller.history_size)
+            self.tokens_controller.reload(tokens)
+            self.build = transformer.build
+            try:
+                statements_block = self.statements_block()
+                self.expect(Tk.RIGHT_CURLY_BR)
+            finally:
+                self.tokens_controller, self.build = tokens_controller, build
+            return statements_block
+
+        return load_body
+
     # function_parameters: function_parameter ("," function_parameter)*
     def function_parameters(self):
         first = self.function_parameter()
         rest = []
-        while match(self.tokens_controller.peek(), Tk.COMMA):
-            self.tokens_controller.next()
+        while self.tokens_controller.skip_if(Tk.COMMA):
             param = self.function_parameter()
             rest.append(param)
         children = [first] + rest
-        return Tree("function_parameters", children)
+        return self.build("function_parameters", children)
 
     # Inline function_return_type: NAME
     def function_return_type(self) -> Token:
@@ -95,55 +267,42 @@ class RecursiveDescentParser:
     # statements_block: statement*
     def statements_block(self):
         children = []
-        while not match(self.tokens_controller.peek(), Tk.RIGHT_CURLY_BR):
+        while not self.tokens_controller.peek_matches(Tk.RIGHT_CURLY_BR):
             children.append(self.statement())
-        return Tree("statements_block", children)
+        return self.build("statements_block", children)
 
     # NAME type
     def function_parameter(self) -> Tree:
         name = self.tokens_controller.next()
         strict_match(name, Tk.NAME)
         _type = self.type()
-        return Tree("function_parameter", [name, _type])
+        return self.build("function_parameter", [name, _type])
 
     # NAME ("." NAME)*
     def type(self) -> Tree:
         name = self.tokens_controller.next()
         strict_match(name, Tk.NAME)
         children = [name]
-        token = self.tokens_controller.peek()
-        while token is not None and match(token, Tk.DOT):
+        while self.tokens_controller.peek_matches(Tk.DOT):
             name = self.tokens_controller.next()
             strict_match(name, Tk.NAME)
             children.append(name)
-        return Tree("type", children)
+        return self.build("type", children)
 
     # Inline statement: assignment | for_statement | while_statement | expression | jump_statement
     def statement(self):
-        possible_first_token_for_statement = Tk.FOR
-        possible_first_token_return_stmt = Tk.RETURN
-        possible_first_token_break = Tk.BREAK
-        token = self.tokens_controller.peek()
-        if match(token, possible_first_token_return_stmt) or match(token, possible_first_token_break):
-            return self.jump_statement()
-        if match(token, possible_first_token_for_statement):
-            return self.for_statement()
-        if match(token, Tk.WHILE):
-            return self.while_statement()
-        else:
-            # Decide whether assignment or expression
-            if match(token, Tk.VAR) or match(token, Tk.LET):
-                return self.assignment_starting_from_variable_declaration()
-            else:
-                expression = self.prefix_unary_expression()
-                if match(self.tokens_controller.peek(), Tk.ASSIGNMENT_OPERATOR):
-                    assert isinstance(expression, Token) and match(expression, Tk.NAME), str(expression)
-                    return self.assignment_starting_from_name(expression)
-                return self.expression(expression)
+        # Tokens which can't start a statement are reported by the expression
+        return self.statement_actions.get(self.tokens_controller.peek_type() or END, self.expression)()
+
+    # Both assignment and expression can start with a NAME, assignment has "=" after it
+    def assignment_or_expression(self):
+        if self.tokens_controller.peek_matches(Tk.ASSIGNMENT_OPERATOR, 1):
+            return self.assignment()
+        return self.expression()
 
     # Inline jump_statement: return_expression | break_statement
     def jump_statement(self) -> Tree:
-        if match(self.tokens_controller.peek(), Tk.RETURN):
+        if self.tokens_controller.peek_matches(Tk.RETURN):
             return self.return_statement()
         return self.break_statement()
 
@@ -151,142 +310,148 @@ class RecursiveDescentParser:
     def break_statement(self) -> Tree:
         token = self.tokens_controller.next()
         strict_match(token, Tk.BREAK)
-        return Tree("break_statement", [token])
+        return self.build("break_statement", [token])
 
     # Inline expression: disjunction
-    def expression(self, prebuilt_prefix_unary_expression: Optional = None) -> Tree:
-        return self.disjunction(prebuilt_prefix_unary_expression)
+    def expression(self) -> Tree:
+        if self.binary_operators is None:
+            return self.disjunction()
+        return self.binary_expression(1)
+
+    def binary_expression(self, min_power: int):
+        """
+        Precedence climbing through the binary operators that bind at least with the given power.
+        Operators of the same power are collected into one flat node the same way as their rule does it,
+        e.x. a + b - c is additive_expression: [a, +, b, -, c]
+        """
+        left = self.prefix_unary_expression()
+        max_power = math.inf
+        while True:
+            type_ = self.tokens_controller.peek_type()
+            operator = self.binary_operators.get(type_)
+            # Operators of the built node's power and higher are already consumed by the node
+            if operator is None or not min_power <= operator.power < max_power:
+                return left
+
+            children = [left]
+            while type_ == operator.terminal:
+                if operator.keep_operator:
+                    children.append(self.tokens_controller.next())
+                else:
+                    self.tokens_controller.skip()
+                children.append(self.binary_expression(operator.power + 1))
+                if operator.single:
+                    break
+                type_ = self.tokens_controller.peek_type()
+            left = self.build(operator.rule, children)
+            max_power = operator.power
 
     # return_statement: RETURN expression?
     def return_statement(self):
-        def is_new_line() -> bool:
-            return match(self.tokens_controller.peek(), Tk.NEWLINE)
-
-        strict_match(self.tokens_controller.next(), Tk.RETURN)
-        next_is_new_line = self.tokens_controller.include_new_lines(is_new_line)
-        if not next_is_new_line:
+        self.expect(Tk.RETURN)
+        # Expression must be on the same line
+        if self.tokens_controller.next_on_same_line():
             children = [self.expression()]
         else:
             children = []
-        return Tree("return_statement", children)
-
-    def skip_new_lines(self):
-        token = self.tokens_controller.peek()
-        counter = 0
-        while match(token, Tk.NEWLINE):
-            counter += 1
-            self.tokens_controller.next()
-            token = self.tokens_controller.peek()
-        return counter
+        return self.build("return_statement", children)
 
     # // Optional inline
     # disjunction: conjunction (OR conjunction)*
-    def disjunction(self, prebuilt_prefix_unary_expression: Optional = None):
-        children = [self.conjunction(prebuilt_prefix_unary_expression)]
-        while match(self.tokens_controller.peek(), Tk.OR):
-            self.tokens_controller.next()
+    def disjunction(self):
+        children = [self.conjunction()]
+        while self.tokens_controller.skip_if(Tk.OR):
             children.append(self.conjunction())
         if len(children) == 1:
             return children[0]
         else:
-            return Tree("disjunction", children)
+            return self.build("disjunction", children)
 
     # // Optional inline
     # conjunction: equality (AND equality)*
-    def conjunction(self, prebuilt_prefix_unary_expression: Optional = None):
-        children = [self.equality(prebuilt_prefix_unary_expression)]
-        while match(self.tokens_controller.peek(), Tk.AND):
-            self.tokens_controller.next()
+    def conjunction(self):
+        children = [self.equality()]
+        while self.tokens_controller.skip_if(Tk.AND):
             children.append(self.equality())
         if len(children) == 1:
             return children[0]
         else:
-            return Tree("conjunction", children)
+            return self.build("conjunction", children)
 
     # // Optional inline
     # equality: comparison (EQUALITY_OPERATOR comparison)?
-    def equality(self, prebuilt_prefix_unary_expression: Optional = None):
-        children = [self.comparison(prebuilt_prefix_unary_expression)]
-        if match(self.tokens_controller.peek(), Tk.EQUALITY_OPERATOR):
+    def equality(self):
+        children = [self.comparison()]
+        if self.tokens_controller.peek_matches(Tk.EQUALITY_OPERATOR):
             children.append(self.tokens_controller.next())
             children.append(self.comparison())
         if len(children) == 1:
             return children[0]
         else:
-            return Tree("equality", children)
+            return self.build("equality", children)
 
     # // Optional inline
     # comparison: additive_expression (COMPARISON_OPERATOR additive_expression)*
-    def comparison(self, prebuilt_prefix_unary_expression: Optional = None):
-        children = [self.additive_expression(prebuilt_prefix_unary_expression)]
-        while match(self.tokens_controller.peek(), Tk.COMPARISON_OPERATOR):
+    def comparison(self):
+        children = [self.additive_expression()]
+        while self.tokens_controller.peek_matches(Tk.COMPARISON_OPERATOR):
             children.append(self.tokens_controller.next())
             children.append(self.additive_expression())
         if len(children) == 1:
             return children[0]
         else:
-            return Tree("comparison", children)
+            return self.build("comparison", children)
 
     # // Optional inline
     # additive_expression: multiplicative_expression (ADDITIVE_OPERATOR multiplicative_expression)*
-    def additive_expression(self, prebuilt_prefix_unary_expression: Optional = None):
-        children = [self.multiplicative_expression(prebuilt_prefix_unary_expression)]
-        while match(self.tokens_controller.peek(), Tk.ADDITIVE_OPERATOR):
+    def additive_expression(self):
+        children = [self.multiplicative_expression()]
+        while self.tokens_controller.peek_matches(Tk.ADDITIVE_OPERATOR):
             children.append(self.tokens_controller.next())
             children.append(self.multiplicative_expression())
         if len(children) == 1:
             return children[0]
         else:
-            return Tree("additive_expression", children)
+            return self.build("additive_expression", children)
 
     # // Optional inline
     # multiplicative_expression: prefix_unary_expression (MULTIPLICATIVE_OPERATOR prefix_unary_expression)*
-    def multiplicative_expression(self, prebuilt_prefix_unary_expression: Optional = None):
-        x = prebuilt_prefix_unary_expression
-        children = [x if x is not None else self.prefix_unary_expression()]
-        while match(self.tokens_controller.peek(), Tk.MULTIPLICATIVE_OPERATOR):
+    def multiplicative_expression(self):
+        children = [self.prefix_unary_expression()]
+        while self.tokens_controller.peek_matches(Tk.MULTIPLICATIVE_OPERATOR):
             children.append(self.tokens_controller.next())
             children.append(self.prefix_unary_expression())
         if len(children) == 1:
             return children[0]
         else:
-            return Tree("multiplicative_expression", children)
+            return self.build("multiplicative_expression", children)
 
     # // Optional inline
     # prefix_unary_expression: prefix_operator? postfix_unary_expression
     def prefix_unary_expression(self):
-        children = []
-        if (match(self.tokens_controller.peek(), Tk.NEGATION) or
-                match(self.tokens_controller.peek(), Tk.ADDITIVE_OPERATOR)):
-            children.append(self.tokens_controller.next())
-        children.append(self.postfix_unary_expression())
-        if len(children) == 1:
-            return children[0]
-        return Tree("prefix_unary_expression", children)
+        if self.tokens_controller.peek_type() in self.prefix_operator_types:
+            operator = self.tokens_controller.next()
+            return self.build("prefix_unary_expression", [operator, self.postfix_unary_expression()])
+        return self.postfix_unary_expression()
 
     # // Optional inline
     # postfix_unary_expression: primary_expression postfix_unary_suffix*
     def postfix_unary_expression(self):
         children = [self.primary_expression()]
-        while (match(self.tokens_controller.peek(), Tk.LEFT_PAREN) or
-               match(self.tokens_controller.peek(), Tk.LEFT_SQR_BR) or
-               match(self.tokens_controller.peek(), Tk.DOT)):
+        while self.tokens_controller.peek_type() in self.postfix_suffix_types:
             children.append(self.postfix_unary_suffix())
 
         if len(children) == 1:
             return children[0]
-        return Tree("postfix_unary_expression", children)
+        return self.build("postfix_unary_expression", children)
 
     # // Inline
     # postfix_unary_suffix: call_suffix | indexing_suffix | navigation_suffix
     def postfix_unary_suffix(self):
-        token = self.tokens_controller.peek()
-        if match(token, Tk.LEFT_PAREN):
-            return self.call_suffix()
-        if match(token, Tk.LEFT_SQR_BR):
-            return self.indexing_suffix()
-        if strict_match(token, Tk.DOT, "Tried to match postfix_unary_suffix, other possible tokens: '(' or '['"):
-            return self.navigation_suffix()
+        action = self.postfix_suffix_actions.get(self.tokens_controller.peek_type())
+        if action is None:
+            strict_match(self.tokens_controller.peek(), Tk.DOT, "Tried to match postfix_unary_suffix, other possible tokens: '(' or '['")
+        return action()
 
     # call_suffix: "(" function_call_arguments? ")"
     # ---
@@ -294,34 +459,33 @@ class RecursiveDescentParser:
     # function_call_arguments: expression("," expression)*
     def call_suffix(self):
         children = []
-        strict_match(self.tokens_controller.next(), Tk.LEFT_PAREN)
+        self.expect(Tk.LEFT_PAREN)
 
         # First: expression?
-        if not match(self.tokens_controller.peek(), Tk.RIGHT_PAREN):
+        if not self.tokens_controller.peek_matches(Tk.RIGHT_PAREN):
             children.append(self.expression())
 
         # Rest: (',' expression)*
-        while not match(self.tokens_controller.peek(), Tk.RIGHT_PAREN):
-            strict_match(self.tokens_controller.next(), Tk.COMMA)
+        while not self.tokens_controller.peek_matches(Tk.RIGHT_PAREN):
+            self.expect(Tk.COMMA)
             children.append(self.expression())
 
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_PAREN)
-        return Tree("call_suffix", children)
+        self.expect(Tk.RIGHT_PAREN)
+        return self.build("call_suffix", children)
 
     # indexing_suffix: "[" expression "]"
     def indexing_suffix(self):
-        strict_match(self.tokens_controller.next(), Tk.LEFT_SQR_BR)
+        self.expect(Tk.LEFT_SQR_BR)
         expression = self.expression()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_SQR_BR)
-        return Tree("indexing_suffix", [expression])
+        self.expect(Tk.RIGHT_SQR_BR)
+        return self.build("indexing_suffix", [expression])
 
     # navigation_suffix: "." NAME
     def navigation_suffix(self):
-        dot = self.tokens_controller.next()
-        strict_match(dot, Tk.DOT)
+        self.expect(Tk.DOT)
         name = self.tokens_controller.next()
         strict_match(name, Tk.NAME)
-        return Tree("navigation_suffix", [name])
+        return self.build("navigation_suffix", [name])
 
     # // Inline
     # primary_expression: parenthesized_expression
@@ -330,49 +494,28 @@ class RecursiveDescentParser:
     #   | collection_literal
     #   | if_expression
     def primary_expression(self):
-        if match(self.tokens_controller.peek(), Tk.LEFT_PAREN):
-            return self.parenthesized_expression()
-
-        if match(self.tokens_controller.peek(), Tk.NAME):
-            return self.tokens_controller.next()
-
-        simple_literal = self.try_to_build_simple_literal()
-        if simple_literal is not None:
-            return simple_literal
-
-        if match(self.tokens_controller.peek(), Tk.LEFT_SQR_BR):
-            return self.collection_literal()
-
-        if match(self.tokens_controller.peek(), Tk.IF):
-            return self.if_expression()
-
-        token = self.tokens_controller.peek()
-        raise PrimaryExpressionException(f"Primary expression cannot start with token: '{token}' ({token.type})")
-
-    def try_to_build_simple_literal(self):
-        simple_literal_token_types = [Tk.STRING, Tk.BOOLEAN, Tk.DEC_NUMBER, Tk.FLOAT_NUMBER]
-        token = self.tokens_controller.peek()
-        for type_ in simple_literal_token_types:
-            if match(token, type_):
-                return self.tokens_controller.next()
+        action = self.primary_expression_actions.get(self.tokens_controller.peek_type())
+        if action is None:
+            raise PrimaryExpressionException(f"Primary expression cannot start with token: "
+                                             f"'{self.tokens_controller.peek()}'")
+        return action()
 
     # assignment: directly_assignable_expression ASSIGNMENT_OPERATOR expression
-    # where directly_assignable_expression is a prebuilt NAME node
-    def assignment_starting_from_name(self, prebuilt_name):
-        left = prebuilt_name
+    def assignment(self):
+        left = self.directly_assignable_expression()
         operator = self.tokens_controller.next()
         strict_match(operator, Tk.ASSIGNMENT_OPERATOR)
         right = self.expression()
-        return Tree("assignment", [left, operator, right])
+        return self.build("assignment", [left, operator, right])
 
-    # assignment: directly_assignable_expression ASSIGNMENT_OPERATOR expression
-    # where directly_assignable_expression is a variable_declaration
-    def assignment_starting_from_variable_declaration(self):
-        left = self.variable_declaration()
-        operator = self.tokens_controller.next()
-        strict_match(operator, Tk.ASSIGNMENT_OPERATOR)
-        right = self.expression()
-        return Tree("assignment", [left, operator, right])
+    # // Inline
+    # directly_assignable_expression: variable_declaration | NAME
+    def directly_assignable_expression(self):
+        action = self.directly_assignable_actions.get(self.tokens_controller.peek_type())
+        if action is None:
+            raise UnexpectedToken(f"Unexpected token found: {self.tokens_controller.peek()}, "
+                                  f"expected to see NAME or a variable declaration")
+        return action()
 
     # variable_declaration: (VAR | CONST) NAME type
     def variable_declaration(self):
@@ -380,81 +523,80 @@ class RecursiveDescentParser:
         name = self.tokens_controller.next()
         strict_match(name, Tk.NAME)
         type_ = self.type()
-        return Tree("variable_declaration", [modifier, name, type_])
+        return self.build("variable_declaration", [modifier, name, type_])
 
     # parenthesized_expression: "(" expression ")"
     def parenthesized_expression(self):
-        strict_match(self.tokens_controller.next(), Tk.LEFT_PAREN)
+        self.expect(Tk.LEFT_PAREN)
         node = self.expression()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_PAREN)
-        return Tree("parenthesized_expression", [node])
+        self.expect(Tk.RIGHT_PAREN)
+        return self.build("parenthesized_expression", [node])
 
     # collection_literal: "[" expression ("," expression)* "]" | "[" "]"
     def collection_literal(self):
         children = []
-        strict_match(self.tokens_controller.next(), Tk.LEFT_SQR_BR)
+        self.expect(Tk.LEFT_SQR_BR)
 
-        if not match(self.tokens_controller.peek(), Tk.RIGHT_SQR_BR):
+        if not self.tokens_controller.peek_matches(Tk.RIGHT_SQR_BR):
             children.append(self.expression())
-            while match(self.tokens_controller.peek(), Tk.COMMA):
-                self.tokens_controller.next()
+            while self.tokens_controller.skip_if(Tk.COMMA):
                 children.append(self.expression())
 
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_SQR_BR)
-        return Tree("collection_literal", children)
+        self.expect(Tk.RIGHT_SQR_BR)
+        return self.build("collection_literal", children)
 
     # if_expression: IF expression "{" statements_block "}"
     #   | IF expression "{" statements_block "}" elseif_expression* else_expression?
     def if_expression(self):
         children = []
-        strict_match(self.tokens_controller.next(), Tk.IF)
+        self.expect(Tk.IF)
         children.append(self.expression())
-        strict_match(self.tokens_controller.next(), Tk.LEFT_CURLY_BR)
+        self.expect(Tk.LEFT_CURLY_BR)
         children.append(self.statements_block())
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_CURLY_BR)
+        self.expect(Tk.RIGHT_CURLY_BR)
 
-        while match(self.tokens_controller.peek(), Tk.ELIF):
+        while self.tokens_controller.peek_matches(Tk.ELIF):
             children.append(self.elseif_expression())
 
-        if match(self.tokens_controller.peek(), Tk.ELSE):
+        if self.tokens_controller.peek_matches(Tk.ELSE):
             children.append(self.else_expression())
 
-        return Tree("if_expression", children)
+        return self.build("if_expression", children)
 
     # else_expression: ELSE "{" statements_block "}"
     def else_expression(self):
-        match(self.tokens_controller.next(), Tk.ELSE)
-        strict_match(self.tokens_controller.next(), Tk.LEFT_CURLY_BR)
+        self.expect(Tk.ELSE)
+        self.expect(Tk.LEFT_CURLY_BR)
         block = self.statements_block()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_CURLY_BR)
-        return Tree("else_expression", [block])
+        self.expect(Tk.RIGHT_CURLY_BR)
+        return self.build("else_expression", [block])
 
     # elseif_expression: ELIF expression "{" statements_block "}"
     def elseif_expression(self):
-        match(self.tokens_controller.next(), Tk.ELIF)
+        self.expect(Tk.ELIF)
         expr = self.expression()
-        strict_match(self.tokens_controller.next(), Tk.LEFT_CURLY_BR)
+        self.expect(Tk.LEFT_CURLY_BR)
         block = self.statements_block()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_CURLY_BR)
-        return Tree("elseif_expression", [expr, block])
+        self.expect(Tk.RIGHT_CURLY_BR)
+        return self.build("elseif_expression", [expr, block])
 
     # for_statement: FOR NAME IN expression "{" statements_block "}"
     def for_statement(self):
-        strict_match(self.tokens_controller.next(), Tk.FOR)
+        self.expect(Tk.FOR)
         name = self.tokens_controller.next()
         strict_match(name, Tk.NAME)
-        strict_match(self.tokens_controller.next(), Tk.IN)
+        self.expect(Tk.IN)
         expression = self.expression()
-        strict_match(self.tokens_controller.next(), Tk.LEFT_CURLY_BR)
+        self.expect(Tk.LEFT_CURLY_BR)
         statements_block = self.statements_block()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_CURLY_BR)
-        return Tree("for_statement", [name, expression, statements_block])
+        self.expect(Tk.RIGHT_CURLY_BR)
+        return self.build("for_statement", [name, expression, statements_block])
 
     # while_statement: WHILE expression "{" statements_block "}"
     def while_statement(self):
-        strict_match(self.tokens_controller.next(), Tk.WHILE)
+        self.expect(Tk.WHILE)
         expression = self.expression()
-        strict_match(self.tokens_controller.next(), Tk.LEFT_CURLY_BR)
+        self.expect(Tk.LEFT_CURLY_BR)
         statements_block = self.statements_block()
-        strict_match(self.tokens_controller.next(), Tk.RIGHT_CURLY_BR)
-        return Tree("while_statement", [expression, statements_block])
+        self.expect(Tk.RIGHT_CURLY_BR)
+        return self.build("while_statement", [expression, statements_block])
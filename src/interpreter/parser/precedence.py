@@ -0,0 +1,69 @@
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+# rule: operand (OPERATOR operand)* or rule: operand (OPERATOR operand)?
+BINARY_RULE = re.compile(r"^(\w+): (\w+) \(([A-Z_]+) (\w+)\)([*?])$")
+INLINE_RULE = re.compile(r"^(\w+): (\w+)$")
+
+# Operator terminals which are matched, but aren't put into the tree. "or" says nothing more than the disjunction
+# node, but "+" and "-" are different additive expressions
+FILTERED_OPERATORS = ('OR', 'AND')
+
+
+@dataclass(frozen=True)
+class BinaryOperator:
+    # rule which is built by the operator
+    rule: str
+    # operator terminal
+    terminal: str
+    # operators with the higher power bind tighter
+    power: int
+    # operator token is put into the tree
+    keep_operator: bool
+    # at most one operator is allowed, e.x. a == b
+    single: bool
+
+
+def rules_by_name(grammar: str) -> Dict[str, str]:
+    rules = {}
+    for line in grammar.splitlines():
+        name, sep, definition = line.partition(':')
+        if sep and re.fullmatch(r"[a-z_]+", name):
+            rules[name] = line.strip()
+    return rules
+
+
+def build_binary_operators(grammar: str, start_rule: str = 'expression') -> Dict[str, BinaryOperator]:
+    """
+    Build the binding power table of the binary operators. Rules are followed from the start rule down
+    through their operands while they have the form: rule: operand (OPERATOR operand)*.
+    Deeper rules bind tighter. Operator tokens are kept in the tree unless their terminal is one of the
+    FILTERED_OPERATORS
+    :param grammar: grammar text
+    :param start_rule: rule of the whole expression
+    :return: operator terminal -> operator
+    """
+    rules = rules_by_name(grammar)
+    operators = {}
+    power = 0
+    rule = start_rule
+    while rule in rules:
+        inline = INLINE_RULE.match(rules[rule])
+        if inline is not None:
+            rule = inline.group(2)
+            continue
+        binary = BINARY_RULE.match(rules[rule])
+        if binary is None:
+            break
+        name, operand, terminal, same_operand, repeat = binary.groups()
+        if operand != same_operand:
+            break
+        power += 1
+        operators[terminal] = BinaryOperator(rule=name,
+                                             terminal=terminal,
+                                             power=power,
+                                             keep_operator=terminal not in FILTERED_OPERATORS,
+                                             single=repeat == '?')
+        rule = operand
+    return operators
@@ -0,0 +1,257 @@
+from typing import Generator, Any, Optional
+
+from interpreter.parser.parser import RecursiveDescentParser, strict_match, PrimaryExpressionException
+from interpreter.scanner.scanner import Scanner
+from interpreter.scanner.tokens import Token as Tk
+from interpreter.scanner.tokens_controller import DEFAULT_HISTORY_SIZE
+
+# Routine of a rule. It yields the routines of the nested rules, gets back their nodes and returns its own node
+Routine = Generator[Any, Any, Any]
+
+
+def run_routines(routine: Routine) -> Any:
+    """
+    Run the routine on an explicit stack. Every yielded routine is put on the stack and its result is sent back
+    to the routine which yielded it, so the nesting depth is limited only by the memory
+    :param routine: routine of the root rule
+    :return: result of the routine
+    """
+    stack = [routine]
+    push, pop = stack.append, stack.pop
+    send = routine.send
+    value = None
+    while True:
+        try:
+            nested = send(value)
+        except StopIteration as stop:
+            pop()
+            if not stack:
+                return stop.value
+            send = stack[-1].send
+            value = stop.value
+        else:
+            push(nested)
+            send = nested.send
+            value = None
+
+
+class ExplicitStackParser(RecursiveDescentParser):
+    """
+    Parser which builds the same trees as the RecursiveDescentParser, but doesn't recurse on the nesting depth.
+    Every rule that can nest is a routine driven by run_routines. Routines of the rules which are nested
+    get their own place on the stack, inline rules are delegated with the "yield from".
+    Binary operators are always parsed by the precedence climbing
+    """
+
+    def __init__(self, scanner: Scanner, tokens_history_size: Optional[int] = DEFAULT_HISTORY_SIZE,
+                 build_units: bool = False):
+        super().__init__(scanner, tokens_history_size, precedence_climbing=True, build_units=build_units)
+
+    def next_function_declaration(self):
+        return run_routines(self.function_declaration())
+
+    # function_declaration: NAME "(" function_parameters? ")" function_return_type "{" statements_block "}"
+    def function_declaration(self) -> Routine:
+        name = self.tokens_controller.next()
+        strict_match(name, Tk.NAME)
+        self.expect(Tk.LEFT_PAREN)
+
+        if self.tokens_controller.peek_matches(Tk.RIGHT_PAREN):
+            function_parameters = self.build("function_parameters", [])
+        else:
+            function_parameters = self.function_parameters()
+        self.expect(Tk.RIGHT_PAREN)
+
+        function_return_type = self.function_return_type()
+
+        self.expect(Tk.LEFT_CURLY_BR)
+        statements_block = yield self.statements_block()
+        self.expect(Tk.RIGHT_CURLY_BR)
+
+        return self.build("function_declaration", [name, function_parameters, function_return_type, statements_block])
+
+    # statements_block: statement*
+    def statements_block(self) -> Routine:
+        children = []
+        while not self.tokens_controller.peek_matches(Tk.RIGHT_CURLY_BR):
+            # statement() chooses the production by the statement actions table, which is bound to the routines
+            # of this parser, so it returns the routine of the statement
+            children.append((yield self.statement()))
+        return self.build("statements_block", children)
+
+    # Both assignment and expression can start with a NAME, assignment has "=" after it
+    def assignment_or_expression(self) -> Routine:
+        if self.tokens_controller.peek_matches(Tk.ASSIGNMENT_OPERATOR, 1):
+            return (yield from self.assignment())
+        return (yield from self.expression())
+
+    # return_statement: RETURN expression?
+    def return_statement(self) -> Routine:
+        self.expect(Tk.RETURN)
+        # Expression must be on the same line
+        if self.tokens_controller.next_on_same_line():
+            children = [(yield self.expression())]
+        else:
+            children = []
+        return self.build("return_statement", children)
+
+    # assignment: directly_assignable_expression ASSIGNMENT_OPERATOR expression
+    def assignment(self) -> Routine:
+        left = self.directly_assignable_expression()
+        operator = self.tokens_controller.next()
+        strict_match(operator, Tk.ASSIGNMENT_OPERATOR)
+        right = yield self.expression()
+        return self.build("assignment", [left, operator, right])
+
+    # break_statement: BREAK
+    # Break doesn't nest, it's a routine because all the statement actions are routines
+    def break_statement(self) -> Routine:
+        yield from ()
+        return super().break_statement()
+
+    # for_statement: FOR NAME IN expression "{" statements_block "}"
+    def for_statement(self) -> Routine:
+        self.expect(Tk.FOR)
+        name = self.tokens_controller.next()
+        strict_match(name, Tk.NAME)
+        self.expect(Tk.IN)
+        expression = yield self.expression()
+        statements_block = yield from self.braced_statements_block()
+        return self.build("for_statement", [name, expression, statements_block])
+
+    # while_statement: WHILE expression "{" statements_block "}"
+    def while_statement(self) -> Routine:
+        self.expect(Tk.WHILE)
+        expression = yield self.expression()
+        statements_block = yield from self.braced_statements_block()
+        return self.build("while_statement", [expression, statements_block])
+
+    # "{" statements_block "}"
+    def braced_statements_block(self) -> Routine:
+        self.expect(Tk.LEFT_CURLY_BR)
+        statements_block = yield self.statements_block()
+        self.expect(Tk.RIGHT_CURLY_BR)
+        return statements_block
+
+    # Inline expression: disjunction
+    def expression(self) -> Routine:
+        return (yield from self.binary_expression(1))
+
+    def binary_expression(self, min_power: int) -> Routine:
+        """
+        Precedence climbing, the same as RecursiveDescentParser.binary_expression does it
+        """
+        left = yield from self.prefix_unary_expression()
+        max_power = float('inf')
+        while True:
+            type_ = self.tokens_controller.peek_type()
+            operator = self.binary_operators.get(type_)
+            if operator is None or not min_power <= operator.power < max_power:
+                return left
+
+            children = [left]
+            while type_ == operator.terminal:
+                if operator.keep_operator:
+                    children.append(self.tokens_controller.next())
+                else:
+                    self.tokens_controller.skip()
+                children.append((yield self.binary_expression(operator.power + 1)))
+                if operator.single:
+                    break
+                type_ = self.tokens_controller.peek_type()
+            left = self.build(operator.rule, children)
+            max_power = operator.power
+
+    # // Optional inline
+    # prefix_unary_expression: prefix_operator? postfix_unary_expression
+    def prefix_unary_expression(self) -> Routine:
+        if self.tokens_controller.peek_type() in self.prefix_operator_types:
+            operator = self.tokens_controller.next()
+            return self.build("prefix_unary_expression", [operator, (yield self.postfix_unary_expression())])
+        return (yield from self.postfix_unary_expression())
+
+    # // Optional inline
+    # postfix_unary_expression: primary_expression postfix_unary_suffix*
+    def postfix_unary_expression(self) -> Routine:
+        children = [(yield from self.primary_expression())]
+        type_ = self.tokens_controller.peek_type()
+        while type_ in self.postfix_suffix_types:
+            if type_ == Tk.LEFT_PAREN.name:
+                children.append((yield from self.call_suffix()))
+            elif type_ == Tk.LEFT_SQR_BR.name:
+                children.append((yield from self.indexing_suffix()))
+            else:
+                children.append(self.navigation_suffix())
+            type_ = self.tokens_controller.peek_type()
+
+        if len(children) == 1:
+            return children[0]
+        return self.build("postfix_unary_expression", children)
+
+    # call_suffix: "(" function_call_arguments? ")"
+    # function_call_arguments: expression ("," expression)*
+    def call_suffix(self) -> Routine:
+        children = []
+        self.expect(Tk.LEFT_PAREN)
+        if not self.tokens_controller.peek_matches(Tk.RIGHT_PAREN):
+            children.append((yield self.expression()))
+        while not self.tokens_controller.peek_matches(Tk.RIGHT_PAREN):
+            self.expect(Tk.COMMA)
+            children.append((yield self.expression()))
+        self.expect(Tk.RIGHT_PAREN)
+        return self.build("call_suffix", children)
+
+    # indexing_suffix: "[" expression "]"
+    def indexing_suffix(self) -> Routine:
+        self.expect(Tk.LEFT_SQR_BR)
+        expression = yield self.expression()
+        self.expect(Tk.RIGHT_SQR_BR)
+        return self.build("indexing_suffix", [expression])
+
+    # // Inline
+    # primary_expression: parenthesized_expression | NAME | simple_literal | collection_literal | if_expression
+    def primary_expression(self) -> Routine:
+        type_ = self.tokens_controller.peek_type()
+        if type_ in self.primary_token_types:
+            return self.tokens_controller.next()
+        if type_ == Tk.LEFT_PAREN.name:
+            return (yield from self.parenthesized_expression())
+        if type_ == Tk.LEFT_SQR_BR.name:
+            return (yield from self.collection_literal())
+        if type_ == Tk.IF.name:
+            return (yield from self.if_expression())
+        raise PrimaryExpressionException(f"Primary expression cannot start with token: "
+                                         f"'{self.tokens_controller.peek()}'")
+
+    # parenthesized_expression: "(" expression ")"
+    def parenthesized_expression(self) -> Routine:
+        self.expect(Tk.LEFT_PAREN)
+        node = yield self.expression()
+        self.expect(Tk.RIGHT_PAREN)
+        return self.build("parenthesized_expression", [node])
+
+    # collection_literal: "[" expression ("," expression)* "]" | "[" "]"
+    def collection_literal(self) -> Routine:
+        children = []
+        self.expect(Tk.LEFT_SQR_BR)
+        if not self.tokens_controller.peek_matches(Tk.RIGHT_SQR_BR):
+            children.append((yield self.expression()))
+            while self.tokens_controller.skip_if(Tk.COMMA):
+                children.append((yield self.expression()))
+        self.expect(Tk.RIGHT_SQR_BR)
+        return self.build("collection_literal", children)
+
+    # if_expression: IF expression "{" statements_block "}" elseif_expression* else_expression?
+    def if_expression(self) -> Routine:
+        self.expect(Tk.IF)
+        children = [(yield self.expression()), (yield from self.braced_statements_block())]
+
+        # Long elif chains are flat, so they don't nest
+        while self.tokens_controller.skip_if(Tk.ELIF):
+            expression = yield self.expression()
+            children.append(self.build("elseif_expression", [expression, (yield from self.braced_statements_block())]))
+
+        if self.tokens_controller.skip_if(Tk.ELSE):
+            children.append(self.build("else_expression", [(yield from self.braced_statements_block())]))
+
+        return self.build("if_expression", children)
@@ -0,0 +1,70 @@
+import re
+from typing import Tuple, Iterator
+
+# Strings and comments are matched as a whole, so the braces inside them aren't counted. Strings have no escapes,
+# unterminated string takes the rest of the text the same way as the scanner reads it
+BRACE_OR_SKIPPED = re.compile(r'"[^"]*"?|#[^\r\n]*|[{}]')
+
+
+class UnmatchedBraceException(Exception):
+    pass
+
+
+def find_closing_brace(text: str, pos: int) -> int:
+    """
+    Find the end of the block by counting the braces without scanning the tokens
+    :param text: source text
+    :param pos: offset right after the opening brace
+    :return: offset of the closing brace
+    """
+    depth = 1
+    for match in BRACE_OR_SKIPPED.finditer(text, pos):
+        brace = match.group()
+        if brace == '{':
+            depth += 1
+        elif brace == '}':
+            depth -= 1
+            if depth == 0:
+                return match.start()
+    raise UnmatchedBraceException(f"Couldn't find the closing brace of the block starting at the offset {pos}")
+
+
+def find_opening_brace(text: str, pos: int) -> int:
+    """
+    :return: offset of the first opening brace outside of the strings and comments or -1 if there's no brace
+    """
+    for match in BRACE_OR_SKIPPED.finditer(text, pos):
+        brace = match.group()
+        if brace == '{':
+            return match.start()
+        if brace == '}':
+            raise UnmatchedBraceException(f"Unexpected closing brace at the offset {match.start()}")
+    return -1
+
+
+def iter_top_level_block_ends(text: str) -> Iterator[int]:
+    """
+    Iterate the ends of the top level blocks, e.x. function declarations
+    :return: offsets right after the closing braces
+    """
+    pos = 0
+    while True:
+        opening = find_opening_brace(text, pos)
+        if opening < 0:
+            return
+        pos = find_closing_brace(text, opening + 1) + 1
+        yield pos
+
+
+def position_after(text: str, start: int, end: int, line: int, column: int) -> Tuple[int, int]:
+    """
+    Move the position over the text between the start and the end offsets. New lines are counted the same way
+    as the CompiledScanner counts them
+    :param line: line at the start offset
+    :param column: column at the start offset
+    :return: line and column at the end offset
+    """
+    new_lines = text.count('\n', start, end) + text.count('\r', start, end)
+    if new_lines == 0:
+        return line, column + end - start
+    return line + new_lines, end - max(text.rfind('\n', start, end), text.rfind('\r', start, end)) - 1
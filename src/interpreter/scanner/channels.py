@@ -0,0 +1,56 @@
+from enum import Enum, auto
+from typing import Iterable, Iterator
+
+from lark import Token
+
+from interpreter.scanner.tokens import Token as Tk
+
+
+class Channel(Enum):
+    # tokens that are parsed
+    SIGNIFICANT = auto()
+    # new lines, whitespaces and comments
+    LAYOUT = auto()
+
+
+LAYOUT_TYPES = (Tk.NEWLINE.name, Tk.WS.name, Tk.COMMENT.name)
+
+
+def channel_of(type_: str) -> Channel:
+    return Channel.LAYOUT if type_ in LAYOUT_TYPES else Channel.SIGNIFICANT
+
+
+class ChannelToken(Token):
+    """
+    Token tagged with its channel. preceded_by_newline tells if there's a new line between the token and
+    the previous significant token, so the parser doesn't need to read the NEWLINE tokens
+    """
+    __slots__ = ('channel', 'preceded_by_newline')
+
+    def __new__(cls, type_, value, pos_in_stream=None, line=None, column=None, end_line=None, end_column=None,
+                end_pos=None, channel: Channel = Channel.SIGNIFICANT, preceded_by_newline: bool = False):
+        self = super().__new__(cls, type_, value, pos_in_stream, line, column, end_line, end_column, end_pos)
+        self.channel = channel
+        self.preceded_by_newline = preceded_by_newline
+        return self
+
+
+def significant_tokens(tokens: Iterable[Token]) -> Iterator[ChannelToken]:
+    """
+    Leave only the significant tokens. Tokens which aren't tagged yet (e.x. tokens of the TokenBuffer)
+    are tagged here
+    """
+    preceded_by_newline = False
+    for token in tokens:
+        if isinstance(token, ChannelToken):
+            if token.channel is Channel.SIGNIFICANT:
+                yield token
+            continue
+        if token.type == Tk.NEWLINE.name:
+            preceded_by_newline = True
+        elif token.type not in LAYOUT_TYPES:
+            # noinspection PyArgumentList
+            yield ChannelToken(token.type, token.value, token.pos_in_stream, token.line, token.column,
+                               token.end_line, token.end_column, token.end_pos,
+                               preceded_by_newline=preceded_by_newline)
+            preceded_by_newline = False
@@ -0,0 +1,102 @@
+import re
+from typing import Tuple, List, Any
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # python < 3.11
+    import sre_parse
+
+CATEGORY_PATTERNS = {
+    str(sre_parse.CATEGORY_DIGIT): re.compile(r'\d'),
+    str(sre_parse.CATEGORY_NOT_DIGIT): re.compile(r'\D'),
+    str(sre_parse.CATEGORY_SPACE): re.compile(r'\s'),
+    str(sre_parse.CATEGORY_NOT_SPACE): re.compile(r'\S'),
+    str(sre_parse.CATEGORY_WORD): re.compile(r'\w'),
+    str(sre_parse.CATEGORY_NOT_WORD): re.compile(r'\W'),
+}
+
+REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', None))
+ZERO_WIDTH = (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+
+def same_char(char: str, code: int, ignore_case: bool) -> bool:
+    expected = chr(code)
+    if ignore_case:
+        return char.lower() == expected.lower() or char.upper() == expected.upper()
+    return char == expected
+
+
+def in_range(char: str, low: int, high: int, ignore_case: bool) -> bool:
+    if ignore_case:
+        return any(low <= ord(c) <= high for c in (char, char.lower(), char.upper()))
+    return low <= ord(char) <= high
+
+
+def in_class(char: str, items: List[Tuple[Any, Any]], ignore_case: bool) -> bool:
+    negate = False
+    found = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            found = found or same_char(char, av, ignore_case)
+        elif op == sre_parse.RANGE:
+            found = found or in_range(char, av[0], av[1], ignore_case)
+        elif op == sre_parse.CATEGORY:
+            pattern = CATEGORY_PATTERNS.get(str(av))
+            found = found or pattern is None or pattern.match(char) is not None
+        else:
+            # Unknown item, it's safer to assume that it matches
+            found = True
+    return found != negate
+
+
+def first_of_item(op, av, char: str, ignore_case: bool) -> Tuple[bool, bool]:
+    """
+    :return: a tuple (can the item start with the char, can the item match an empty string)
+    """
+    if op == sre_parse.LITERAL:
+        return same_char(char, av, ignore_case), False
+    if op == sre_parse.NOT_LITERAL:
+        return not same_char(char, av, ignore_case), False
+    if op == sre_parse.IN:
+        return in_class(char, av, ignore_case), False
+    if op == sre_parse.BRANCH:
+        results = [first_of_sequence(alternative, char, ignore_case) for alternative in av[1]]
+        return any(it[0] for it in results), any(it[1] for it in results)
+    if op == sre_parse.SUBPATTERN:
+        _, add_flags, _, pattern = av
+        return first_of_sequence(pattern, char, ignore_case or bool(add_flags & re.IGNORECASE))
+    if op in REPEATS:
+        min_count, _, pattern = av
+        starts, nullable = first_of_sequence(pattern, char, ignore_case)
+        return starts, nullable or min_count == 0
+    if op in ZERO_WIDTH:
+        # Assertions don't consume chars. Ignoring them can only give extra candidates
+        return False, True
+    # Anything else (ANY, group references, ...) is assumed to be able to start with any char
+    return True, False
+
+
+def first_of_sequence(items, char: str, ignore_case: bool) -> Tuple[bool, bool]:
+    for op, av in items:
+        starts, nullable = first_of_item(op, av, char, ignore_case)
+        if starts:
+            return True, nullable
+        if not nullable:
+            return False, False
+    return False, True
+
+
+def parse_regex(regex: str):
+    return sre_parse.parse(regex)
+
+
+def can_start_with(parsed_regex, char: str) -> bool:
+    """
+    Check if some non-empty string which is matched by the regex can start with the given char.
+    The check is conservative: it can say True for the char that never starts a match, but never the other way round
+    :param parsed_regex: regex parsed by the parse_regex()
+    :param char: first char
+    """
+    return first_of_sequence(parsed_regex, char, False)[0]
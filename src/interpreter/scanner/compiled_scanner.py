@@ -0,0 +1,420 @@
+import io
+import mmap
+import os
+import re
+import stat
+from operator import itemgetter
+from pathlib import Path
+from typing import List, Iterator, TextIO, Tuple, Optional, Dict, AnyStr, Union, BinaryIO
+
+from lark import Token
+
+from interpreter.scanner.channels import ChannelToken, Channel, channel_of
+from interpreter.scanner.char_dispatch import parse_regex, can_start_with
+from interpreter.scanner.matchers import Matcher
+from interpreter.scanner.stream import iter_text_chunks, StreamWindow, DEFAULT_CHUNK_SIZE
+from interpreter.scanner.scanner import build_terminal_matchers, CandidatesNotFoundException, \
+    AmbiguousMatchException, MAX_TOKEN_LEN, UNBOUNDED_TOKEN_TYPES
+from interpreter.scanner.tables_cache import load_terminal_tables
+from interpreter.scanner.tokens import Token as Tk
+
+NEW_LINE = Tk.NEWLINE.name
+NEW_LINE_OR_NON_ASCII = re.compile(rb'[\r\n\x80-\xff]')
+# Terminal regexes can look ahead after the match (e.x. NAME checks for keywords), so at least this amount of chars
+# is kept in the stream window after the scanned position
+LOOKAHEAD_MARGIN = 64
+
+
+def count_new_lines(s: str) -> int:
+    return s.count('\n') + s.count('\r')
+
+
+def last_new_line_index(s: str) -> int:
+    return max(s.rfind('\n'), s.rfind('\r'))
+
+
+def lexeme(text, start: int, end: int) -> str:
+    """
+    :param text: str or a bytes-like object containing UTF-8 encoded text
+    :return: text between the start and the end positions
+    """
+    value = text[start:end]
+    if isinstance(value, str):
+        return value
+    return bytes(value).decode('utf-8', errors='replace')
+
+
+def is_memory_mappable(file: BinaryIO) -> bool:
+    try:
+        fileno = file.fileno()
+    except (OSError, io.UnsupportedOperation):
+        return False
+    # Pipes and terminals can't be mapped
+    return stat.S_ISREG(os.fstat(fileno).st_mode)
+
+
+class BufferToken:
+    """
+    Token which refers to the scanned buffer by offsets. The value is decoded only when it's read
+    """
+    __slots__ = ('type', 'buffer', 'pos_in_stream', 'end_pos', 'line', 'column')
+
+    def __init__(self, type_: str, buffer, pos_in_stream: int, end_pos: int, line: int, column: int):
+        self.type = type_
+        self.buffer = buffer
+        self.pos_in_stream = pos_in_stream
+        self.end_pos = end_pos
+        self.line = line
+        self.column = column
+
+    @property
+    def value(self) -> str:
+        return bytes(self.buffer[self.pos_in_stream:self.end_pos]).decode('utf-8')
+
+    def to_token(self, preceded_by_newline: bool = False) -> ChannelToken:
+        """
+        :param preceded_by_newline: is there a new line between the token and the previous significant token
+        :return: token with the decoded value tagged with its channel
+        """
+        # noinspection PyArgumentList
+        return ChannelToken(self.type, self.value, self.pos_in_stream, self.line, self.column, end_pos=self.end_pos,
+                            channel=channel_of(self.type), preceded_by_newline=preceded_by_newline)
+
+    def __repr__(self):
+        return f'BufferToken({self.type!r}, {self.value!r})'
+
+
+class CandidateGroup:
+    """
+    Terminals that can start with the same char compiled into one master regex. Every terminal is put into its own
+    lookahead group, so a single match call tells the longest match of every terminal at once
+    """
+
+    def __init__(self, names: List[str], regexes: List[AnyStr]):
+        self.names = names
+        if isinstance(regexes[0], bytes):
+            source = b''.join(b'(?:(?=(?P<T%d>%s)))?' % (ind, regex) for ind, regex in enumerate(regexes))
+        else:
+            source = ''.join(f'(?:(?=(?P<T{ind}>{regex})))?' for ind, regex in enumerate(regexes))
+        self.pattern = re.compile(source)
+        indices = [self.pattern.groupindex[f'T{ind}'] for ind in range(len(regexes))]
+        # Terminal patterns can have their own groups, so we pick only the spans of the terminal groups
+        if len(indices) == 1:
+            self.terminal_spans = lambda regs: (regs[indices[0]],)
+        else:
+            self.terminal_spans = itemgetter(*indices)
+
+    def longest_match(self, text: str, pos: int) -> Tuple[str, int]:
+        spans = self.terminal_spans(self.pattern.match(text, pos).regs)
+        best = max(spans, key=itemgetter(1))
+        end = best[1]
+        if end <= pos:
+            raise CandidatesNotFoundException("Couldn't find candidates for the: " + lexeme(text, pos, pos + 1))
+        if spans.count(best) > 1:
+            candidates = [name for name, span in zip(self.names, spans) if span == best]
+            raise AmbiguousMatchException(
+                "Ambiguous match for: " + lexeme(text, pos, end) +
+                "\ncandidates: " + ', '.join(candidates))
+        return self.names[spans.index(best)], end
+
+
+class SingleCandidate:
+    def __init__(self, name: str, regex: AnyStr):
+        self.name = name
+        self.pattern = re.compile(regex)
+
+    def longest_match(self, text: str, pos: int) -> Tuple[str, int]:
+        match = self.pattern.match(text, pos)
+        if match is None or match.end() == pos:
+            raise CandidatesNotFoundException("Couldn't find candidates for the: " + lexeme(text, pos, pos + 1))
+        return self.name, match.end()
+
+
+class NoCandidates:
+    # noinspection PyMethodMayBeStatic
+    def longest_match(self, text: str, pos: int) -> Tuple[str, int]:
+        raise CandidatesNotFoundException("Couldn't find candidates for the: " + lexeme(text, pos, pos + 1))
+
+
+class TerminalTable:
+    """
+    Terminals compiled for the longest match search. Terminals that can start with some char are grouped together
+    when the char is met for the first time, so only these terminals are tried at the positions starting with it
+    """
+
+    def __init__(self, matchers: List[Matcher],
+                 char_to_indices: Optional[Dict[str, List[int]]] = None,
+                 binary: bool = False):
+        """
+        :param matchers: terminal matchers
+        :param char_to_indices: precomputed indices of the matchers that can start with some char
+        :param binary: match UTF-8 encoded bytes instead of str
+        """
+        self.matchers = matchers
+        self.names = [matcher.name for matcher in matchers]
+        self.regexes = [matcher.to_regex() for matcher in matchers]
+        self.char_to_indices = char_to_indices if char_to_indices is not None else {}
+        self.binary = binary
+        # char (or byte in the binary mode) -> candidates
+        self.char_to_candidates = {}
+        # Many chars share the same candidates (e.x. letters), so compiled candidates are reused
+        self.indices_to_candidates = {}
+        self._parsed_regexes = None
+
+    def as_binary(self) -> 'TerminalTable':
+        return TerminalTable(self.matchers, self.char_to_indices, binary=True)
+
+    @property
+    def parsed_regexes(self):
+        if self._parsed_regexes is None:
+            self._parsed_regexes = [parse_regex(regex) for regex in self.regexes]
+        return self._parsed_regexes
+
+    def candidate_indices(self, char: str) -> List[int]:
+        indices = self.char_to_indices.get(char)
+        if indices is None:
+            indices = [ind for ind, parsed in enumerate(self.parsed_regexes) if can_start_with(parsed, char)]
+            self.char_to_indices[char] = indices
+        return indices
+
+    def candidates(self, char):
+        if self.binary:
+            # Non ASCII bytes are parts of multibyte chars, any terminal can start with them
+            indices = tuple(self.candidate_indices(chr(char)) if char < 128 else range(len(self.names)))
+        else:
+            indices = tuple(self.candidate_indices(char))
+        candidates = self.indices_to_candidates.get(indices)
+        if candidates is None:
+            candidates = self.build_candidates(indices)
+            self.indices_to_candidates[indices] = candidates
+        return candidates
+
+    def build_candidates(self, indices: Tuple[int, ...]):
+        regexes = [self.regexes[ind] for ind in indices]
+        if self.binary:
+            regexes = [regex.encode('utf-8') for regex in regexes]
+        if len(indices) == 0:
+            return NoCandidates()
+        if len(indices) == 1:
+            return SingleCandidate(self.names[indices[0]], regexes[0])
+        return CandidateGroup([self.names[ind] for ind in indices], regexes)
+
+    def longest_match(self, text: str, pos: int) -> Tuple[str, int]:
+        """
+        Find the terminal with the longest match starting at the given position
+        :param text: str or a bytes-like object (bytes, mmap, ...) in the binary mode
+        :return: a tuple containing the terminal name and the end position of the match
+        """
+        char = text[pos]
+        candidates = self.char_to_candidates.get(char)
+        if candidates is None:
+            candidates = self.candidates(char)
+            self.char_to_candidates[char] = candidates
+        return candidates.longest_match(text, pos)
+
+
+class CompiledScanner:
+    """
+    Scanner that finds every token with a single regex match instead of extending the token char by char.
+    It has the same interface and produces the same tokens as the Scanner. The only difference is that the longest
+    match is found even if some shorter prefix isn't a token, e.x. '1e5' is a FLOAT_NUMBER, not a DEC_NUMBER and a NAME
+    """
+
+    def __init__(self, grammar, ignore_ws: bool = True, ignore_comments: bool = True, cache_dir: Optional[Path] = None):
+        """
+        :param grammar: grammar text
+        :param ignore_ws: skip the WS tokens
+        :param ignore_comments: skip the COMMENT tokens
+        :param cache_dir: directory where the compiled terminal tables are cached. Tables aren't cached when it's None
+        """
+        self.grammar = grammar
+        self.ignore_comments = ignore_comments
+        self.ignore_ws = ignore_ws
+        self._binary_table = None
+        if cache_dir is None:
+            self.table = TerminalTable(build_terminal_matchers(grammar))
+        else:
+            tables = load_terminal_tables(grammar, cache_dir, build_terminal_matchers)
+            self.table = TerminalTable(tables.matchers, tables.char_to_indices)
+
+    def ignored_types(self) -> Tuple[str, ...]:
+        ignored = []
+        if self.ignore_ws:
+            ignored.append(Tk.WS.name)
+        if self.ignore_comments:
+            ignored.append(Tk.COMMENT.name)
+        return tuple(ignored)
+
+    @property
+    def binary_table(self) -> TerminalTable:
+        if self._binary_table is None:
+            self._binary_table = self.table.as_binary()
+        return self._binary_table
+
+    def iter_tokens(self, file: Union[TextIO, BinaryIO]) -> Iterator[Token]:
+        """
+        Iterate tokens
+        :param file: snippet file. Binary files are expected to be UTF-8 encoded, regular binary files are memory
+        mapped. Other files and streams (e.x. pipes or sys.stdin) are read in chunks
+        :return: tokens iterator
+        """
+        if isinstance(file, (io.RawIOBase, io.BufferedIOBase)) and is_memory_mappable(file):
+            return self.iter_binary_file_channel_tokens(file)
+        return self.iter_stream_tokens(file)
+
+    def iter_text_tokens(self, text: str, pos: int = 0, line: int = 1, column: int = 0,
+                         preceded_by_newline: bool = False) -> Iterator[ChannelToken]:
+        """
+        Iterate tokens of the given text.
+        Token line and column is the position of its last char, the same way as it's done by the Scanner.
+        pos_in_stream and end_pos are the offsets of the token in the text
+        :param text: snippet text
+        :param pos: offset where the scanning starts
+        :param line: line at the starting offset
+        :param column: column at the starting offset
+        :param preceded_by_newline: is there a new line between the starting offset and the previous significant token
+        :return: tokens iterator
+        """
+        ignored = self.ignored_types()
+        longest_match = self.table.longest_match
+        length = len(text)
+        while pos < length:
+            name, end = longest_match(text, pos)
+            value = text[pos:end]
+            if end - pos > MAX_TOKEN_LEN and name not in UNBOUNDED_TOKEN_TYPES:
+                raise Exception("Current scanned value is too large, couldn't create token for the: " + value)
+
+            new_lines = count_new_lines(value)
+            if new_lines == 0:
+                column += end - pos
+            else:
+                line += new_lines
+                column = len(value) - last_new_line_index(value) - 1
+
+            channel = channel_of(name)
+            if name not in ignored:
+                # noinspection PyArgumentList
+                yield ChannelToken(name, value, pos, line, column, end_pos=end,
+                                   channel=channel, preceded_by_newline=preceded_by_newline)
+            if name == NEW_LINE:
+                preceded_by_newline = True
+            elif channel is Channel.SIGNIFICANT:
+                preceded_by_newline = False
+            pos = end
+
+    def iter_stream_tokens(self, stream: Union[TextIO, BinaryIO],
+                           chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[ChannelToken]:
+        """
+        Iterate tokens of the stream reading it in chunks, so the whole text is never held in memory.
+        Tokens are the same as the iter_text_tokens() gives for the whole text
+        :param stream: text stream or UTF-8 encoded binary stream
+        :param chunk_size: amount of chars (bytes for binary streams) read at once
+        :return: tokens iterator
+        """
+        ignored = self.ignored_types()
+        longest_match = self.table.longest_match
+        window = StreamWindow(iter_text_chunks(stream, chunk_size))
+        pos, line, column = 0, 1, 0
+        preceded_by_newline = False
+        while True:
+            text = window.text
+            if len(text) - pos < LOOKAHEAD_MARGIN and not window.eof:
+                pos = window.extend(pos, LOOKAHEAD_MARGIN)
+                continue
+            if pos >= len(text):
+                return
+
+            name, end = longest_match(text, pos)
+            if len(text) - end < LOOKAHEAD_MARGIN and not window.eof:
+                # Token can go on in the next chunks or the terminal can look ahead after its end. The window is
+                # doubled, so a long token is matched only a logarithmic amount of times
+                pos = window.extend(pos, max(len(text) - pos, LOOKAHEAD_MARGIN))
+                continue
+
+            value = text[pos:end]
+            if end - pos > MAX_TOKEN_LEN and name not in UNBOUNDED_TOKEN_TYPES:
+                raise Exception("Current scanned value is too large, couldn't create token for the: " + value)
+
+            new_lines = count_new_lines(value)
+            if new_lines == 0:
+                column += end - pos
+            else:
+                line += new_lines
+                column = len(value) - last_new_line_index(value) - 1
+
+            channel = channel_of(name)
+            if name not in ignored:
+                # noinspection PyArgumentList
+                yield ChannelToken(name, value, window.offset + pos, line, column, end_pos=window.offset + end,
+                                   channel=channel, preceded_by_newline=preceded_by_newline)
+            if name == NEW_LINE:
+                preceded_by_newline = True
+            elif channel is Channel.SIGNIFICANT:
+                preceded_by_newline = False
+            pos = end
+
+    def iter_binary_file_tokens(self, file: BinaryIO) -> Iterator[BufferToken]:
+        """
+        Iterate tokens of the UTF-8 encoded binary file. The file is memory mapped when it's possible,
+        the mapping is closed when the iteration is over, so token values must be read during the iteration
+        :param file: binary snippet file
+        :return: tokens iterator
+        """
+        if not is_memory_mappable(file):
+            yield from self.iter_buffer_tokens(file.read())
+            return
+
+        # Empty file cannot be mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from self.iter_buffer_tokens(buffer)
+
+    def iter_binary_file_channel_tokens(self, file: BinaryIO) -> Iterator[ChannelToken]:
+        """
+        Iterate tokens of the UTF-8 encoded binary file converted to the same tokens as the iter_text_tokens() gives.
+        Values are decoded while the file is mapped
+        :param file: binary snippet file
+        :return: tokens iterator
+        """
+        preceded_by_newline = False
+        for buffer_token in self.iter_binary_file_tokens(file):
+            token = buffer_token.to_token(preceded_by_newline)
+            if token.type == NEW_LINE:
+                preceded_by_newline = True
+            elif token.channel is Channel.SIGNIFICANT:
+                preceded_by_newline = False
+            yield token
+
+    def iter_buffer_tokens(self, buffer) -> Iterator[BufferToken]:
+        """
+        Iterate tokens of the UTF-8 encoded buffer without copying the scanned text.
+        Token offsets are byte offsets in the buffer, lines and columns are counted in chars
+        :param buffer: bytes-like object e.x. bytes or mmap
+        :return: tokens iterator
+        """
+        ignored = self.ignored_types()
+        longest_match = self.binary_table.longest_match
+        find_new_line_or_non_ascii = NEW_LINE_OR_NON_ASCII.search
+        line, column = 1, 0
+        pos, length = 0, len(buffer)
+        while pos < length:
+            name, end = longest_match(buffer, pos)
+            if end - pos > MAX_TOKEN_LEN and name not in UNBOUNDED_TOKEN_TYPES:
+                raise Exception("Current scanned value is too large, couldn't create token for the: " +
+                                lexeme(buffer, pos, end))
+
+            if find_new_line_or_non_ascii(buffer, pos, end) is None:
+                column += end - pos
+            else:
+                value = lexeme(buffer, pos, end)
+                new_lines = count_new_lines(value)
+                if new_lines == 0:
+                    column += len(value)
+                else:
+                    line += new_lines
+                    column = len(value) - last_new_line_index(value) - 1
+
+            if name not in ignored:
+                yield BufferToken(name, buffer, pos, end, line, column)
+            pos = end
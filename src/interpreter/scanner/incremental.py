@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from lark import Token
+
+from interpreter.scanner.channels import ChannelToken, Channel
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.tokens import Token as Tk
+
+
+@dataclass
+class TextEdit:
+    # offset of the edit in the old text
+    offset: int
+    # amount of chars removed starting from the offset
+    removed_length: int
+    # text inserted at the offset
+    inserted_text: str
+
+    @property
+    def delta(self) -> int:
+        return len(self.inserted_text) - self.removed_length
+
+    def apply(self, text: str) -> str:
+        return text[:self.offset] + self.inserted_text + text[self.offset + self.removed_length:]
+
+
+def last_token_before(tokens: List[Token], offset: int) -> int:
+    """
+    Binary search of the last token which starts before the offset
+    :return: index of the token or -1 if there's no such token
+    """
+    low, high = 0, len(tokens)
+    while low < high:
+        mid = (low + high) // 2
+        if tokens[mid].pos_in_stream < offset:
+            low = mid + 1
+        else:
+            high = mid
+    return low - 1
+
+
+def moved_token(token: ChannelToken, delta: int, line_delta: int, column_delta: int) -> ChannelToken:
+    # noinspection PyArgumentList
+    return ChannelToken(token.type, token.value,
+                        token.pos_in_stream + delta,
+                        token.line + line_delta,
+                        token.column + column_delta,
+                        end_pos=token.end_pos + delta,
+                        channel=token.channel,
+                        preceded_by_newline=token.preceded_by_newline)
+
+
+def is_followed_by_newline(token: ChannelToken) -> bool:
+    """
+    :return: is there a new line between the token and the next significant token
+    """
+    if token.type == Tk.NEWLINE.name:
+        return True
+    return token.channel is Channel.LAYOUT and token.preceded_by_newline
+
+
+def move_tokens(tokens: List[Token], delta: int, line_delta: int, column_delta: int) -> List[Token]:
+    """
+    Move tokens after the edit. The column changes only for the tokens on the line where the edit has ended
+    """
+    if delta == 0 and line_delta == 0 and column_delta == 0:
+        return tokens
+    if len(tokens) == 0:
+        return []
+    edited_line = tokens[0].line
+    return [moved_token(token, delta, line_delta, column_delta if token.line == edited_line else 0)
+            for token in tokens]
+
+
+def relex(scanner: CompiledScanner, old_text: str, old_tokens: List[ChannelToken],
+          edit: TextEdit) -> Tuple[str, List[ChannelToken]]:
+    """
+    Scan the edited text again reusing the tokens that can't be affected by the edit. Scanning starts a bit
+    before the edit and stops as soon as a new token starts at the same place as some old token after the edit.
+    The rest of the old tokens are not scanned again, they are only moved by the edit
+    :param scanner: scanner which has produced the old tokens
+    :param old_text: text before the edit
+    :param old_tokens: tokens of the old text produced by the CompiledScanner.iter_text_tokens()
+    :param edit: text edit
+    :return: a tuple containing the edited text and its tokens
+    """
+    new_text = edit.apply(old_text)
+    delta = edit.delta
+
+    # Longest match can merge the edited text with the token before the edit, also one extra token is taken
+    # in case its regex looks ahead
+    first_damaged = max(last_token_before(old_tokens, edit.offset) - 1, 0)
+    if first_damaged == 0:
+        pos, line, column, preceded_by_newline = 0, 1, 0, False
+    else:
+        previous = old_tokens[first_damaged - 1]
+        pos, line, column = previous.end_pos, previous.line, previous.column
+        preceded_by_newline = is_followed_by_newline(previous)
+
+    old_edit_end = edit.offset + edit.removed_length
+    new_edit_end = edit.offset + len(edit.inserted_text)
+    old_index = last_token_before(old_tokens, old_edit_end) + 1
+
+    relexed = []
+    for token in scanner.iter_text_tokens(new_text, pos, line, column, preceded_by_newline):
+        if token.pos_in_stream >= new_edit_end:
+            old_pos = token.pos_in_stream - delta
+            while old_index < len(old_tokens) and old_tokens[old_index].pos_in_stream < old_pos:
+                old_index += 1
+            if old_index < len(old_tokens) and old_tokens[old_index].pos_in_stream == old_pos and \
+                    old_tokens[old_index].preceded_by_newline == token.preceded_by_newline:
+                # Scanning from the same text position after the same layout gives the same tokens as before
+                old = old_tokens[old_index]
+                rest = move_tokens(old_tokens[old_index:], delta, token.line - old.line, token.column - old.column)
+                return new_text, old_tokens[:first_damaged] + relexed + rest
+        relexed.append(token)
+    return new_text, old_tokens[:first_damaged] + relexed
@@ -1,3 +1,4 @@
+import re
 from abc import ABC, abstractmethod
 from re import Pattern
 from typing import List
@@ -12,6 +13,13 @@ class Matcher(ABC):
     def name(self):
         ...
 
+    @abstractmethod
+    def to_regex(self) -> str:
+        """
+        :return: regex source that matches the same strings as the matcher
+        """
+        ...
+
 
 class RegexMatcher(Matcher):
 
@@ -26,6 +34,11 @@ class RegexMatcher(Matcher):
     def matches(self, s):
         return self.pattern.fullmatch(s) is not None
 
+    def to_regex(self) -> str:
+        if self.pattern.flags & re.IGNORECASE:
+            return '(?i:' + self.pattern.pattern + ')'
+        return self.pattern.pattern
+
     def __str__(self) -> str:
         return '/' + self.pattern.pattern + '/'
 
@@ -43,6 +56,10 @@ class StringMatcher(Matcher):
         c = s.count('"')
         return s.startswith('"') and (c == 1 or (c == 2 and s.endswith('"')))
 
+    def to_regex(self) -> str:
+        # An unterminated string is matched as well, the same way as the matches() does it
+        return '"[^"]*"?'
+
     def __str__(self) -> str:
         return f'Custom string matcher'
 
@@ -63,5 +80,10 @@ class AlternativeMatcher(Matcher):
                 return True
         return False
 
+    def to_regex(self) -> str:
+        # Longer alternatives go first so that the regex alternation prefers them
+        ordered = sorted(self.alternatives, key=len, reverse=True)
+        return '|'.join(re.escape(it) for it in ordered)
+
     def __str__(self):
         return ' | '.join(self.alternatives)
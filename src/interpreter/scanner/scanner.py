@@ -1,14 +1,22 @@
+import io
 import itertools
 import re
 from dataclasses import dataclass
-from typing import List, Any, Iterator, Tuple, TextIO
+from pathlib import Path
+from typing import List, Any, Iterator, Tuple, TextIO, Optional, Dict, Union, BinaryIO
 
 from lark import Token
 
+from interpreter.scanner.channels import ChannelToken, Channel, channel_of
+from interpreter.scanner.char_dispatch import parse_regex, can_start_with
 from interpreter.scanner.matchers import Matcher, StringMatcher, RegexMatcher, AlternativeMatcher
+from interpreter.scanner.stream import iter_text_chunks
+from interpreter.scanner.tables_cache import load_terminal_tables
 from interpreter.scanner.tokens import Token as Tk
 
 MAX_TOKEN_LEN = 255
+# Strings and comments can be as long as they need to be
+UNBOUNDED_TOKEN_TYPES = (Tk.STRING.name, Tk.COMMENT.name)
 DEFAULT_TERMINAL_ENTRIES = ((Tk.LEFT_PAREN.name, '"("'),
                             (Tk.RIGHT_PAREN.name, '")"'),
                             (Tk.LEFT_CURLY_BR.name, '"{"'),
@@ -79,6 +87,38 @@ def build_terminal_matchers(grammar: str) -> List[Matcher]:
             in iter_terminal_entries(grammar)]
 
 
+@dataclass
+class LongToken:
+    """
+    Token which is read up to the terminator in one go instead of matching all the terminals after every char
+    """
+    name: str
+    first_char: str
+    # chars that end the token
+    terminators: str
+    # is the terminator a part of the token
+    includes_terminator: bool
+
+
+LONG_TOKENS = (LongToken(Tk.STRING.name, '"', '"', True),
+               LongToken(Tk.COMMENT.name, '#', '\r\n', False))
+
+
+def build_long_tokens(matchers: List[Matcher]) -> Dict[str, Tuple[LongToken, Matcher]]:
+    """
+    Find the long tokens that can be read in one go. It's possible only when no other terminal can start with the
+    first char of the token
+    :return: first char -> long token and its matcher
+    """
+    first_char_to_token = {}
+    for token in LONG_TOKENS:
+        starting = [matcher for matcher in matchers
+                    if can_start_with(parse_regex(matcher.to_regex()), token.first_char)]
+        if len(starting) == 1 and starting[0].name == token.name:
+            first_char_to_token[token.first_char] = (token, starting[0])
+    return first_char_to_token
+
+
 @dataclass
 class Cursor:
     line: int = 1
@@ -106,10 +146,21 @@ class AmbiguousMatchException(Exception):
 class Scanner:
     chars: Iterator[Any]
 
-    def __init__(self, grammar, ignore_ws: bool = True, ignore_comments: bool = True):
+    def __init__(self, grammar, ignore_ws: bool = True, ignore_comments: bool = True, cache_dir: Optional[Path] = None):
+        """
+        :param grammar: grammar text
+        :param ignore_ws: skip the WS tokens
+        :param ignore_comments: skip the COMMENT tokens
+        :param cache_dir: directory where the terminal tables are cached. Tables aren't cached when it's None
+        """
+        self.grammar = grammar
         self.ignore_comments = ignore_comments
         self.ignore_ws = ignore_ws
-        self.matchers = build_terminal_matchers(grammar)
+        if cache_dir is None:
+            self.matchers = build_terminal_matchers(grammar)
+        else:
+            self.matchers = load_terminal_tables(grammar, cache_dir, build_terminal_matchers).matchers
+        self.long_tokens = build_long_tokens(self.matchers)
 
         # State
         self.end_cursor = Cursor()
@@ -119,49 +170,63 @@ class Scanner:
         self.last_matched_text = ''
         self.no_more_chars = False
 
-    def iter_tokens(self, file: TextIO) -> Iterator[Token]:
+    def iter_tokens(self, file: Union[TextIO, BinaryIO]) -> Iterator[Token]:
         """
-        Iterate tokens
-        :param file: snippet file
+        Iterate tokens. Tokens are scanned in a loop, so the stack depth doesn't depend on the amount of tokens.
+        Tokens are tagged with their channels and tell if they are preceded by a new line
+        :param file: snippet file or stream, it's read in chunks. Binary streams are expected to be UTF-8 encoded
         :return: tokens iterator
         """
-
-        def inner():
-            candidates = self.collect_candidates()
-            if len(candidates) == 0 and self.cur_text != '':
-                raise CandidatesNotFoundException("Couldn't find candidates for the: " + self.cur_text)
-
-            if len(candidates) == 1:
-                candidate = candidates[0]
-
-                # noinspection PyArgumentList
-                yield Token(candidate.name,
-                            self.last_matched_text,
-                            0,
-                            self.prev_cursor.line,
-                            self.prev_cursor.column)
-
-                if not self.no_more_chars:
-                    self.start_cursor = self.prev_cursor
-                    self.cur_text = self.cur_text[-1]
-                    yield from inner()
-
-            elif len(candidates) > 1:
-                raise AmbiguousMatchException(
-                    "Ambiguous match for: " + self.cur_text +
-                    "\ncandidates: " + ', '.join([c.name for c in candidates]))
-
         self.reset_state()
-        self.chars = itertools.chain.from_iterable(file)
+        self.chars = itertools.chain.from_iterable(iter_text_chunks(file))
         self.move()
         if not self.no_more_chars:
-            for x in inner():
+            preceded_by_newline = False
+            for x in self.iter_all_tokens():
+                x.preceded_by_newline = preceded_by_newline
+                if x.type == Tk.NEWLINE.name:
+                    preceded_by_newline = True
+                elif x.channel is Channel.SIGNIFICANT:
+                    preceded_by_newline = False
                 if self.ignore_comments and x.type == Tk.COMMENT.name:
                     continue
                 if self.ignore_ws and x.type == Tk.WS.name:
                     continue
                 yield x
 
+    def iter_all_tokens(self) -> Iterator[ChannelToken]:
+        while True:
+            long_token = self.long_tokens.get(self.cur_text)
+            if long_token is None:
+                candidates = self.collect_candidates()
+            else:
+                token, matcher = long_token
+                self.read_long_token(token)
+                candidates = [matcher]
+            if len(candidates) == 0:
+                if self.cur_text != '':
+                    raise CandidatesNotFoundException("Couldn't find candidates for the: " + self.cur_text)
+                return
+
+            if len(candidates) > 1:
+                raise AmbiguousMatchException(
+                    "Ambiguous match for: " + self.cur_text +
+                    "\ncandidates: " + ', '.join([c.name for c in candidates]))
+
+            name = candidates[0].name
+            # noinspection PyArgumentList
+            yield ChannelToken(name,
+                               self.last_matched_text,
+                               0,
+                               self.prev_cursor.line,
+                               self.prev_cursor.column,
+                               channel=channel_of(name))
+
+            if self.no_more_chars:
+                return
+            self.start_cursor = self.prev_cursor
+            self.cur_text = self.cur_text[-1]
+
     def reset_state(self):
         self.end_cursor = Cursor()
         self.prev_cursor = Cursor()
@@ -170,36 +235,76 @@ class Scanner:
         self.last_matched_text = ''
         self.no_more_chars = False
 
-    def move(self):
+    def read_char(self) -> Optional[str]:
+        """
+        Read the next char and move the cursors
+        :return: the char or None if there are no more chars
+        """
         try:
             char = next(self.chars)
         except StopIteration:
             self.no_more_chars = True
             self.prev_cursor = self.end_cursor.clone()
-            return
+            return None
         self.prev_cursor = self.end_cursor.clone()
-        is_new_line = re.match(r'[\r\n]', char)
-        if is_new_line:
+        if char == '\r' or char == '\n':
             self.end_cursor.line += 1
             self.end_cursor.column = 0
-            self.cur_text += char
         else:
-            self.cur_text += char
             self.end_cursor.column += 1
+        return char
+
+    def move(self):
+        char = self.read_char()
+        if char is None:
+            return
+        self.cur_text += char
         if len(self.cur_text) > MAX_TOKEN_LEN:
             raise Exception("Current scanned value is too large, couldn't create token for the: " + self.cur_text)
 
+    def read_long_token(self, token: LongToken):
+        """
+        Read the token up to its terminator. Chars are written to the buffer, so it takes linear time and
+        the scanned text isn't copied on every char. State is left the same way as collect_candidates() leaves it
+        """
+        buffer = io.StringIO()
+        buffer.write(self.cur_text)
+        while True:
+            char = self.read_char()
+            if char is None:
+                self.last_matched_text = self.cur_text = buffer.getvalue()
+                return
+            if char in token.terminators:
+                break
+            buffer.write(char)
+
+        if token.includes_terminator:
+            buffer.write(char)
+            self.last_matched_text = buffer.getvalue()
+            char = self.read_char()
+            if char is None:
+                self.cur_text = self.last_matched_text
+                return
+        else:
+            self.last_matched_text = buffer.getvalue()
+        self.cur_text = self.last_matched_text + char
+
     def collect_candidates(self, collected: List[Matcher] = None) -> List[Matcher]:
+        """
+        Extend the current text while there are matchers that match it
+        :return: matchers that match the last matched text
+        """
         if collected is None:
             collected = []
-        candidates = list(
-            filter(lambda x: x.matches(self.cur_text), self.matchers))
-        if len(candidates) == 0:
-            return collected
-        old = list(filter(lambda x: x.matches(self.cur_text), collected))
-        new = list(filter(lambda x: not exists_matcher(collected, x.name), candidates))
-        self.last_matched_text = str(self.cur_text)
-        self.move()
-        if self.no_more_chars:
-            return old + new
-        return self.collect_candidates(old + new)
+        while True:
+            candidates = list(
+                filter(lambda x: x.matches(self.cur_text), self.matchers))
+            if len(candidates) == 0:
+                return collected
+            old = list(filter(lambda x: x.matches(self.cur_text), collected))
+            new = list(filter(lambda x: not exists_matcher(collected, x.name), candidates))
+            self.last_matched_text = str(self.cur_text)
+            self.move()
+            collected = old + new
+            if self.no_more_chars:
+                return collected
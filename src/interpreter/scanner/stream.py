@@ -0,0 +1,69 @@
+import codecs
+from typing import Iterator, Union, TextIO, BinaryIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_text_chunks(stream: Union[TextIO, BinaryIO], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Read the stream in chunks. Binary streams are expected to be UTF-8 encoded, they are decoded incrementally,
+    so a multibyte char can be split between the chunks
+    :param stream: text or binary stream e.x. a file, a pipe or sys.stdin
+    :param chunk_size: amount of chars (bytes for binary streams) read at once
+    :return: non empty text chunks
+    """
+    decoder = None
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, str):
+            yield data
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+        text = decoder.decode(data)
+        if text:
+            yield text
+    if decoder is not None:
+        # Raises if the stream ends in the middle of a char
+        text = decoder.decode(b'', final=True)
+        if text:
+            yield text
+
+
+class StreamWindow:
+    """
+    Part of the stream text which is being scanned. The scanned text is dropped every time the window is extended,
+    so the window holds only the unscanned text of the last read chunks
+    """
+
+    def __init__(self, chunks: Iterator[str]):
+        """
+        :param chunks: text chunks e.x. from the iter_text_chunks()
+        """
+        self.chunks = chunks
+        self.text = ''
+        # offset of the window text in the stream
+        self.offset = 0
+        self.eof = False
+
+    def extend(self, pos: int, min_chars: int) -> int:
+        """
+        Drop the text before the position and read at least min_chars new chars unless the stream ends
+        :param pos: position in the window text before which everything is already scanned
+        :param min_chars: amount of chars that should be read
+        :return: the same position in the extended window text
+        """
+        parts = [self.text[pos:]]
+        read = 0
+        while read < min_chars:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                break
+            parts.append(chunk)
+            read += len(chunk)
+        self.offset += pos
+        self.text = ''.join(parts)
+        return 0
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import string
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Callable, Any, Optional, IO
+
+from interpreter.scanner.char_dispatch import parse_regex, can_start_with
+from interpreter.scanner.matchers import Matcher, RegexMatcher, StringMatcher, AlternativeMatcher
+
+# Increase it every time the format of the cached tables changes
+TABLES_VERSION = 1
+
+# First chars of the tokens for which candidate terminals are computed beforehand
+PRECOMPUTED_CHARS = string.printable
+
+
+class UnknownMatcherException(Exception):
+    pass
+
+
+@dataclass
+class TerminalTables:
+    matchers: List[Matcher]
+    # char -> indices of the matchers that can start with the char
+    char_to_indices: Dict[str, List[int]]
+
+
+def grammar_hash(grammar: str) -> str:
+    return hashlib.sha256(grammar.encode('utf-8')).hexdigest()
+
+
+def cache_file_path(grammar: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / f"terminals-{grammar_hash(grammar)}.json"
+
+
+def describe_matcher(matcher: Matcher) -> Dict[str, Any]:
+    if isinstance(matcher, RegexMatcher):
+        return {"kind": "regex", "name": matcher.name,
+                "pattern": matcher.pattern.pattern, "flags": int(matcher.pattern.flags)}
+    if isinstance(matcher, StringMatcher):
+        return {"kind": "string", "name": matcher.name}
+    if isinstance(matcher, AlternativeMatcher):
+        return {"kind": "alternatives", "name": matcher.name, "alternatives": matcher.alternatives}
+    raise UnknownMatcherException("Matcher cannot be cached: " + str(matcher))
+
+
+def matcher_from_description(description: Dict[str, Any]) -> Matcher:
+    kind = description["kind"]
+    if kind == "regex":
+        return RegexMatcher(re.compile(description["pattern"], description["flags"]), description["name"])
+    if kind == "string":
+        return StringMatcher(description["name"])
+    if kind == "alternatives":
+        return AlternativeMatcher(description["alternatives"], description["name"])
+    raise UnknownMatcherException("Unknown matcher kind: " + kind)
+
+
+def build_terminal_tables(grammar: str, build_matchers: Callable[[str], List[Matcher]]) -> TerminalTables:
+    matchers = build_matchers(grammar)
+    parsed_regexes = [parse_regex(matcher.to_regex()) for matcher in matchers]
+    char_to_indices = {char: [ind for ind, parsed in enumerate(parsed_regexes) if can_start_with(parsed, char)]
+                       for char in PRECOMPUTED_CHARS}
+    return TerminalTables(matchers, char_to_indices)
+
+
+def read_terminal_tables(path: Path, grammar: str) -> Optional[TerminalTables]:
+    """
+    Read the cached tables
+    :return: tables or None if the file is missing, broken or was written for another grammar or format version
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data["version"] != TABLES_VERSION or data["grammar_hash"] != grammar_hash(grammar):
+            return None
+        return TerminalTables([matcher_from_description(it) for it in data["matchers"]],
+                              data["char_to_indices"])
+    except (OSError, ValueError, KeyError, TypeError, UnknownMatcherException, re.error):
+        return None
+
+
+def write_terminal_tables(path: Path, grammar: str, tables: TerminalTables):
+    data = {"version": TABLES_VERSION,
+            "grammar_hash": grammar_hash(grammar),
+            "matchers": [describe_matcher(it) for it in tables.matchers],
+            "char_to_indices": tables.char_to_indices}
+    write_file_atomically(path, lambda f: json.dump(data, f))
+
+
+def write_file_atomically(path: Path, write: Callable[[IO], Any], binary: bool = False):
+    """
+    Write to the temporary file first so that concurrent readers never see a partially written file
+    :param write: writes the content into the opened file
+    :param binary: open the file in the binary mode, otherwise it's an UTF-8 text file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_terminal_tables(grammar: str,
+                         cache_dir: Path,
+                         build_matchers: Callable[[str], List[Matcher]]) -> TerminalTables:
+    """
+    Load the terminal tables from the cache. Tables are rebuilt and cached when the cache doesn't contain
+    the tables for the given grammar text
+    :param grammar: grammar text
+    :param cache_dir: directory containing the cached tables
+    :param build_matchers: function that builds terminal matchers out of the grammar
+    """
+    path = cache_file_path(grammar, cache_dir)
+    tables = read_terminal_tables(path, grammar)
+    if tables is None:
+        tables = build_terminal_tables(grammar, build_matchers)
+        try:
+            write_terminal_tables(path, grammar, tables)
+        except (OSError, UnknownMatcherException):
+            # Caching is only an optimization, the scanner can still work without it
+            pass
+    return tables
@@ -0,0 +1,195 @@
+from array import array
+from typing import Iterator, Iterable, Union, Optional, Dict, Tuple, List
+
+from lark import Token
+
+from interpreter.scanner.channels import ChannelToken, LAYOUT_TYPES
+from interpreter.scanner.compiled_scanner import CompiledScanner, BufferToken, lexeme
+from interpreter.scanner.tokens import Token as Tk
+from interpreter.scanner.tokens_controller import DEFAULT_HISTORY_SIZE
+
+VALUE_TO_KIND = {kind.value: kind for kind in Tk}
+VALUE_TO_TYPE = {kind.value: kind.name for kind in Tk}
+LAYOUT_KINDS = frozenset(Tk[type_].value for type_ in LAYOUT_TYPES)
+
+
+class UnknownTokenKindException(Exception):
+    pass
+
+
+class TokenBuffer:
+    """
+    Compact token stream. Token kinds are stored as the values of the Token enum and the positions are stored
+    in arrays, so a token takes 17 bytes instead of a whole lark Token object.
+    Lark tokens are created only when they're requested
+    """
+
+    def __init__(self, source):
+        """
+        :param source: scanned text or a bytes-like object containing UTF-8 encoded text
+        """
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.columns = array('I')
+
+    @classmethod
+    def scan(cls, scanner: CompiledScanner, source) -> 'TokenBuffer':
+        """
+        Scan the source into the buffer
+        :param scanner: scanner
+        :param source: text or a bytes-like object containing UTF-8 encoded text
+        """
+        if isinstance(source, str):
+            tokens = scanner.iter_text_tokens(source)
+        else:
+            tokens = scanner.iter_buffer_tokens(source)
+        return cls.from_tokens(source, tokens)
+
+    @classmethod
+    def from_tokens(cls, source, tokens: Iterable[Union[Token, BufferToken]]) -> 'TokenBuffer':
+        buffer = cls(source)
+        for token in tokens:
+            buffer.append(token)
+        return buffer
+
+    def append(self, token: Union[Token, BufferToken]):
+        try:
+            kind = Tk[token.type]
+        except KeyError:
+            raise UnknownTokenKindException(f"Token type '{token.type}' is not a kind of the Token enum")
+        self.kinds.append(kind.value)
+        self.starts.append(token.pos_in_stream)
+        self.ends.append(token.end_pos)
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, index: int) -> Tk:
+        return VALUE_TO_KIND[self.kinds[index]]
+
+    def value(self, index: int) -> str:
+        return lexeme(self.source, self.starts[index], self.ends[index])
+
+    def token(self, index: int) -> Token:
+        """
+        Create the lark token
+        """
+        # noinspection PyArgumentList
+        return Token(VALUE_TO_KIND[self.kinds[index]].name,
+                     self.value(index),
+                     self.starts[index],
+                     self.lines[index],
+                     self.columns[index],
+                     end_pos=self.ends[index])
+
+    def significant_indexes(self) -> Tuple[array, array]:
+        """
+        :return: indexes of the significant tokens and the flags telling if there's a new line between the token and
+        the previous significant token, the same as the channels.significant_tokens() tags them
+        """
+        indexes = array('I')
+        preceded_by_newline = array('B')
+        new_line = Tk.NEWLINE.value
+        after_new_line = False
+        for index, kind in enumerate(self.kinds):
+            if kind == new_line:
+                after_new_line = True
+            elif kind not in LAYOUT_KINDS:
+                indexes.append(index)
+                preceded_by_newline.append(after_new_line)
+                after_new_line = False
+        return indexes, preceded_by_newline
+
+    def __iter__(self) -> Iterator[Token]:
+        """
+        Iterate lark tokens for debugging, every token is created only when it's reached.
+        Parser reads the buffer with the BufferTokensController instead
+        """
+        for index in range(len(self.kinds)):
+            yield self.token(index)
+
+
+class BufferTokensController:
+    def __init__(self, history_size: Optional[int] = DEFAULT_HISTORY_SIZE):
+        """
+        Tokens controller which reads the kinds of the significant tokens from the TokenBuffer arrays.
+        Lark tokens are created only for the tokens which are read by next() or peek(), e.x. the leaves of the tree.
+        Tokens which are only matched or skipped are never created
+        :param history_size: amount of the last read tokens in the cached_tokens. 0 disables the history,
+        None keeps all the tokens
+        """
+        self.history_size = history_size
+        self.buffer = TokenBuffer('')
+        self.indexes = array('I')
+        self.preceded_by_newline = array('B')
+        # position of the next significant token in the indexes
+        self.position = 0
+        # position -> peeked token, so the peeked token and the read one are the same object
+        self.peeked_tokens: Dict[int, ChannelToken] = {}
+
+    def reload(self, tokens: TokenBuffer):
+        self.buffer = tokens
+        self.indexes, self.preceded_by_newline = tokens.significant_indexes()
+        self.position = 0
+        self.peeked_tokens = {}
+
+    @property
+    def cached_tokens(self) -> List[ChannelToken]:
+        """
+        Last read tokens, they're created when the history is requested
+        """
+        start = 0 if self.history_size is None else max(0, self.position - self.history_size)
+        return [self.token(position) for position in range(start, self.position)]
+
+    def token(self, position: int) -> ChannelToken:
+        buffer = self.buffer
+        index = self.indexes[position]
+        # noinspection PyArgumentList
+        return ChannelToken(VALUE_TO_TYPE[buffer.kinds[index]], buffer.value(index), buffer.starts[index],
+                            buffer.lines[index], buffer.columns[index], end_pos=buffer.ends[index],
+                            preceded_by_newline=bool(self.preceded_by_newline[position]))
+
+    def next(self) -> Optional[ChannelToken]:
+        token = self.peek()
+        if token is not None:
+            self.peeked_tokens.pop(self.position, None)
+            self.position += 1
+        return token
+
+    def peek(self, k: int = 0) -> Optional[ChannelToken]:
+        position = self.position + k
+        if position >= len(self.indexes):
+            return None
+        token = self.peeked_tokens.get(position)
+        if token is None:
+            token = self.peeked_tokens[position] = self.token(position)
+        return token
+
+    def peek_type(self, k: int = 0) -> Optional[str]:
+        position = self.position + k
+        if position >= len(self.indexes):
+            return None
+        return VALUE_TO_TYPE[self.buffer.kinds[self.indexes[position]]]
+
+    def peek_matches(self, expected_type: Tk, k: int = 0) -> bool:
+        position = self.position + k
+        return position < len(self.indexes) and self.buffer.kinds[self.indexes[position]] == expected_type.value
+
+    def next_on_same_line(self) -> bool:
+        return self.position < len(self.indexes) and not self.preceded_by_newline[self.position]
+
+    def skip(self):
+        if self.position < len(self.indexes):
+            self.peeked_tokens.pop(self.position, None)
+            self.position += 1
+
+    def skip_if(self, expected_type: Tk) -> bool:
+        if not self.peek_matches(expected_type):
+            return False
+        self.skip()
+        return True
@@ -1,89 +1,82 @@
+from collections import deque
 from typing import Optional, Iterator
 
 from lark import Token
 
-from interpreter.utils.custom_queue import CustomQueue
+from interpreter.scanner.channels import ChannelToken, significant_tokens
+from interpreter.scanner.tokens import Token as Tk
+from interpreter.utils.lookahead_buffer import LookaheadBuffer, DEFAULT_CAPACITY
 
-
-def match(token: Token, expected_type: str) -> bool:
-    if token is None:
-        return False
-    return token.type == expected_type
+# Last tokens are enough to tell where the parsing has stopped
+DEFAULT_HISTORY_SIZE = 32
 
 
 class TokensController:
-    def __init__(self):
-        self.tokens = iter([])
-        self.should_ignore_new_lines = True
-        self.peeked_tokens = CustomQueue()
-        self.cached_tokens = []
-
-    def include_new_lines(self, func):
-        prev = self.should_ignore_new_lines
-        self.should_ignore_new_lines = False
-        ret = func()
-        self.should_ignore_new_lines = prev
-        return ret
+    def __init__(self, lookahead: int = DEFAULT_CAPACITY, history_size: Optional[int] = DEFAULT_HISTORY_SIZE):
+        """
+        :param lookahead: max amount of tokens that can be peeked
+        :param history_size: amount of the last read tokens kept in the cached_tokens. 0 disables the history,
+        None keeps all the tokens
+        """
+        self.lookahead = lookahead
+        self.history_size = history_size
+        self.peeked_tokens = LookaheadBuffer(iter([]), lookahead)
+        self.cached_tokens = deque(maxlen=history_size)
 
-    def next(self) -> Optional[Token]:
-        def inner_next():
-            token = None
-            if self.peeked_tokens.empty():
-                try:
-                    token = next(self.tokens)
-                except StopIteration:
-                    pass
-            else:
-                token = self.peeked_tokens.get(block=False)
-            return token
-
-        token = inner_next()
-        if self.should_ignore_new_lines:
-            while match(token, "NEWLINE"):
-                token = self.next()
+    def next(self) -> Optional[ChannelToken]:
+        token = self.peeked_tokens.next()
         if token is not None:
             self.cached_tokens.append(token)
         return token
 
-    def peek(self) -> Optional[Token]:
-        def inner_peek():
-            if self.peeked_tokens.empty():
-                token = self.next()
-                self.peeked_tokens.put(token)
-                return token
-            else:
-                return self.peeked_tokens.peek()
+    def peek(self, k: int = 0) -> Optional[ChannelToken]:
+        """
+        Look at the token without consuming it
+        :param k: 0 for the next token, 1 for the token after it and so on
+        :return: the token or None if there are not enough tokens
+        """
+        return self.peeked_tokens.peek(k)
 
-        if self.should_ignore_new_lines:
-            if self.peeked_tokens.empty():
-                self._skip_all_new_lines()
-                return inner_peek()
-            else:
-                self.remove_new_lines_from_peeked()
-                if self.peeked_tokens.empty():
-                    return self.peek()
-                else:
-                    return inner_peek()
-        else:
-            return inner_peek()
+    def peek_type(self, k: int = 0) -> Optional[str]:
+        """
+        :param k: 0 for the next token, 1 for the token after it and so on
+        :return: type of the token or None if there are not enough tokens
+        """
+        token = self.peeked_tokens.peek(k)
+        return None if token is None else token.type
 
-    def reload(self, tokens: Iterator[Token]):
-        self.tokens = tokens
-        self.should_ignore_new_lines = True
-        self.peeked_tokens = CustomQueue()
-        self.cached_tokens = []
+    def peek_matches(self, expected_type: Tk, k: int = 0) -> bool:
+        token = self.peeked_tokens.peek(k)
+        return token is not None and token.type == expected_type.name
 
-    # Ugly utility method for the should_ignore_new_lines()
-    def _skip_all_new_lines(self):
-        token = self.next()
-        self.peeked_tokens.put(token)
-        while match(token, "NEWLINE"):
-            self.peeked_tokens.get()
-            token = self.next()
-            self.peeked_tokens.put(token)
+    def next_on_same_line(self) -> bool:
+        """
+        :return: True if there's the next token and there's no new line between it and the last read token
+        """
+        token = self.peeked_tokens.peek()
+        return token is not None and not token.preceded_by_newline
+
+    def skip(self):
+        """
+        Consume the next token which isn't a leaf of the tree
+        """
+        self.next()
 
-    def remove_new_lines_from_peeked(self):
+    def skip_if(self, expected_type: Tk) -> bool:
+        """
+        Consume the next token if it has the expected type
+        :return: True if the token was consumed
+        """
         token = self.peeked_tokens.peek()
-        while match(token, "NEWLINE"):
-            self.peeked_tokens.get()
-            token = self.peeked_tokens.peek()
+        if token is None or token.type != expected_type.name:
+            return False
+        self.cached_tokens.append(self.peeked_tokens.next())
+        return True
+
+    def reload(self, tokens: Iterator[Token]):
+        """
+        :param tokens: tokens, only the significant ones are read. New lines are known
+        from the preceded_by_newline of the tokens
+        """
+        self.peeked_tokens = LookaheadBuffer(significant_tokens(tokens), self.lookahead)
+        self.cached_tokens = deque(maxlen=self.history_size)
@@ -30,6 +30,10 @@ def description(node: AnyNode):
         if node.meta.line is None:
             return str(node.unit)
         return f"line: {node.meta.line}, {node.unit}"
+    if isinstance(node, CompactNode):
+        if node.line == UNKNOWN_LINE:
+            return str(node)
+        return f"line: {node.line}, {node}"
     if isinstance(node, SimpleLiteral):
         return f"line: {node.line}, {node}"
     return str(node)
@@ -43,10 +47,17 @@ def resolve_closure_item_type(item: ClosureItem) -> UnitType:
         return FunctionType(param_types, item.return_type)
 
 
-def match_types(left: UnitType, right: UnitType, message_before=''):
-    if not str(left) == str(right):
+def match_types(left: UnitType, right: UnitType, message_before: Callable[[], str] = lambda: ''):
+    """
+    :param message_before: returns the beginning of the error message, it's called only when the types don't match
+    """
+    # Type of the statements block without the return expression isn't resolved, it's the None type
+    left = NONE_TYPE if left is None else left
+    right = NONE_TYPE if right is None else right
+    # Types are interned, so the equal types are the same object
+    if left is not right:
         raise TypeMismatchException(
-            message_before + f"\nTypes don't match:\n"
+            message_before() + f"\nTypes don't match:\n"
                              f"{str(left)} != {str(right)}")
 
 
@@ -71,7 +82,7 @@ class SemanticAnalyzer(Visitor):
         return self.resolve_type(self.id_to_return_expression_node.get(identifier, None), closure)
 
     def resolve_type(self, node: AnyNode, closure: Closure) -> UnitType:
-        if isinstance(node, TreeWithUnit):
+        if isinstance(node, NODE_TYPES):
             unit = node.unit
             if isinstance(unit, ResolvableByStatementsBlock):
                 return unit.resolve_type(
@@ -107,7 +118,7 @@ class SemanticAnalyzer(Visitor):
 
     def assignment(self, node: TreeWithUnit[Assignment]):
         def update_variable_type_if_necessary(closure: Closure):
-            if isinstance(node.unit.left, TreeWithUnit):
+            if isinstance(node.unit.left, NODE_TYPES):
                 left_unit: VariableDeclaration = node.unit.left.unit
                 left_type = self.resolve_type(node.unit.left, closure)
                 if (isinstance(left_type, IterableType)
@@ -115,28 +126,28 @@ class SemanticAnalyzer(Visitor):
                     closure[left_unit.variable_name].type = self.resolve_type(node.unit.right, closure)
 
         def bind_value(closure: Closure):
-            if isinstance(node.unit.left, TreeWithUnit):
+            if isinstance(node.unit.left, NODE_TYPES):
                 name = node.unit.left.unit.variable_name
                 closure[name].is_bound = True
 
         def match_types_(closure):
-            if isinstance(node.unit.left, TreeWithUnit):
+            if isinstance(node.unit.left, NODE_TYPES):
                 unit: VariableDeclaration = node.unit.left.unit
                 t = closure[unit.variable_name].type
                 # When unit is a VariableDeclaration I want to take its type from the closure
                 # because I update it in the update_variable_type_if_necessary()
                 match_types(t,
                             self.resolve_type(node.unit.right, closure),
-                            message_before="Couldn't assign variable, " + description(node))
+                            message_before=lambda: "Couldn't assign variable, " + description(node))
             else:
                 match_types(self.resolve_type(node.unit.left, closure),
                             self.resolve_type(node.unit.right, closure),
-                            message_before="Couldn't assign variable, " + description(node))
+                            message_before=lambda: "Couldn't assign variable, " + description(node))
 
         # test if left can be assigned or reassigned checking if it's a constant symbol
         def can_assign(closure):
             left = node.unit.left
-            if isinstance(left, TreeWithUnit):
+            if isinstance(left, NODE_TYPES):
                 left_unit = left.unit
                 assert isinstance(left_unit, VariableDeclaration)
                 variable = closure[left_unit.variable_name]
@@ -161,7 +172,7 @@ class SemanticAnalyzer(Visitor):
     def statements_block(self, node: TreeWithUnit[StatementsBlock]):
         statements = node.unit.statements
         if len(statements) > 0:
-            assert isinstance(statements[-1], TreeWithUnit), "Statement is not a tree: " + description(statements[-1])
+            assert isinstance(statements[-1], NODE_TYPES), "Statement is not a tree: " + description(statements[-1])
             statement = statements[-1].unit
             if isinstance(statement, ReturnStatement):
                 self.id_to_return_expression_node[node.identifier] = statement.expression
@@ -169,7 +180,9 @@ class SemanticAnalyzer(Visitor):
     # - test function declaration is not declared again
     # - test if returned type is same as the type of the returned value
     def function_declaration(self, node: TreeWithUnit[FunctionDeclaration]):
-        pass
+        if isinstance(node.unit, LazyFunctionDeclaration) and not node.unit.is_loaded:
+            # Statements block isn't a child of the node yet, it's analyzed on its own when it's built
+            node.unit.on_load.append(lambda statements_block: SemanticAnalyzer().analyze(statements_block))
 
     def postfix_unary_expression(self, node: TreeWithUnit[PostfixUnaryExpression]):
         pass
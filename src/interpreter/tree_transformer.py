@@ -1,6 +1,15 @@
-from lark import Transformer, v_args
+import inspect
+import sys
+from functools import lru_cache
+from types import MethodType
+from typing import Dict, Callable
+
+from lark import Transformer, v_args, Token
+from lark.exceptions import GrammarError, VisitError
+from lark.visitors import Discard
 
 from interpreter.language_units import *
+from interpreter.scanner.tokens import Token as Tk
 
 
 def last(elements: List):
@@ -9,17 +18,36 @@ def last(elements: List):
 
 
 def get_line(node):
-    if isinstance(node, TreeWithUnit):
-        return node.meta.line
+    if isinstance(node, Tree):
+        # Line isn't set for the nodes without children
+        return getattr(node.meta, 'line', None)
     return node.line
 
 
+# Rules and tokens which can have a callback
+CALLBACK_NAMES = frozenset(RULE_UNITS) | frozenset(kind.name for kind in Tk)
+
+
+@lru_cache(maxsize=None)
+def callback_functions(transformer_class: type) -> Dict[str, Callable]:
+    """
+    :return: rule name or token type -> callback of the transformer class. Functions are taken without the wrappers
+    of the v_args, which only pass the tree to them
+    """
+    return {name: inspect.unwrap(getattr(transformer_class, name)) for name in CALLBACK_NAMES
+            if inspect.isfunction(getattr(transformer_class, name, None))}
+
+
 # noinspection PyTypeChecker,PyMethodMayBeStatic,PyPep8Naming
 @v_args(tree=True)
 class TreeTransformer(Transformer):
     def __init__(self):
         super().__init__(visit_tokens=True)
         self.counter = 0
+        # rule name or token type -> callback. Callbacks are found once instead of getattr for every node, nodes
+        # and tokens without a callback are kept the same way as by the Transformer
+        self.callbacks: Dict[str, Callable] = {name: MethodType(function, self)
+                                               for name, function in callback_functions(type(self)).items()}
 
     def next_id(self):
         x = self.counter
@@ -39,7 +67,107 @@ class TreeTransformer(Transformer):
         return SimpleLiteral(token.strip('"'), token.line)
 
     def NAME(self, token):
-        return token
+        # Names are interned, so equal names are the same object and closures can compare them by identity
+        return sys.intern(str(token))
+
+    def transform(self, tree: Tree):
+        # Line of a node is the line of its first child. Lines are set before the transformation
+        # because names are transformed to plain strings. Subtrees are iterated from the bottom,
+        # so the lines of the children are set before their parents
+        for subtree in tree.iter_subtrees():
+            if len(subtree.children) > 0:
+                subtree.meta.line = get_line(subtree.children[0])
+        return super().transform(tree)
+
+    def transform_on_stack(self, tree: Tree):
+        """
+        Same as the transform, but the tree is walked in post-order with an explicit stack,
+        so the depth of the tree is limited only by the memory. Callbacks are taken from the callbacks table
+        :param tree: parsed tree
+        :return: transformed tree
+        """
+        callbacks = self.callbacks
+        # frames of the trees which children are transformed: tree, iterator over its children, transformed
+        # children and the line of the first child
+        stack = [[tree, iter(tree.children), [], None]]
+        while True:
+            frame = stack[-1]
+            children = frame[2]
+            for child in frame[1]:
+                if isinstance(child, Tree):
+                    stack.append([child, iter(child.children), [], None])
+                    break
+                if len(children) == 0:
+                    frame[3] = child.line if isinstance(child, Token) else get_line(child)
+                if isinstance(child, Token):
+                    callback = callbacks.get(child.type)
+                    children.append(child if callback is None else self._call(callback, child.type, child))
+                else:
+                    children.append(child)
+            else:
+                stack.pop()
+                node, meta = frame[0], frame[0].meta
+                if len(children) > 0:
+                    line = meta.line = frame[3]
+                else:
+                    line = getattr(meta, 'line', None)
+                callback = callbacks.get(node.data)
+                transformed = Tree(node.data, children, meta)
+                if callback is not None:
+                    transformed = self._call(callback, node.data, transformed)
+                if len(stack) == 0:
+                    return transformed
+                parent = stack[-1]
+                if len(parent[2]) == 0:
+                    parent[3] = line
+                parent[2].append(transformed)
+
+    @staticmethod
+    def _call(callback: Callable, name: str, node):
+        """
+        Call the callback of the rule or the token. Errors are wrapped the same way as by the Transformer
+        """
+        try:
+            return callback(node)
+        except (GrammarError, Discard):
+            raise
+        except Exception as e:
+            raise VisitError(name, node, e)
+
+    def _call_rule(self, tree: Tree):
+        callback = self.callbacks.get(tree.data)
+        return tree if callback is None else self._call(callback, tree.data, tree)
+
+    def _call_token(self, token: Token):
+        callback = self.callbacks.get(token.type)
+        return token if callback is None else self._call(callback, token.type, token)
+
+    def build(self, data: str, children: List) -> Tree:
+        """
+        Build the transformed node from its children, so the parser can build the units without the lark tree.
+        Nodes must be built in post-order, the same way as they're transformed, so they get the same identifiers
+        :param data: rule name
+        :param children: transformed nodes and the tokens which aren't transformed yet
+        """
+        return self._call_rule(self.build_tree(data, children))
+
+    def build_tree(self, data: str, children: List) -> Tree:
+        tree = Tree(data, [self._call_token(it) if isinstance(it, Token) else it for it in children])
+        if len(children) > 0:
+            tree.meta.line = get_line(children[0])
+        return tree
+
+    def build_lazy_function_declaration(self, children: List, load_body) -> TreeWithUnit[LazyFunctionDeclaration]:
+        """
+        Build the function declaration without its statements block
+        :param children: name, function_parameters node and return type
+        :param load_body: builds the statements block when it's used for the first time
+        """
+        tree = self.build_tree("function_declaration", children)
+        name, function_parameters, return_type = tree.children
+        return TreeWithUnit(tree,
+                            LazyFunctionDeclaration(name, function_parameters.children, return_type, load_body),
+                            identifier=self.next_id())
 
     def start(self, node: Tree):
         node.meta.line = 0
@@ -49,7 +177,6 @@ class TreeTransformer(Transformer):
     def function_declaration(self, node):
         children = node.children
         name = children[0]
-        node.meta.line = get_line(name)
         return TreeWithUnit(
             node,
             FunctionDeclaration(name=name,
@@ -62,25 +189,19 @@ class TreeTransformer(Transformer):
     def return_statement(self, node):
         children = node.children
         expression = children[0] if len(children) > 0 else None
-        if expression is not None:
-            node.meta.line = get_line(expression)
         return TreeWithUnit(node, ReturnStatement(expression), self.next_id())
 
     def disjunction(self, node):
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, Disjunction(node.children), self.next_id())
 
     def conjunction(self, node):
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, Conjunction(node.children), self.next_id())
 
     def equality(self, node):
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, Equality(node.children), self.next_id())
 
     def prefix_unary_expression(self, node):
         operator, expr = node.children
-        node.meta.line = get_line(operator)
         return TreeWithUnit(node, PrefixUnaryExpression(operator, expr), self.next_id())
 
     def if_expression(self, node):
@@ -100,7 +221,6 @@ class TreeTransformer(Transformer):
                 last_expression.data == 'else_expression':
             else_expression = last_expression
 
-        node.meta.line = get_line(condition)
         return TreeWithUnit(node, IfExpression(condition,
                                                statements_block,
                                                else_if_expressions,
@@ -109,104 +229,79 @@ class TreeTransformer(Transformer):
     def elseif_expression(self, node):
         children = node.children
         assert len(children) == 2
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, ElseIfExpression(*children), self.next_id())
 
     def else_expression(self, node):
         children = node.children
         assert len(children) == 1
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, ElseExpression(*children), self.next_id())
 
     def function_parameter(self, node):
         children = node.children
         assert len(children) == 2
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, FunctionParameter(*children), self.next_id())
 
     def statements_block(self, node):
         children = node.children
-        if len(node.children) > 0:
-            node.meta.line = get_line(children[0])
         return TreeWithUnit(node, StatementsBlock(children), self.next_id())
 
     def variable_declaration(self, node):
         children = node.children
         assert len(children) == 3
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, VariableDeclaration(*children), self.next_id())
 
     def postfix_unary_expression(self, node):
         children = node.children
         assert len(children) > 0
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(
             node, PostfixUnaryExpression(children[0], children[1:]), self.next_id())
 
     def multiplicative_expression(self, node):
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, MultiplicativeExpression(node.children), self.next_id())
 
     def parenthesized_expression(self, node):
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, ParenthesizedExpression(node.children[0]), self.next_id())
 
     def additive_expression(self, node):
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, AdditiveExpression(node.children), self.next_id())
 
     def comparison(self, node):
         children = node.children
-        node.meta.line = get_line(node.children[0])
         return TreeWithUnit(node, Comparison(children), self.next_id())
 
     def collection_literal(self, node):
         children = node.children
-        if len(children) > 0:
-            node.meta.line = get_line(children[0])
         return TreeWithUnit(node, CollectionLiteral(children), self.next_id())
 
     def for_statement(self, node):
         children = node.children
         assert len(children) == 3
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, ForStatement(*children), self.next_id())
 
     def while_statement(self, node):
         children = node.children
         assert len(children) == 2
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, WhileStatement(*children), self.next_id())
 
     def indexing_suffix(self, node):
         children = node.children
-        if len(children) > 0:
-            node.meta.line = get_line(children[0])
         return TreeWithUnit(node, IndexingSuffix(children[0]), self.next_id())
 
     def call_suffix(self, node):
         children = node.children
-        if len(children) > 0:
-            node.meta.line = get_line(children[0])
         return TreeWithUnit(node, CallSuffix(children), self.next_id())
 
     def navigation_suffix(self, node):
         children = node.children
-        if len(children) > 0:
-            node.meta.line = get_line(children[0])
         return TreeWithUnit(node, NavigationSuffix(children[0]), self.next_id())
 
     def assignment(self, node):
         children = node.children
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, Assignment(*children), self.next_id())
 
     def type(self, node):
         children = node.children
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, Type(children), self.next_id())
 
     def break_statement(self, node):
-        children = node.children
-        node.meta.line = get_line(children[0])
         return TreeWithUnit(node, BreakStatement(), self.next_id())
@@ -0,0 +1,57 @@
+from typing import Iterator, Optional, List, TypeVar, Generic
+
+T = TypeVar('T')
+
+DEFAULT_CAPACITY = 16
+
+
+class LookaheadOverflowException(Exception):
+    pass
+
+
+class LookaheadBuffer(Generic[T]):
+    """
+    Fixed-capacity ring buffer of the items read ahead from the iterator. Unlike queue.SimpleQueue it isn't
+    synchronized, the buffer is meant to be used by a single consumer
+    """
+
+    def __init__(self, items: Iterator[T], capacity: int = DEFAULT_CAPACITY):
+        """
+        :param items: iterator of the items, None can't be an item because it marks the end of the items
+        :param capacity: max amount of the items that can be read ahead
+        """
+        self.items = items
+        self.capacity = capacity
+        self.ring: List[Optional[T]] = [None] * capacity
+        self.head = 0
+        self.size = 0
+
+    def peek(self, k: int = 0) -> Optional[T]:
+        """
+        Look at the item without consuming it
+        :param k: 0 for the next item, 1 for the item after it and so on
+        :return: the item or None if there are not enough items
+        """
+        if k >= self.size:
+            if k >= self.capacity:
+                raise LookaheadOverflowException(f"Can't look {k + 1} items ahead, capacity is: {self.capacity}")
+            while self.size <= k:
+                item = next(self.items, None)
+                if item is None:
+                    return None
+                self.ring[(self.head + self.size) % self.capacity] = item
+                self.size += 1
+        return self.ring[(self.head + k) % self.capacity]
+
+    def next(self) -> Optional[T]:
+        """
+        Consume the next item
+        :return: the item or None if there are no more items
+        """
+        if self.size == 0:
+            return next(self.items, None)
+        item = self.ring[self.head]
+        self.ring[self.head] = None
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        return item
@@ -0,0 +1,73 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from interpreter.compact_nodes import to_compact
+from interpreter.interpretation import Interpreter
+from interpreter.language_units import *
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.semantic_analyzer import SemanticAnalyzer, TypeMismatchException
+
+
+@pytest.fixture(scope="module")
+def parser():
+    with open(Path(os.getenv('PROJECT_ROOT')) / 'grammar.txt') as f:
+        return RecursiveDescentParser(CompiledScanner(f.read()), build_units=True)
+
+
+def parse(parser, snippet: str) -> TreeWithUnit:
+    with io.StringIO(snippet) as f:
+        return parser.parse(f)
+
+
+@pytest.mark.parametrize("file_name", ["recursive_fibo.txt", "simple_recursion.txt",
+                                       "test_file_1.txt", "test_file_2.txt"])
+def test_compact_nodes_keep_the_units(parser, file_name: str):
+    with open(Path(os.getenv('PROJECT_ROOT')) / "test files" / file_name) as f:
+        tree = parse(parser, f.read())
+    compact = to_compact(tree)
+
+    def line(node):
+        line_ = getattr(node.meta, 'line', None)
+        return UNKNOWN_LINE if line_ is None else line_
+
+    expected = sorted((it.identifier, it.data, line(it), str(it.unit))
+                      for it in tree.iter_subtrees() if isinstance(it, TreeWithUnit))
+    actual = sorted((it.identifier, it.data, it.line, str(it)) for it in compact.iter_subtrees())
+    assert actual == expected
+    for node in compact.iter_subtrees():
+        assert not hasattr(node, '__dict__')
+        assert node.unit is node
+
+
+def test_compact_nodes_are_analyzed_and_interpreted(parser):
+    snippet = """
+    fib(n int) int {
+        ret if n < 2 { ret n } else { ret fib(n - 1) + fib(n - 2) }
+    }
+
+    main() None {
+        var numbers IntList = [100]
+        for i in range(8) {
+            append(fib(i), numbers)
+        }
+        let is_big bool = numbers[7] > 5
+        test_print(str(numbers))
+        test_print(str(is_big))
+    }"""
+    compact = to_compact(parse(parser, snippet))
+    SemanticAnalyzer().analyze(compact)
+    outputs = Interpreter(is_test=True).interpret(compact)
+    assert outputs == ["[100, 0, 1, 1, 2, 3, 5, 8, 13]", "True"]
+
+
+def test_type_mismatch_is_reported_with_the_line(parser):
+    snippet = """
+    main() None {
+        let a int = "Hello"
+    }"""
+    with pytest.raises(TypeMismatchException, match="line: 3"):
+        SemanticAnalyzer().analyze(to_compact(parse(parser, snippet)))
@@ -0,0 +1,214 @@
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.scanner import Scanner, CandidatesNotFoundException, AmbiguousMatchException
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+@pytest.fixture
+def root() -> Path:
+    return Path(os.getenv('PROJECT_ROOT'))
+
+
+def scan(scanner, s: str):
+    with io.StringIO(s) as f:
+        return [(token.type, token.value, token.line, token.column) for token in scanner.iter_tokens(f)]
+
+
+@pytest.mark.parametrize("file_name", ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"])
+def test_same_tokens_as_scanner(grammar: str, root: Path, file_name: str):
+    with open(root / "test files" / file_name) as f:
+        s = f.read()
+    assert scan(CompiledScanner(grammar), s) == scan(Scanner(grammar), s)
+
+
+def test_same_layout_tokens_as_scanner(grammar: str):
+    s = """# comment
+main() None {
+    let a bool = b or 5 != 7 and 8 % 6 == 15  # another comment
+    ret "hello
+world"
+}
+"""
+    assert scan(CompiledScanner(grammar, ignore_ws=False, ignore_comments=False), s) == \
+           scan(Scanner(grammar, ignore_ws=False, ignore_comments=False), s)
+
+
+def test_keywords_and_names(grammar: str):
+    s = 'if ifx in int ret return true trueValue'
+    types = [it[0] for it in scan(CompiledScanner(grammar), s)]
+    assert types == ['IF', 'NAME', 'IN', 'NAME', 'RETURN', 'NAME', 'BOOLEAN', 'NAME']
+
+
+def test_longest_operator(grammar: str):
+    s = 'a == b = c != !d <= e'
+    values = [it[1] for it in scan(CompiledScanner(grammar), s)]
+    assert values == ['a', '==', 'b', '=', 'c', '!=', '!', 'd', '<=', 'e']
+
+
+def test_float_with_exponent(grammar: str):
+    tokens = scan(CompiledScanner(grammar), '1e5 .5 1.5e-3')
+    assert [(it[0], it[1]) for it in tokens] == [('FLOAT_NUMBER', '1e5'),
+                                                 ('FLOAT_NUMBER', '.5'),
+                                                 ('FLOAT_NUMBER', '1.5e-3')]
+
+
+def test_offsets(grammar: str):
+    s = 'let a int = 5'
+    with io.StringIO(s) as f:
+        for token in CompiledScanner(grammar).iter_tokens(f):
+            assert s[token.pos_in_stream:token.end_pos] == token.value
+
+
+def test_long_name(grammar: str):
+    with pytest.raises(Exception):
+        scan(CompiledScanner(grammar), 'x' * 260)
+
+
+def test_unsupported_chars(grammar: str):
+    with pytest.raises(CandidatesNotFoundException):
+        scan(CompiledScanner(grammar), 'a = $$$')
+
+
+def test_ambiguous_grammar():
+    gr = 'TERMINAL: "kk"\n' \
+         'ANOTHER: /k.*/'
+    with pytest.raises(AmbiguousMatchException):
+        scan(CompiledScanner(gr), 'kk')
+
+
+def test_large_file(grammar: str, tmp_path: Path):
+    lines_count = 20 * sys.getrecursionlimit()
+    path = tmp_path / "large.txt"
+    with open(path, 'w') as f:
+        for ind in range(lines_count):
+            f.write(f"    total = total + item_{ind} * 2 # comment\n")
+
+    with open(path) as f:
+        tokens_count = 0
+        for token in CompiledScanner(grammar).iter_tokens(f):
+            tokens_count += 1
+        assert tokens_count == lines_count * 8
+        assert token.line == lines_count + 1
+
+
+def scan_buffer(scanner, buffer):
+    return [(token.type, token.value, token.line, token.column) for token in scanner.iter_buffer_tokens(buffer)]
+
+
+@pytest.mark.parametrize("file_name", ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"])
+def test_same_tokens_from_buffer(grammar: str, root: Path, file_name: str):
+    with open(root / "test files" / file_name) as f:
+        s = f.read()
+    scanner = CompiledScanner(grammar)
+    assert scan_buffer(scanner, s.encode('utf-8')) == scan(scanner, s)
+
+
+def test_non_ascii_buffer(grammar: str):
+    s = 'main() None {\n    print("zażółć \\n gęślą") # jaźń\n    print(a)\n}'
+    scanner = CompiledScanner(grammar, ignore_comments=False)
+    assert scan_buffer(scanner, s.encode('utf-8')) == scan(scanner, s)
+
+
+def test_buffer_offsets(grammar: str):
+    buffer = 'let a str = "ąę"\nb'.encode('utf-8')
+    for token in CompiledScanner(grammar).iter_buffer_tokens(buffer):
+        assert buffer[token.pos_in_stream:token.end_pos].decode('utf-8') == token.value
+        assert token.to_token().pos_in_stream == token.pos_in_stream
+
+
+def test_buffer_unsupported_chars(grammar: str):
+    with pytest.raises(CandidatesNotFoundException):
+        list(CompiledScanner(grammar).iter_buffer_tokens('a = ą'.encode('utf-8')))
+
+
+def test_memory_mapped_file(grammar: str, root: Path, tmp_path: Path):
+    with open(root / "test files" / "test_file_1.txt") as f:
+        s = f.read()
+    scanner = CompiledScanner(grammar)
+    with open(root / "test files" / "test_file_1.txt", 'rb') as f:
+        tokens = [(token.type, token.value, token.line, token.column) for token in scanner.iter_tokens(f)]
+    assert tokens == scan(scanner, s)
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b'')
+    with open(empty, 'rb') as f:
+        assert list(scanner.iter_tokens(f)) == []
+
+
+def test_long_string_and_comment(grammar: str):
+    data = 'ą' * 10_000
+    s = f'let data str = "{data}\n{data}" # {data}\nb'
+    scanner = CompiledScanner(grammar, ignore_comments=False)
+    assert scan(scanner, s) == scan(Scanner(grammar, ignore_comments=False), s)
+    assert scan_buffer(scanner, s.encode('utf-8')) == scan(scanner, s)
+
+
+def describe(tokens):
+    return [(t.type, t.value, t.line, t.column, t.pos_in_stream, t.end_pos) for t in tokens]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 64, 4096])
+def test_same_tokens_from_stream(grammar: str, root: Path, chunk_size: int):
+    with open(root / "test files" / "test_file_1.txt") as f:
+        s = f.read()
+    s += f'\nlet long str = "{"x" * 1000}" # ąę {"y" * 1000}\niffy = ret'
+    scanner = CompiledScanner(grammar)
+    expected = describe(scanner.iter_text_tokens(s))
+    with io.StringIO(s) as f:
+        assert describe(scanner.iter_stream_tokens(f, chunk_size)) == expected
+    with io.BytesIO(s.encode('utf-8')) as f:
+        assert describe(scanner.iter_stream_tokens(f, chunk_size)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 48, 96, 97, 4096])
+def test_long_tokens_from_stream(grammar: str, chunk_size: int):
+    # Tokens end close to the window end, so the terminals need the lookahead after the end of the token
+    s = "a = 12345678901234567890." + "1" * 70 + "e+5 b\n" + \
+        f'c = "{"x" * 100}" {"n" * 150}if {"d" * 63}.{"1" * 90}'
+    scanner = CompiledScanner(grammar)
+    expected = describe(scanner.iter_text_tokens(s))
+    assert expected[2][0] == "FLOAT_NUMBER"
+    with io.StringIO(s) as f:
+        assert describe(scanner.iter_stream_tokens(f, chunk_size)) == expected
+
+
+def test_same_tokens_from_memory_mapped_file(grammar: str, root: Path, tmp_path: Path):
+    with open(root / "test files" / "test_file_1.txt") as f:
+        s = f.read()
+    s += '\nlet a str = "ab" # comment\n\n    b = a\n'
+    path = tmp_path / "snippet.txt"
+    path.write_bytes(s.encode('utf-8'))
+    scanner = CompiledScanner(grammar, ignore_comments=False)
+    with open(path, 'rb') as f:
+        tokens = list(scanner.iter_tokens(f))
+    expected = list(scanner.iter_text_tokens(s))
+    assert describe(tokens) == describe(expected)
+    assert [(t.channel, t.preceded_by_newline) for t in tokens] == [(t.channel, t.preceded_by_newline) for t in expected]
+
+
+def test_pipe(grammar: str):
+    s = 'main() None {\n    print("zażółć")\n}\n'
+    read_fd, write_fd = os.pipe()
+    with open(write_fd, 'wb') as f:
+        f.write(s.encode('utf-8'))
+    scanner = CompiledScanner(grammar)
+    with open(read_fd, 'rb') as f:
+        tokens = [(token.type, token.value, token.line, token.column) for token in scanner.iter_tokens(f)]
+    assert tokens == scan(scanner, s)
+
+
+def test_stream_ends_inside_char(grammar: str):
+    with io.BytesIO('"ą"'.encode('utf-8')[:-2]) as f:
+        with pytest.raises(UnicodeDecodeError):
+            list(CompiledScanner(grammar).iter_stream_tokens(f))
@@ -0,0 +1,80 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from interpreter.compact_nodes import to_compact
+from interpreter.flat_ast import to_flat, FlatCursor, LITERAL_KIND
+from interpreter.interpretation import Interpreter
+from interpreter.language_units import *
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.semantic_analyzer import SemanticAnalyzer, TypeMismatchException
+
+
+@pytest.fixture(scope="module")
+def parser():
+    with open(Path(os.getenv('PROJECT_ROOT')) / 'grammar.txt') as f:
+        return RecursiveDescentParser(CompiledScanner(f.read()), build_units=True)
+
+
+def parse(parser, snippet: str) -> TreeWithUnit:
+    with io.StringIO(snippet) as f:
+        return parser.parse(f)
+
+
+@pytest.mark.parametrize("file_name", ["recursive_fibo.txt", "simple_recursion.txt",
+                                       "test_file_1.txt", "test_file_2.txt"])
+def test_flat_ast_round_trip(parser, file_name: str):
+    with open(Path(os.getenv('PROJECT_ROOT')) / "test files" / file_name) as f:
+        tree = parse(parser, f.read())
+    compact = to_compact(tree)
+    ast = to_flat(tree)
+    assert ast.to_nodes() == compact
+    assert to_flat(compact).kinds == ast.kinds
+    assert str(ast.root) == str(compact)
+    assert [(it.identifier, it.data, it.line) for it in ast.root.iter_subtrees()] == \
+           [(it.identifier, it.data, it.line) for it in compact.iter_subtrees()]
+
+
+def test_literals_are_pooled(parser):
+    ast = to_flat(parse(parser, """
+    main() None {
+        let a bool = true
+        let b int = 1
+        let c int = 1
+    }"""))
+    literals = [ast.value(row) for row in range(len(ast)) if ast.kinds[row] == LITERAL_KIND]
+    literals.sort(key=lambda it: it.line)
+    assert [(it.value, it.line) for it in literals] == [(True, 3), (1, 4), (1, 5)]
+    assert type(literals[0].value) is bool
+    assert len([it for it in ast.pool if it == 1]) == 2
+
+
+def test_cursors_are_analyzed_and_interpreted(parser):
+    snippet = """
+    fib(n int) int {
+        ret if n < 2 { ret n } else { ret fib(n - 1) + fib(n - 2) }
+    }
+
+    main() None {
+        var numbers IntList = [100]
+        for i in range(8) {
+            append(fib(i), numbers)
+        }
+        test_print(str(numbers))
+    }"""
+    root = to_flat(parse(parser, snippet)).root
+    assert isinstance(root, FlatCursor) and isinstance(root, Start)
+    SemanticAnalyzer().analyze(root)
+    assert Interpreter(is_test=True).interpret(root) == ["[100, 0, 1, 1, 2, 3, 5, 8, 13]"]
+
+
+def test_type_mismatch_is_reported_with_the_line(parser):
+    snippet = """
+    main() None {
+        let a int = "Hello"
+    }"""
+    with pytest.raises(TypeMismatchException, match="line: 3"):
+        SemanticAnalyzer().analyze(to_flat(parse(parser, snippet)).root)
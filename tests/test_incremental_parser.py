@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from interpreter.language_units import TreeWithUnit
+from interpreter.parser.incremental import IncrementalParser
+from interpreter.parser.parser import RecursiveDescentParser, PrimaryExpressionException
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from tests.test_tree_transformer import describe
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+@pytest.fixture
+def program(grammar) -> str:
+    root = Path(os.getenv('PROJECT_ROOT'))
+    texts = []
+    for file_name in ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"]:
+        with open(root / "test files" / file_name) as f:
+            texts.append(f.read())
+    return '\n# "{"\n'.join(texts) + '\n# }'
+
+
+def without_identifiers(description):
+    if isinstance(description, tuple) and len(description) == 5:
+        data, _, line, unit, children = description
+        return data, line, unit, [without_identifiers(child) for child in children]
+    return description
+
+
+def identifiers(tree):
+    return [node.identifier for node in tree.iter_subtrees_topdown() if isinstance(node, TreeWithUnit)]
+
+
+def test_first_parse_is_the_same_as_the_full_parse(grammar: str, program: str):
+    parsed = RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse_text(program)
+    assert describe(IncrementalParser(grammar).parse(program)) == describe(parsed)
+
+
+@pytest.mark.parametrize("old, new", [
+    ("ret n\n    } else {", "ret n + 1\n    } else {"),
+    ("ret n\n    } else {", "ret n\n\n\n    } else {"),
+    ("recur_fibo(n int) int {", "added() int { ret 1 }\nrecur_fibo(n int) int {"),
+    ('print("Fibonacci sequence:")', 'print("Fibonacci {sequence:")'),
+])
+def test_changed_declarations_are_parsed(grammar: str, program: str, old: str, new: str):
+    parser = IncrementalParser(grammar)
+    first = parser.parse(program)
+    first_declarations = [(node.unit.name, node.identifier, identifiers(node)) for node in first.children]
+    edited = program.replace(old, new, 1)
+    tree = parser.parse(edited)
+
+    parsed = RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse_text(edited)
+    assert without_identifiers(describe(tree)) == without_identifiers(describe(parsed))
+    assert len(set(identifiers(tree))) == len(identifiers(tree))
+    assert parser.parsed_declarations_count <= 2
+    # Declarations which aren't changed keep their identifiers
+    kept = [(node.unit.name, node.identifier, identifiers(node)) for node in tree.children]
+    assert len([it for it in kept if it in first_declarations]) >= len(first.children) - 1
+
+
+def test_brace_edit_parses_the_following_declarations(grammar: str, program: str):
+    parser = IncrementalParser(grammar)
+    parser.parse(program)
+    # Declarations after the edit are a part of the opened block
+    with pytest.raises(PrimaryExpressionException):
+        parser.parse(program.replace("ret n\n", "ret n {\n", 1))
+    # Failed parse doesn't change the kept declarations
+    edited = program.replace("ret n\n", "ret n + 2\n", 1)
+    parsed = RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse_text(edited)
+    assert without_identifiers(describe(parser.parse(edited))) == without_identifiers(describe(parsed))
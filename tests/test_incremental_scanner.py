@@ -0,0 +1,92 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.incremental import relex, TextEdit
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+@pytest.fixture
+def snippet(root: Path) -> str:
+    with open(root / "test files" / "test_file_1.txt") as f:
+        return f.read()
+
+
+@pytest.fixture
+def root() -> Path:
+    return Path(os.getenv('PROJECT_ROOT'))
+
+
+def describe(tokens):
+    return [(t.type, t.value, t.line, t.column, t.pos_in_stream, t.end_pos, t.preceded_by_newline) for t in tokens]
+
+
+class CountingScanner(CompiledScanner):
+    def __init__(self, grammar):
+        super().__init__(grammar)
+        self.scanned = 0
+
+    def iter_text_tokens(self, text, pos=0, line=1, column=0, preceded_by_newline=False):
+        for token in super().iter_text_tokens(text, pos, line, column, preceded_by_newline):
+            self.scanned += 1
+            yield token
+
+
+@pytest.mark.parametrize("edit", [
+    TextEdit(0, 0, "# new comment\n"),
+    TextEdit(10, 3, ""),
+    TextEdit(60, 0, "x"),
+    TextEdit(60, 0, "\n\n"),
+    TextEdit(100, 1, '"unterminated'),
+    TextEdit(120, 20, "a == b"),
+    TextEdit(0, 0, "\n"),
+])
+def test_same_tokens_as_full_scan(grammar: str, snippet: str, edit: TextEdit):
+    scanner = CompiledScanner(grammar)
+    text, tokens = relex(scanner, snippet, list(scanner.iter_text_tokens(snippet)), edit)
+    assert text == edit.apply(snippet)
+    assert describe(tokens) == describe(scanner.iter_text_tokens(text))
+
+
+def test_merge_with_previous_token(grammar: str):
+    scanner = CompiledScanner(grammar)
+    snippet = 'a = b'
+    text, tokens = relex(scanner, snippet, list(scanner.iter_text_tokens(snippet)), TextEdit(3, 0, '='))
+    assert [t.value for t in tokens] == ['a', '==', 'b']
+
+
+def test_removed_new_line(grammar: str):
+    scanner = CompiledScanner(grammar)
+    snippet = 'a \n\nb c'
+    text, tokens = relex(scanner, snippet, list(scanner.iter_text_tokens(snippet)), TextEdit(2, 2, ''))
+    assert describe(tokens) == describe(scanner.iter_text_tokens(text))
+    assert not tokens[-2].preceded_by_newline
+
+
+def test_relexing_cost_depends_on_edit(grammar: str, snippet: str):
+    scanner = CountingScanner(grammar)
+    large = snippet * 100
+    tokens = list(scanner.iter_text_tokens(large))
+    scanner.scanned = 0
+    offset = len(large) // 2
+    edit = TextEdit(offset, 0, " ")
+    text, new_tokens = relex(scanner, large, tokens, edit)
+    assert scanner.scanned < 10
+    assert describe(new_tokens) == describe(CompiledScanner(grammar).iter_text_tokens(text))
+
+
+def test_tokens_are_reused(grammar: str, snippet: str):
+    scanner = CompiledScanner(grammar)
+    tokens = list(scanner.iter_text_tokens(snippet))
+    offset = snippet.index('[1, 2, 3]') + 1
+    text, new_tokens = relex(scanner, snippet, tokens, TextEdit(offset, 1, '7'))
+    assert '[7, 2, 3]' in text
+    assert new_tokens[0] is tokens[0]
+    assert new_tokens[-1] is tokens[-1]
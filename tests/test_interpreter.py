@@ -6,7 +6,9 @@ import pytest
 
 from interpreter.interpretation import Interpreter
 from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
 from interpreter.scanner.scanner import Scanner
+from interpreter.semantic_analyzer import SemanticAnalyzer
 from interpreter.tree_transformer import TreeTransformer
 
 
@@ -414,3 +416,12 @@ main() None {
            """
     outputs = interpret(snippet, grammar)
     assert outputs[0] == 'else'
+
+
+def test_lazy_bodies(grammar: str, root: Path):
+    with open(root / "test files" / "recursive_fibo.txt") as f:
+        snippet = f.read().replace("print(", "test_print(")
+    eager = interpret(snippet, grammar)
+    tree = RecursiveDescentParser(CompiledScanner(grammar), build_units=True, lazy_bodies=True).parse_text(snippet)
+    SemanticAnalyzer().analyze(tree)
+    assert Interpreter(is_test=True).interpret(tree) == eager
@@ -0,0 +1,62 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from interpreter.parser.parse_tables import build_parse_tables, load_parse_tables, cache_file_path, END
+from interpreter.parser.parser import RecursiveDescentParser, PrimaryExpressionException, GrammarConflictException
+from interpreter.scanner.compiled_scanner import CompiledScanner
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+def test_first_and_follow_sets(grammar: str):
+    tables = build_parse_tables(grammar)
+    assert tables.first["prefix_operator"] == ["ADDITIVE_OPERATOR", "NEGATION"]
+    assert tables.first["postfix_unary_suffix"] == ["DOT", "LEFT_PAREN", "LEFT_SQR_BR"]
+    assert "RIGHT_CURLY_BR" in tables.follow["statement"]
+    assert tables.follow["start"] == [END]
+
+
+def test_productions_are_predicted_by_one_token(grammar: str):
+    tables = build_parse_tables(grammar)
+    # Alternatives of the inline jump_statement are predicted directly
+    assert tables.predictions["statement"]["RETURN"] == "return_statement"
+    assert tables.predictions["statement"]["LET"] == "assignment"
+    assert tables.predictions["statement"]["NEGATION"] == "expression"
+    assert tables.predictions["primary_expression"]["FLOAT_NUMBER"] == "FLOAT_NUMBER"
+    assert tables.predictions["primary_expression"]["LEFT_SQR_BR"] == "collection_literal"
+    assert tables.conflicts["statement"] == {"NAME": ["assignment", "expression"]}
+    assert "NAME" not in tables.predictions["statement"]
+
+
+def test_tables_are_cached(grammar: str, tmp_path: Path):
+    tables = load_parse_tables(grammar, tmp_path)
+    assert cache_file_path(grammar, tmp_path).exists()
+    assert load_parse_tables(grammar, tmp_path) == tables
+    changed = grammar.replace("simple_literal: STRING | BOOLEAN | DEC_NUMBER | FLOAT_NUMBER",
+                              "simple_literal: STRING | BOOLEAN | DEC_NUMBER")
+    assert "FLOAT_NUMBER" not in load_parse_tables(changed, tmp_path).predictions["primary_expression"]
+
+
+def test_parser_follows_grammar_changes(grammar: str):
+    snippet = "main() None { ret 1.5 }"
+    with io.StringIO(snippet) as f:
+        RecursiveDescentParser(CompiledScanner(grammar)).parse(f)
+    changed = grammar.replace("simple_literal: STRING | BOOLEAN | DEC_NUMBER | FLOAT_NUMBER",
+                              "simple_literal: STRING | BOOLEAN | DEC_NUMBER")
+    with io.StringIO(snippet) as f:
+        with pytest.raises(PrimaryExpressionException):
+            RecursiveDescentParser(CompiledScanner(changed)).parse(f)
+
+
+def test_conflicts_are_reported(grammar: str):
+    changed = grammar.replace("  | NAME\n", "  | NAME\n  | NAME navigation_suffix\n")
+    assert build_parse_tables(changed).conflicts["primary_expression"] == {"NAME": ["NAME", "primary_expression[2]"]}
+    with pytest.raises(GrammarConflictException):
+        RecursiveDescentParser(CompiledScanner(changed))
@@ -5,7 +5,11 @@ from pathlib import Path
 import pytest
 from lark import Tree, Token
 
+from interpreter.parser.lalr_backend import LalrParser
 from interpreter.parser.parser import RecursiveDescentParser, UnexpectedToken, PrimaryExpressionException
+from interpreter.parser.stack_parser import ExplicitStackParser
+from interpreter.scanner.blocks import UnmatchedBraceException
+from interpreter.scanner.compiled_scanner import CompiledScanner
 from interpreter.scanner.scanner import Scanner
 from tests.utilities import compare_trees
 
@@ -767,3 +771,155 @@ def test_while_with_break(parser: RecursiveDescentParser):
     with io.StringIO(snippet) as f:
         res, msg = compare_trees(expected, parser.parse(f))
         assert res, msg
+
+
+EXPRESSION_SNIPPETS = [
+    "main() None { let a bool = b or c and d == e + f * -g < h % i or j }",
+    "main() None { x = a - b + c - (d or e) * f[g + 1].h(i, j and k) }",
+    "main() None { ret !a >= b > c and [1, 2 * 3] != if a { ret b } else { ret c } }",
+]
+
+
+@pytest.mark.parametrize("snippet", EXPRESSION_SNIPPETS)
+def test_precedence_climbing_builds_same_trees(snippet: str):
+    with open(Path(os.getenv('PROJECT_ROOT')) / 'grammar.txt') as f:
+        grammar = f.read()
+    trees = []
+    for precedence_climbing in (True, False):
+        with io.StringIO(snippet) as f:
+            trees.append(RecursiveDescentParser(Scanner(grammar), precedence_climbing=precedence_climbing).parse(f))
+    assert trees[0] == trees[1]
+
+
+def test_operators_are_kept_after_grammar_change(parser: RecursiveDescentParser):
+    grammar = parser.scanner.grammar.replace('MULTIPLICATIVE_OPERATOR: "*" | "/" | "%"', 'MULTIPLICATIVE_OPERATOR: "*"')
+    with io.StringIO("main() None { ret a * b or c }") as f:
+        tree = RecursiveDescentParser(Scanner(grammar)).parse(f)
+    disjunction = next(tree.find_data("disjunction"))
+    # "or" isn't put into the tree
+    assert len(disjunction.children) == 2
+    assert next(tree.find_data("multiplicative_expression")).children[1] == Token("MULTIPLICATIVE_OPERATOR", "*")
+
+
+def test_single_equality_operator(parser: RecursiveDescentParser):
+    with io.StringIO("main() None { ret a == b == c }") as f:
+        with pytest.raises(PrimaryExpressionException):
+            parser.parse(f)
+
+
+@pytest.mark.parametrize("snippet", EXPRESSION_SNIPPETS + [
+    "main() None {\n var i int = 0\n while i < 3 { for x in [i] { if x { break } elif !x { ret\n } } }\n ret\n}",
+    "f(a int, b List) int { ret a } main() None { x = f(1, [])[0].b + (if a { 1 } elif b { 2 } else { 3 }) }",
+])
+def test_explicit_stack_parser_builds_same_trees(parser: RecursiveDescentParser, snippet: str):
+    with io.StringIO(snippet) as f:
+        expected = parser.parse(f)
+    with io.StringIO(snippet) as f:
+        res, msg = compare_trees(expected, ExplicitStackParser(parser.scanner).parse(f))
+        assert res, msg
+
+
+@pytest.mark.parametrize("snippet, exception", [
+    ("main() None { ret (a + [b, c) }", UnexpectedToken),
+    ("main() int { ret 1 +", PrimaryExpressionException),
+    ("main() None { let = 1 }", UnexpectedToken),
+])
+def test_explicit_stack_parser_reports_same_errors(parser: RecursiveDescentParser, snippet: str, exception):
+    messages = []
+    for parser_ in (parser, ExplicitStackParser(parser.scanner)):
+        with io.StringIO(snippet) as f:
+            with pytest.raises(exception) as info:
+                parser_.parse(f)
+        messages.append(str(info.value))
+    assert messages[0] == messages[1]
+
+
+def test_deeply_nested_expression(parser: RecursiveDescentParser):
+    depth = 100_000
+    snippet = "main() None { ret " + "(" * depth + "1" + ")" * depth + " }"
+    with io.StringIO(snippet) as f:
+        with pytest.raises(RecursionError):
+            parser.parse(f)
+    # Compiled scanner keeps the test fast
+    with io.StringIO(snippet) as f:
+        node = ExplicitStackParser(CompiledScanner(parser.scanner.grammar)).parse(f).children[0].children[3].children[0].children[0]
+    nested_count = 0
+    while isinstance(node, Tree):
+        assert node.data == 'parenthesized_expression'
+        node = node.children[0]
+        nested_count += 1
+    assert nested_count == depth
+    assert node == Token('DEC_NUMBER', '1')
+
+
+def test_lazy_bodies_are_parsed_on_first_use(parser: RecursiveDescentParser):
+    snippet = 'first() None {\n    print("}{") # }\n    ret if a { 1 } else { 2 }\n}\r\n\r\nsecond(a int) int { ret a }'
+    scanner = CompiledScanner(parser.scanner.grammar)
+    eager = RecursiveDescentParser(scanner, build_units=True).parse_text(snippet)
+    lazy = RecursiveDescentParser(scanner, build_units=True, lazy_bodies=True).parse_text(snippet)
+    assert [node.unit.is_loaded for node in lazy.children] == [False, False]
+    assert not any(hasattr(node.unit, '__dict__') for node in lazy.children)
+    for eager_node, lazy_node in zip(eager.children, lazy.children):
+        assert lazy_node.unit.name == eager_node.unit.name
+        assert lazy_node.meta.line == eager_node.meta.line
+        lazy_block, eager_block = lazy_node.unit.statements_block, eager_node.unit.statements_block
+        assert str(lazy_block.unit) == str(eager_block.unit)
+        assert [x.meta.line for x in lazy_block.iter_subtrees()] == [x.meta.line for x in eager_block.iter_subtrees()]
+    assert lazy.children[1].unit.statements_block.identifier > lazy.identifier
+
+
+def test_lazy_body_without_closing_brace(parser: RecursiveDescentParser):
+    lazy_parser = RecursiveDescentParser(CompiledScanner(parser.scanner.grammar), build_units=True, lazy_bodies=True)
+    with pytest.raises(UnmatchedBraceException):
+        lazy_parser.parse_text("main() None { ret \"}\" ")
+
+
+def test_function_declarations_are_streamed(parser: RecursiveDescentParser):
+    snippet = "first() None { ret 1 }\nsecond(a int) int {\n ret a\n}\nmain() None { second(1) }"
+    scanner = CompiledScanner(parser.scanner.grammar)
+    read_tokens = []
+
+    def iter_tokens():
+        for token in scanner.iter_text_tokens(snippet):
+            read_tokens.append(token)
+            yield token
+
+    streamed = RecursiveDescentParser(scanner, build_units=True).iter_token_function_declarations(iter_tokens())
+    first = next(streamed)
+    assert first.unit.name == 'first'
+    # Tokens of the next declarations aren't read yet
+    assert read_tokens[-1].type == 'RIGHT_CURLY_BR' and read_tokens[-1].line == 1
+    rest = list(streamed)
+    parsed = RecursiveDescentParser(scanner, build_units=True).parse_text(snippet)
+    assert [first] + rest == parsed.children
+    assert [node.identifier for node in [first] + rest] == [node.identifier for node in parsed.children]
+
+
+def test_explicit_stack_parser_streams_function_declarations(parser: RecursiveDescentParser):
+    snippet = "first() None { ret (1) }\nmain() None { first() }"
+    with io.StringIO(snippet) as f:
+        expected = parser.parse(f).children
+    with io.StringIO(snippet) as f:
+        assert list(ExplicitStackParser(parser.scanner).iter_function_declarations(f)) == expected
+
+
+@pytest.mark.parametrize("snippet", EXPRESSION_SNIPPETS + [
+    "main() None {\n var i int = 0\n while i < 3 { for x in [i] { if x { break } elif !x { ret\n } } }\n ret # end\n}",
+    "f(a int, b List) int { ret a } main() None { x = f(1, [])[0].b + (if a <= 1 { 1 } elif b { 2 } else { 3 }) }",
+    "main() None { ret\n x = retry\n y = \"ret\" }",
+])
+def test_lalr_backend_builds_same_trees(parser: RecursiveDescentParser, snippet: str):
+    with io.StringIO(snippet) as f:
+        expected = parser.parse(f)
+    res, msg = compare_trees(expected, LalrParser(parser.scanner.grammar).parse_text(snippet))
+    assert res, msg
+
+
+def test_lalr_backend_is_cached(parser: RecursiveDescentParser, tmp_path: Path):
+    assert not LalrParser(parser.scanner.grammar, cache_dir=tmp_path).loaded_from_cache
+    cached = LalrParser(parser.scanner.grammar, cache_dir=tmp_path)
+    assert cached.loaded_from_cache
+    with io.StringIO(EXPRESSION_SNIPPETS[0]) as f:
+        assert cached.parse_text(EXPRESSION_SNIPPETS[0]) == parser.parse(f)
+    changed = parser.scanner.grammar.replace('BREAK: "break"', 'BREAK: "stop"')
+    assert not LalrParser(changed, cache_dir=tmp_path).loaded_from_cache
@@ -1,5 +1,6 @@
 import io
 import os
+import sys
 from pathlib import Path
 from typing import Optional
 
@@ -150,3 +151,47 @@ def test_name(grammar: str):
             expected = next(iterator)
             assert token.type == expected.type
             assert token.value == expected.value
+
+
+def test_large_file(grammar: str, tmp_path: Path):
+    # Amount of tokens is much bigger than the recursion limit
+    lines_count = sys.getrecursionlimit()
+    path = tmp_path / "large.txt"
+    with open(path, 'w') as f:
+        for ind in range(lines_count):
+            f.write(f"    total = total + item_{ind} * 2\n")
+
+    with open(path) as f:
+        tokens_count = 0
+        for token in Scanner(grammar).iter_tokens(f):
+            tokens_count += 1
+            if token.type == 'NAME' and token.value.startswith('item_'):
+                assert token.line == int(token.value[len('item_'):]) + 1
+        assert tokens_count == lines_count * 8
+
+
+def test_long_string_and_comment(grammar: str):
+    data = 'x' * 10_000
+    s = f'let data str = "{data}\n{data}" # {data}\nb'
+    with io.StringIO(s) as f:
+        tokens = list(Scanner(grammar, ignore_comments=False).iter_tokens(f))
+    string = find_token(tokens, type_='STRING')
+    assert string.value == f'"{data}\n{data}"'
+    assert (string.line, string.column) == (2, len(data) + 1)
+    assert find_token(tokens, type_='COMMENT').value == '# ' + data
+    assert (tokens[-1].value, tokens[-1].line, tokens[-1].column) == ('b', 3, 1)
+
+
+def test_unterminated_long_string(grammar: str):
+    s = '"' + 'x' * 1000
+    with io.StringIO(s) as f:
+        tokens = list(Scanner(grammar).iter_tokens(f))
+    assert [(t.type, t.value) for t in tokens] == [('STRING', s)]
+
+
+def test_binary_stream(grammar: str):
+    s = 'let a str = "zażółć"\nb'
+    with io.BytesIO(s.encode('utf-8')) as f:
+        from_bytes = [(t.type, t.value, t.line, t.column) for t in Scanner(grammar).iter_tokens(f)]
+    with io.StringIO(s) as f:
+        assert from_bytes == [(t.type, t.value, t.line, t.column) for t in Scanner(grammar).iter_tokens(f)]
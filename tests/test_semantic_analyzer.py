@@ -1,10 +1,13 @@
 import io
 import os
+import pickle
 from pathlib import Path
 
 import pytest
 
+from interpreter.language_units import *
 from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
 from interpreter.scanner.scanner import Scanner
 from interpreter.semantic_analyzer import SemanticAnalyzer, ReassignException, TypeMismatchException
 from interpreter.tree_transformer import TreeTransformer
@@ -85,6 +88,15 @@ def test_if_expression_type_mismatch(grammar: str):
         analyze(snippet, grammar)
 
 
+def test_if_expression_without_return_has_none_type(grammar: str):
+    snippet = r"""
+            main() None {
+              let a bool = true
+              let x None = if a { let z int = 1 }
+            }"""
+    analyze(snippet, grammar)
+
+
 def test_collection_literal(grammar: str):
     snippet = r"""
             main() None {
@@ -110,3 +122,53 @@ def test_empty_collection_initialization(grammar: str):
               let elements List = []
             }"""
     analyze(snippet, grammar)
+
+
+def test_lazy_body_is_analyzed_on_first_use(grammar: str):
+    snippet = r"""
+            unused() None {
+              let a int = "text"
+            }
+            main() None {
+              let b int = 1
+            }"""
+    tree = RecursiveDescentParser(CompiledScanner(grammar), build_units=True, lazy_bodies=True).parse_text(snippet)
+    SemanticAnalyzer().analyze(tree)
+    unused, main = tree.children
+    assert len(main.unit.statements_block.unit.statements) == 1
+    with pytest.raises(TypeMismatchException):
+        _ = unused.unit.statements_block
+    assert not unused.unit.is_loaded
+
+
+def test_equal_types_are_the_same_object():
+    int_list = Type(["IntList"]).as_unit_type
+    assert int_list is IterableType(SimpleType("int"))
+    assert SimpleLiteral(1, 1).type is SimpleType("int")
+    assert Comparison([]).type is Equality([]).type is SimpleType("bool")
+    assert Type(["List"]).as_unit_type is IterableType(UnknownIterableItemType())
+    assert FunctionType([int_list], NONE_TYPE) is FunctionType((int_list,), SimpleType("None"))
+    assert IterableType(int_list) is not int_list
+    assert pickle.loads(pickle.dumps(FunctionType([int_list], NONE_TYPE))) is FunctionType([int_list], NONE_TYPE)
+
+
+def test_nested_types_are_matched_without_formatting(grammar: str):
+    snippet = r"""
+            main() None {
+              let a int = 1
+              let elements IntList = [a + 1, 2]
+              let b bool = elements[0] > a
+            }"""
+    formatted = []
+
+    def str_(self):
+        formatted.append(self)
+        return self.value
+
+    original = SimpleType.__str__
+    SimpleType.__str__ = str_
+    try:
+        analyze(snippet, grammar)
+    finally:
+        SimpleType.__str__ = original
+    assert formatted == []
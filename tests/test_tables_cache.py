@@ -0,0 +1,79 @@
+import io
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.scanner import Scanner, build_terminal_matchers
+from interpreter.scanner.tables_cache import load_terminal_tables, cache_file_path, TABLES_VERSION
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+class CountingBuilder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, grammar: str):
+        self.calls += 1
+        return build_terminal_matchers(grammar)
+
+
+def scan(scanner, s: str):
+    with io.StringIO(s) as f:
+        return [(token.type, token.value, token.line, token.column) for token in scanner.iter_tokens(f)]
+
+
+def test_tables_are_built_once(grammar: str, tmp_path: Path):
+    builder = CountingBuilder()
+    first = load_terminal_tables(grammar, tmp_path, builder)
+    second = load_terminal_tables(grammar, tmp_path, builder)
+    assert builder.calls == 1
+    assert [str(it) for it in first.matchers] == [str(it) for it in second.matchers]
+    assert first.char_to_indices == second.char_to_indices
+
+
+def test_grammar_change_invalidates_cache(grammar: str, tmp_path: Path):
+    builder = CountingBuilder()
+    load_terminal_tables(grammar, tmp_path, builder)
+    changed = grammar.replace('BREAK: "break"', 'BREAK: "stop"')
+    tables = load_terminal_tables(changed, tmp_path, builder)
+    assert builder.calls == 2
+    assert any(it.name == 'BREAK' and 'stop' in str(it) for it in tables.matchers)
+
+
+def test_version_change_invalidates_cache(grammar: str, tmp_path: Path):
+    builder = CountingBuilder()
+    load_terminal_tables(grammar, tmp_path, builder)
+    path = cache_file_path(grammar, tmp_path)
+    with open(path) as f:
+        data = json.load(f)
+    data["version"] = TABLES_VERSION - 1
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    load_terminal_tables(grammar, tmp_path, builder)
+    assert builder.calls == 2
+
+
+def test_broken_cache_is_rebuilt(grammar: str, tmp_path: Path):
+    builder = CountingBuilder()
+    load_terminal_tables(grammar, tmp_path, builder)
+    with open(cache_file_path(grammar, tmp_path), 'w') as f:
+        f.write('{"version": ')
+    load_terminal_tables(grammar, tmp_path, builder)
+    load_terminal_tables(grammar, tmp_path, builder)
+    assert builder.calls == 2
+
+
+def test_cached_scanners_produce_same_tokens(grammar: str, tmp_path: Path):
+    s = 'main() None {\n    let a float = 1.5 + b("str") # comment\n}'
+    expected = scan(Scanner(grammar), s)
+    for _ in range(2):
+        assert scan(Scanner(grammar, cache_dir=tmp_path), s) == expected
+        assert scan(CompiledScanner(grammar, cache_dir=tmp_path), s) == expected
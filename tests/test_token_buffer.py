@@ -0,0 +1,96 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+from lark import Token
+
+from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.parser.stack_parser import ExplicitStackParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.token_buffer import TokenBuffer, UnknownTokenKindException, BufferTokensController
+from interpreter.scanner.tokens import Token as Tk
+from tests.utilities import compare_trees
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+@pytest.fixture
+def snippet() -> str:
+    with open(Path(os.getenv('PROJECT_ROOT')) / "test files" / "test_file_1.txt") as f:
+        return f.read()
+
+
+def describe(tokens):
+    return [(t.type, t.value, t.line, t.column, t.pos_in_stream, t.end_pos) for t in tokens]
+
+
+def test_same_tokens_as_scanner(grammar: str, snippet: str):
+    scanner = CompiledScanner(grammar)
+    buffer = TokenBuffer.scan(scanner, snippet)
+    assert describe(buffer) == describe(scanner.iter_text_tokens(snippet))
+
+
+def test_bytes_source(grammar: str, snippet: str):
+    scanner = CompiledScanner(grammar)
+    buffer = TokenBuffer.scan(scanner, snippet.encode('utf-8'))
+    assert describe(buffer) == describe(scanner.iter_text_tokens(snippet))
+
+
+def test_random_access(grammar: str):
+    buffer = TokenBuffer.scan(CompiledScanner(grammar), 'let a int = 5')
+    assert len(buffer) == 5
+    assert buffer.kind(0) == Tk.LET
+    assert buffer.value(3) == '='
+    assert buffer.token(4).type == 'DEC_NUMBER'
+
+
+def test_unknown_token_kind():
+    scanner = CompiledScanner('CUSTOM: "kk"')
+    with pytest.raises(UnknownTokenKindException):
+        TokenBuffer.scan(scanner, 'kk')
+
+
+def test_parser_consumes_buffer(grammar: str, snippet: str):
+    scanner = CompiledScanner(grammar)
+    parser = RecursiveDescentParser(scanner)
+    with io.StringIO(snippet) as f:
+        expected = parser.parse(f)
+    result, message = compare_trees(expected, parser.parse_tokens(TokenBuffer.scan(scanner, snippet)))
+    assert result, message
+
+
+@pytest.mark.parametrize("parser_class", [RecursiveDescentParser, ExplicitStackParser])
+def test_only_leaves_are_created(grammar: str, snippet: str, parser_class, monkeypatch):
+    scanner = CompiledScanner(grammar)
+    with io.StringIO(snippet) as f:
+        expected = parser_class(scanner).parse(f)
+    created = []
+    create = BufferTokensController.token
+    monkeypatch.setattr(BufferTokensController, "token",
+                        lambda self, position: created.append(position) or create(self, position))
+    tree = parser_class(scanner).parse_tokens(TokenBuffer.scan(scanner, snippet))
+    result, message = compare_trees(expected, tree)
+    assert result, message
+    leaves = [child for node in tree.iter_subtrees() for child in node.children if isinstance(child, Token)]
+    assert len(created) == len(leaves)
+    assert len(created) < len(TokenBuffer.scan(scanner, snippet)) / 2
+
+
+def test_buffer_history(grammar: str):
+    controller = BufferTokensController(history_size=2)
+    controller.reload(TokenBuffer.scan(CompiledScanner(grammar), 'let a int = 5\nret'))
+    assert controller.skip_if(Tk.LET) and not controller.skip_if(Tk.LET)
+    assert controller.peek_type(3) == 'DEC_NUMBER' and controller.peek_matches(Tk.RETURN, 4)
+    assert controller.next().value == 'a'
+    controller.skip()
+    controller.skip()
+    assert controller.next_on_same_line()
+    controller.skip()
+    assert not controller.next_on_same_line() and controller.next().preceded_by_newline
+    assert controller.peek() is None and controller.peek_type() is None
+    assert [token.value for token in controller.cached_tokens] == ['5', 'ret']
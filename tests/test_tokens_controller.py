@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+
+import pytest
+from lark import Token
+
+from interpreter.scanner.compiled_scanner import CompiledScanner
+from interpreter.scanner.tokens import Token as Tk
+from interpreter.scanner.tokens_controller import TokensController
+from interpreter.utils.lookahead_buffer import LookaheadBuffer, LookaheadOverflowException
+
+
+@pytest.fixture
+def grammar():
+    with open(Path(os.getenv('PROJECT_ROOT')) / "grammar.txt") as f:
+        return f.read()
+
+
+def make_tokens(types):
+    # noinspection PyArgumentList
+    return [Token(type_, type_.lower()) for type_ in types]
+
+
+def test_ring_buffer_wraps_around():
+    buffer = LookaheadBuffer(iter(range(1, 100)), capacity=4)
+    consumed = []
+    while buffer.peek() is not None:
+        assert buffer.peek(3) in (buffer.peek() + 3, None)
+        consumed.append(buffer.next())
+    assert consumed == list(range(1, 100))
+    assert buffer.next() is None
+
+
+def test_ring_buffer_overflow():
+    buffer = LookaheadBuffer(iter(range(1, 100)), capacity=4)
+    with pytest.raises(LookaheadOverflowException):
+        buffer.peek(4)
+
+
+def test_new_lines_are_not_peeked():
+    controller = TokensController(lookahead=4)
+    controller.reload(iter(make_tokens(["NAME"] + ["NEWLINE"] * 100 + ["ASSIGNMENT_OPERATOR", "WS", "NAME"])))
+    assert [controller.peek(k).type for k in range(3)] == ["NAME", "ASSIGNMENT_OPERATOR", "NAME"]
+    assert controller.peek(3) is None
+    tokens = [controller.next() for _ in range(3)]
+    assert [token.preceded_by_newline for token in tokens] == [False, True, False]
+    assert controller.next() is None
+
+
+def test_scanned_tokens_are_not_tagged_again(grammar: str):
+    scanner = CompiledScanner(grammar, ignore_ws=False)
+    controller = TokensController()
+    controller.reload(scanner.iter_text_tokens('ret\n\n  a ret b'))
+    tokens = [controller.next() for _ in range(4)]
+    assert [(token.value, token.preceded_by_newline) for token in tokens] == \
+           [('ret', False), ('a', True), ('ret', False), ('b', False)]
+
+
+@pytest.mark.parametrize("history_size, expected", [(0, []), (2, ["c", "d"]), (None, ["a", "b", "c", "d"])])
+def test_history(history_size, expected):
+    controller = TokensController(history_size=history_size)
+    # noinspection PyArgumentList
+    controller.reload(iter([Token("NAME", value) for value in "abcd"]))
+    while controller.peek() is not None:
+        controller.next()
+    assert list(controller.cached_tokens) == expected
+
+
+def test_matching_without_reading():
+    controller = TokensController()
+    controller.reload(iter(make_tokens(["LET", "NAME", "NEWLINE", "RETURN"])))
+    assert controller.peek_type(1) == "NAME" and controller.peek_matches(Tk.RETURN, 2)
+    assert controller.skip_if(Tk.LET) and not controller.skip_if(Tk.LET)
+    controller.skip()
+    assert not controller.next_on_same_line()
+    assert controller.skip_if(Tk.RETURN)
+    assert controller.peek_type() is None and not controller.peek_matches(Tk.RETURN)
+    assert [token.type for token in controller.cached_tokens] == ["LET", "NAME", "RETURN"]
@@ -1,11 +1,17 @@
 import io
 import os
+import sys
 from pathlib import Path
 
 import pytest
+from lark import Token
+from lark.exceptions import VisitError
 
 from interpreter.language_units import *
+from interpreter.parser.lalr_backend import LalrParser
+from interpreter.parser.parallel import parse_in_parallel, split_source
 from interpreter.parser.parser import RecursiveDescentParser
+from interpreter.scanner.compiled_scanner import CompiledScanner
 from interpreter.scanner.scanner import Scanner
 from interpreter.tree_transformer import TreeTransformer
 
@@ -91,3 +97,150 @@ def test_prefix_unary_expression(tree_2: Tree):
     unit = node.unit
     assert isinstance(unit, PrefixUnaryExpression)
     assert str(unit) == '-1'
+
+
+def test_names_are_interned(tree_2: Tree):
+    first, second = [node.children[0] for node in tree_2.iter_subtrees_topdown() if node.data == "type"]
+    assert type(first) is str
+    assert first is second
+    disjunction = find_node(tree_2, "disjunction")
+    additive_expression = find_node(tree_2, "additive_expression")
+    assert disjunction.children[0] is additive_expression.children[0]
+
+
+def test_lines_of_nodes_starting_with_names(tree_2: Tree):
+    assert find_node(tree_2, "disjunction").meta.line == 3
+    assert find_node(tree_2, "equality").meta.line == 4
+
+
+def describe(node):
+    if isinstance(node, Tree):
+        return (node.data,
+                getattr(node, 'identifier', None),
+                getattr(node.meta, 'line', None),
+                type(getattr(node, 'unit', None)).__name__,
+                [describe(child) for child in node.children])
+    if isinstance(node, SimpleLiteral):
+        return node.value, node.line
+    return type(node).__name__, str(node)
+
+
+@pytest.mark.parametrize("file_name", ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"])
+def test_parser_builds_same_units(file_name: str):
+    root = Path(os.getenv('PROJECT_ROOT'))
+    with open(root / 'grammar.txt') as f:
+        scanner = Scanner(f.read())
+    with open(root / "test files" / file_name) as f:
+        transformed = TreeTransformer().transform(RecursiveDescentParser(scanner).parse(f))
+    with open(root / "test files" / file_name) as f:
+        built = RecursiveDescentParser(scanner, build_units=True).parse(f)
+    assert describe(built) == describe(transformed)
+    assert built.children[0].unit == transformed.children[0].unit
+
+
+@pytest.mark.parametrize("file_name", ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"])
+def test_lalr_backend_builds_same_units(file_name: str):
+    root = Path(os.getenv('PROJECT_ROOT'))
+    with open(root / 'grammar.txt') as f:
+        grammar = f.read()
+    with open(root / "test files" / file_name) as f:
+        built = RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse(f)
+    with open(root / "test files" / file_name) as f:
+        lalr_built = LalrParser(grammar, build_units=True).parse(f)
+
+    # Tokens of the scanners are tagged with their channels, so the trees are compared without the token classes
+    def units(tree):
+        return [(node.identifier, getattr(node.meta, 'line', None), node.unit) for node in tree.iter_subtrees()
+                if isinstance(node, TreeWithUnit)]
+
+    assert lalr_built == built
+    assert units(lalr_built) == units(built)
+
+
+@pytest.mark.parametrize("file_name", ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"])
+def test_transform_on_stack(file_name: str):
+    root = Path(os.getenv('PROJECT_ROOT'))
+    with open(root / 'grammar.txt') as f:
+        parser = RecursiveDescentParser(Scanner(f.read()))
+    with open(root / "test files" / file_name) as f:
+        transformed = TreeTransformer().transform(parser.parse(f))
+    with open(root / "test files" / file_name) as f:
+        transformed_on_stack = TreeTransformer().transform_on_stack(parser.parse(f))
+    assert describe(transformed_on_stack) == describe(transformed)
+    assert transformed_on_stack.unit == transformed.unit
+
+
+def test_transform_on_stack_reports_same_errors():
+    def tree():
+        return Tree('start', [Tree('variable_declaration', [Token('VAR', 'var'), Token('NAME', 'a')])])
+
+    with pytest.raises(VisitError) as transform_error:
+        TreeTransformer().transform(tree())
+    with pytest.raises(VisitError) as stack_error:
+        TreeTransformer().transform_on_stack(tree())
+    assert stack_error.value.obj.data == transform_error.value.obj.data == 'variable_declaration'
+    assert type(stack_error.value.orig_exc) is type(transform_error.value.orig_exc) is AssertionError
+
+
+def test_transform_on_stack_calls_callbacks_of_subclasses():
+    class CountingTransformer(TreeTransformer):
+        def __init__(self):
+            super().__init__()
+            self.names = []
+
+        def NAME(self, token):
+            self.names.append(str(token))
+            return super().NAME(token)
+
+    transformer = CountingTransformer()
+    node = transformer.transform_on_stack(Tree('navigation_suffix', [Token('NAME', 'size')]))
+    assert transformer.names == ['size']
+    assert node.unit == NavigationSuffix('size') and node.identifier == 0
+
+
+def test_callbacks_are_only_rules_and_tokens():
+    callbacks = TreeTransformer().callbacks
+    assert 'assignment' in callbacks and 'NAME' in callbacks
+    assert not {'next_id', 'build', 'build_tree', 'transform', 'transform_on_stack'} & callbacks.keys()
+
+
+def test_transform_deeply_nested_tree():
+    depth = 100_000
+    tree = Tree('collection_literal', [Token('DEC_NUMBER', '1')])
+    for _ in range(depth - 1):
+        tree = Tree('collection_literal', [tree])
+    node = TreeTransformer().transform_on_stack(tree)
+    assert node.identifier == depth - 1
+    for identifier in range(depth - 1, 0, -1):
+        assert node.identifier == identifier and node.meta.line is None
+        node = node.unit.expressions[0]
+    assert node.unit.expressions == [SimpleLiteral(1, None)]
+
+
+def test_parse_in_parallel():
+    root = Path(os.getenv('PROJECT_ROOT'))
+    with open(root / 'grammar.txt') as f:
+        grammar = f.read()
+    texts = []
+    for file_name in ["test_file_1.txt", "test_file_2.txt", "recursive_fibo.txt"]:
+        with open(root / "test files" / file_name) as f:
+            texts.append(f.read())
+    text = '\n# "{"\n'.join(texts) + '\n# }'
+    chunks = split_source(text, 4)
+    assert len(chunks) > 2 and "".join(chunk.text for chunk in chunks) == text
+    parsed = RecursiveDescentParser(CompiledScanner(grammar), build_units=True).parse_text(text)
+    assert describe(parse_in_parallel(grammar, text, workers=2)) == describe(parsed)
+
+
+def test_names_are_interned_after_parse_in_parallel():
+    root = Path(os.getenv('PROJECT_ROOT'))
+    with open(root / 'grammar.txt') as f:
+        grammar = f.read()
+    with open(root / "test files" / "recursive_fibo.txt") as f:
+        text = f.read()
+    text = text + "\n" + text.replace("main()", "other()")
+    tree = parse_in_parallel(grammar, text, workers=2)
+    names = [child for node in tree.iter_subtrees() for child in node.children if type(child) is str]
+    assert names and all(name is sys.intern(name) for name in names)
+    declarations = [node.unit for node in tree.iter_subtrees() if node.data == "function_declaration"]
+    assert all(unit.name is sys.intern(unit.name) for unit in declarations)